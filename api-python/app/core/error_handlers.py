@@ -23,6 +23,7 @@ from app.core.exceptions import (
     BusinessLogicError,
     ExternalServiceError,
     DatabaseError,
+    OverloadedError,
 )
 
 logger = logging.getLogger(__name__)
@@ -142,6 +143,17 @@ def setup_exception_handlers(app: FastAPI) -> None:
             details="Please try again later",
         )
     
+    @app.exception_handler(OverloadedError)
+    async def overloaded_error_handler(request: Request, exc: OverloadedError) -> JSONResponse:
+        """Handle saturated work queues."""
+        logger.warning(f"Overloaded: {exc.message}")
+        return create_error_response(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            error_type="overloaded",
+            message="Service is busy",
+            details="Please try again later",
+        )
+    
     @app.exception_handler(DatabaseError)
     async def database_error_handler(request: Request, exc: DatabaseError) -> JSONResponse:
         """Handle database errors."""
@@ -40,6 +40,11 @@ class ExternalServiceError(JobPortalError):
     pass
 
 
+class OverloadedError(JobPortalError):
+    """Raised when a bounded work queue is full and the request should be retried later."""
+    pass
+
+
 # Job-specific exceptions
 class JobNotFoundError(NotFoundError):
     """Raised when a job is not found."""
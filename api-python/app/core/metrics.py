@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict
+
+import numpy as np
+
+# Recent samples kept per recorder for the latency percentiles.
+_WINDOW = 1024
+
+
+class LatencyRecorder:
+    """
+    Running count / mean / max of a latency plus p50 / p95 over the last `window` samples;
+    summary() is what the stats endpoints report. Not thread-safe by itself: record from
+    one event loop or under the owner's lock.
+    """
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int = _WINDOW) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        p50 = p95 = 0.0
+        if self.recent:
+            p50, p95 = np.percentile(np.fromiter(self.recent, dtype=np.float64), [50, 95]).tolist()
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
@@ -0,0 +1,64 @@
+"""
+Side effects that must only happen once a session's transaction is durable: task
+publishes, cache invalidation, in-process index and counter updates.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[List[Any]], None]
+_Deferred = Tuple[Optional[Handler], Optional[Handler], List[Any]]
+
+_PENDING = "after_commit.pending"
+_HOOKED = "after_commit.hooked"
+
+
+def defer(
+    session: AsyncSession,
+    key: str,
+    item: Any,
+    on_commit: Optional[Handler],
+    on_rollback: Optional[Handler] = None,
+) -> None:
+    """
+    Hand `item` to on_commit(items) once `session` commits, with every other item
+    deferred under `key` in this transaction (in the order they were deferred). On rollback
+    the items are passed to on_rollback instead; a missing handler drops them. Handlers run
+    synchronously inside commit()/rollback(), on the event-loop thread: hand off anything slow.
+    """
+    pending: Dict[str, _Deferred] = session.info.setdefault(_PENDING, {})
+    if key not in pending:
+        pending[key] = (on_commit, on_rollback, [])
+    pending[key][2].append(item)
+    if not session.info.get(_HOOKED):
+        session.info[_HOOKED] = True
+        event.listen(session.sync_session, "after_commit", _committed)
+        event.listen(session.sync_session, "after_rollback", _rolled_back)
+
+
+def _committed(session: Session) -> None:
+    for key, (on_commit, _, items) in (session.info.pop(_PENDING, None) or {}).items():
+        if on_commit is not None:
+            _run(key, on_commit, items)
+
+
+def _rolled_back(session: Session) -> None:
+    for key, (_, on_rollback, items) in (session.info.pop(_PENDING, None) or {}).items():
+        if on_rollback is not None:
+            _run(key, on_rollback, items)
+
+
+def _run(key: str, handler: Handler, items: List[Any]) -> None:
+    # the transaction is already over: a failing handler must neither undo it nor
+    # keep the handlers of other keys from running
+    try:
+        handler(items)
+    except Exception:
+        log.exception("after_commit_handler_failed", extra={"key": key, "items": len(items)})
@@ -0,0 +1,132 @@
+"""
+Shared asyncpg pool for code that talks to Postgres directly (PY_API_PG_DSN) instead of
+through the SQLAlchemy session, e.g. the keyword ranking routes.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.core.exceptions import OverloadedError
+from app.core.metrics import LatencyRecorder
+from app.db.ssl import create_ssl_context, needs_ssl
+
+
+class PgPool:
+    """
+    Lazily created asyncpg pool bound to one event loop. acquire() gives up after
+    PG_POOL_ACQUIRE_TIMEOUT with OverloadedError; acquire waits, hold times and
+    timeouts are recorded (see stats()).
+    """
+
+    def __init__(self, dsn: str) -> None:
+        cfg = get_settings()
+        self.dsn = dsn
+        self.min_size = cfg.PG_POOL_MIN_SIZE
+        self.max_size = max(cfg.PG_POOL_MAX_SIZE, cfg.PG_POOL_MIN_SIZE, 1)
+        self.acquire_timeout = cfg.PG_POOL_ACQUIRE_TIMEOUT
+        self.command_timeout = cfg.PG_POOL_COMMAND_TIMEOUT
+        self.max_inactive_lifetime = cfg.PG_POOL_MAX_INACTIVE_LIFETIME
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._lock = asyncio.Lock()
+        self._timeouts = 0
+        self._wait = LatencyRecorder()
+        self._hold = LatencyRecorder()
+
+    async def pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        dsn=self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        command_timeout=self.command_timeout,
+                        max_inactive_connection_lifetime=self.max_inactive_lifetime,
+                        ssl=create_ssl_context() if needs_ssl(self.dsn) else None,
+                    )
+                    self.loop = asyncio.get_running_loop()
+        return self._pool
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        pool = await self.pool()
+        start = time.monotonic()
+        try:
+            conn = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError as ex:
+            self._timeouts += 1
+            raise OverloadedError(
+                "Database connection pool exhausted",
+                f"no connection within {self.acquire_timeout}s (max_size={self.max_size})",
+            ) from ex
+        got = time.monotonic()
+        self._wait.add(got - start)
+        try:
+            yield conn
+        finally:
+            self._hold.add(time.monotonic() - got)
+            await pool.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self._pool
+        return {
+            "open": pool is not None,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": pool.get_size() if pool else 0,
+            "idle": pool.get_idle_size() if pool else 0,
+            "acquire_timeouts": self._timeouts,
+            "acquire_wait": self._wait.summary(),
+            "hold": self._hold.summary(),
+        }
+
+    async def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+
+_pg_pool: Optional[PgPool] = None
+
+
+def get_pg_pool() -> PgPool:
+    """
+    Shared pool for the running event loop. A new loop (e.g. asyncio.run per Celery task)
+    gets a fresh pool: connections are bound to the loop that opened them.
+    """
+    global _pg_pool
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    stale = _pg_pool is not None and _pg_pool.loop is not None and loop is not _pg_pool.loop
+    if _pg_pool is None or stale:
+        if stale and _pg_pool._pool is not None:
+            _pg_pool._pool.terminate()
+        _pg_pool = PgPool(get_settings().PY_API_PG_DSN)
+    return _pg_pool
+
+
+def pg_connection():
+    """
+    `async with pg_connection() as conn:` - a connection from the shared pool.
+    """
+    return get_pg_pool().acquire()
+
+
+def pg_pool_stats() -> Dict[str, Any]:
+    return _pg_pool.stats() if _pg_pool is not None else {"open": False}
+
+
+async def close_pg_pool() -> None:
+    global _pg_pool
+    if _pg_pool is not None:
+        await _pg_pool.close()
+        _pg_pool = None
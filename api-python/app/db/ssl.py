@@ -0,0 +1,51 @@
+"""
+TLS settings shared by every Postgres client of the app (SQLAlchemy engine, asyncpg pool).
+"""
+from __future__ import annotations
+
+import os
+import ssl
+from pathlib import Path
+
+
+def _ca_file_path() -> Path:
+    """
+    Resolve the CA certificate path.
+
+    Priority:
+      1) PGSSLROOTCERT env var (requested)
+      2) PG_SSL_CA_FILE env var (custom)
+      3) do-db-ca.crt in the same directory as this file
+    """
+    for key in ("PGSSLROOTCERT", "PG_SSL_CA_FILE"):
+        val = os.getenv(key)
+        if val:
+            p = Path(val)
+            if p.exists():
+                return p
+    # fall back to a CA file sitting next to this module
+    return Path(__file__).resolve().with_name("do-db-ca.crt")
+
+
+def needs_ssl(url: str) -> bool:
+    u = (url or "").lower()
+    return ("sslmode=require" in u) or ("ondigitalocean.com" in u) or (":25060" in u)
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    """Create SSL context (e.g., for DigitalOcean PostgreSQL)."""
+    ssl_context = ssl.create_default_context()
+    ca_path = _ca_file_path()
+    try:
+        if ca_path.exists():
+            ssl_context.load_verify_locations(cafile=str(ca_path))
+        else:
+            # Fall back to system trust store
+            print(f"Warning: CA file not found at {ca_path}; using system trust store.")
+        ssl_context.check_hostname = True
+        ssl_context.verify_mode = ssl.CERT_REQUIRED
+    except Exception as e:
+        print(f"Warning: Could not configure SSL context with CA {ca_path}: {e}")
+        ssl_context.check_hostname = True
+        ssl_context.verify_mode = ssl.CERT_REQUIRED
+    return ssl_context
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from typing import Any, Optional
@@ -7,23 +8,34 @@ from typing import Any, Optional
 from redis.asyncio import Redis
 
 _redis: Optional[Redis] = None
+_redis_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 def get_redis() -> Redis:
-    global _redis
-    if _redis is None:
+    """
+    Shared client for the running event loop. A new loop (e.g. asyncio.run per Celery
+    task) gets a fresh client: connections are bound to the loop that opened them.
+    """
+    global _redis, _redis_loop
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _redis is None or (loop is not None and loop is not _redis_loop):
         url = os.getenv("REDIS_URL")
         if not url:
             raise RuntimeError("REDIS_URL is not set")
         _redis = Redis.from_url(url, decode_responses=False)
+        _redis_loop = loop
     return _redis
 
 
 async def close_redis() -> None:
-    global _redis
+    global _redis, _redis_loop
     if _redis:
         await _redis.aclose()
         _redis = None
+        _redis_loop = None
 
 
 async def cache_set(key: str, value: bytes | str, *, ttl: int | None = None) -> None:
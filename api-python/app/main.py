@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.error_handlers import setup_exception_handlers
+from app.db.pg_pool import close_pg_pool
+from app.ml.executor import shutdown_executors
 from app.routes import health, auth, candidates, applications, analytics, jobs, resumes
 from app.routes.ranking import router as ranking_router
 from app.routes.ai_alias import router as ai_router
@@ -12,9 +17,16 @@ from app.routes.starred_jobs import router as starred_jobs_router
 from app.routes.users import router as users_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_pg_pool()
+    shutdown_executors()
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="Job Portal Python API")
+    app = FastAPI(title="Job Portal Python API", lifespan=lifespan)
     setup_exception_handlers(app)
 
     app.add_middleware(
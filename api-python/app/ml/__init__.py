@@ -1,14 +1,78 @@
 from __future__ import annotations
 
-from .embeddings import embed_texts, cosine_similarity
+from .embeddings import (
+    EMBEDDING_DIMS,
+    EMBEDDING_VERSION,
+    CsrMatrix,
+    SparseVector,
+    cosine_scores,
+    cosine_similarity,
+    csr_cross_scores,
+    csr_scores,
+    csr_to_dense,
+    embed_csr,
+    embed_matrix,
+    embed_sparse,
+    embed_texts,
+    pack_sparse,
+    pack_sparse_q8,
+    quantize_values,
+    sparse_dot,
+    stack_sparse,
+    unpack_sparse,
+    unpack_sparse_q8,
+)
+from .ann import LshIndex
+from .inverted import InvertedIndex
+from .keywords import KeywordScanner, scanner_for
+from .skills import SKILL_CANON_VERSION, canonical_tag, canonicalize, canonicalize_many
+from .topk import select_top_k, top_k_indices
+from .hybrid import HybridWeights, fuse_scores, rank_jobs_for_resume, rank_resumes_for_job, score_resume_for_jobs
 from .recommend import (
+    iter_job_recommendations,
     recommend_jobs_for_resume,
+    recommend_jobs_for_resumes,
     recommend_resumes_for_job,
 )
 
 __all__ = [
+    "EMBEDDING_DIMS",
+    "EMBEDDING_VERSION",
+    "CsrMatrix",
+    "SparseVector",
     "embed_texts",
+    "embed_sparse",
+    "embed_csr",
+    "stack_sparse",
+    "sparse_dot",
+    "csr_scores",
+    "csr_to_dense",
+    "csr_cross_scores",
+    "pack_sparse",
+    "unpack_sparse",
+    "pack_sparse_q8",
+    "unpack_sparse_q8",
+    "quantize_values",
+    "LshIndex",
+    "InvertedIndex",
+    "KeywordScanner",
+    "scanner_for",
+    "SKILL_CANON_VERSION",
+    "canonical_tag",
+    "canonicalize",
+    "canonicalize_many",
+    "select_top_k",
+    "top_k_indices",
+    "embed_matrix",
     "cosine_similarity",
+    "cosine_scores",
     "recommend_jobs_for_resume",
+    "recommend_jobs_for_resumes",
+    "iter_job_recommendations",
     "recommend_resumes_for_job",
+    "HybridWeights",
+    "fuse_scores",
+    "rank_jobs_for_resume",
+    "rank_resumes_for_job",
+    "score_resume_for_jobs",
 ]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from app.ml.embeddings import (
+    EMBEDDING_DIMS,
+    CsrMatrix,
+    SparseVector,
+    csr_scores,
+    pack_sparse_q8,
+    stack_sparse,
+    unpack_sparse_q8,
+)
+from app.ml.topk import top_k_indices
+
+
+class LshIndex:
+    """
+    Random-hyperplane LSH over sparse hashed embeddings (cosine similarity).
+
+    Each vector gets `n_tables` signatures of `n_bits` sign bits. A query gathers every id
+    sharing a bucket with it (plus, with probes=1, buckets one bit-flip away) and re-scores
+    that shortlist exactly. Recall/latency knobs:
+      - more tables or probes -> higher recall, larger shortlist
+      - more bits -> smaller buckets, lower latency, lower recall
+
+    quantized=True keeps vectors as pack_sparse_q8 bytes (~3 bytes per non-zero instead of
+    two numpy arrays per id); shortlist scores are then approximate and callers re-score.
+    """
+
+    def __init__(
+        self,
+        *,
+        dims: int = EMBEDDING_DIMS,
+        n_tables: int = 16,
+        n_bits: int = 10,
+        probes: int = 1,
+        seed: int = 0,
+        quantized: bool = False,
+    ) -> None:
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits must be in 1..62")
+        self.dims = dims
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.probes = probes
+        self.quantized = quantized
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((dims, n_tables * n_bits)).astype(np.float32)
+        self._weights = (np.int64(1) << np.arange(n_bits, dtype=np.int64))
+        self._tables: List[Dict[int, Set[Hashable]]] = [{} for _ in range(n_tables)]
+        self._keys: Dict[Hashable, np.ndarray] = {}
+        self._vecs: Dict[Hashable, Union[SparseVector, bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._vecs)
+
+    def __contains__(self, id_: Hashable) -> bool:
+        return id_ in self._vecs
+
+    def _signatures(self, m: CsrMatrix) -> np.ndarray:
+        """
+        (n_rows, n_tables) int64 bucket keys for every row of a CSR batch.
+        """
+        n, nnz = m.n_rows, len(m.indices)
+        proj = np.zeros((n, self._planes.shape[1]), dtype=np.float32)
+        if nnz:
+            contrib = m.data[:, None] * self._planes[m.indices]
+            starts = np.minimum(m.indptr[:-1], nnz - 1)
+            proj = np.add.reduceat(contrib, starts, axis=0)
+            proj[np.diff(m.indptr) == 0] = 0.0
+        bits = (proj > 0).reshape(n, self.n_tables, self.n_bits).astype(np.int64)
+        return bits @ self._weights
+
+    def add(self, ids: Sequence[Hashable], vecs: Sequence[SparseVector]) -> None:
+        """
+        Insert or replace vectors. Empty vectors are dropped (they can never score > 0).
+        """
+        self.remove(ids)
+        keep = [(i, v) for i, v in zip(ids, vecs) if len(v.indices)]
+        if not keep:
+            return
+        keys = self._signatures(stack_sparse([v for _, v in keep], self.dims))
+        for (id_, v), row in zip(keep, keys):
+            self._vecs[id_] = pack_sparse_q8(v) if self.quantized else v
+            self._keys[id_] = row
+            for t, k in enumerate(row.tolist()):
+                self._tables[t].setdefault(k, set()).add(id_)
+
+    def remove(self, ids: Iterable[Hashable]) -> None:
+        for id_ in ids:
+            row = self._keys.pop(id_, None)
+            if row is None:
+                continue
+            self._vecs.pop(id_, None)
+            for t, k in enumerate(row.tolist()):
+                bucket = self._tables[t].get(k)
+                if bucket is not None:
+                    bucket.discard(id_)
+                    if not bucket:
+                        del self._tables[t][k]
+
+    def _vec(self, id_: Hashable) -> SparseVector:
+        v = self._vecs[id_]
+        return unpack_sparse_q8(v, self.dims) if isinstance(v, bytes) else v
+
+    def candidates(self, vec: SparseVector) -> Set[Hashable]:
+        if not len(vec.indices):
+            return set()
+        row = self._signatures(stack_sparse([vec], self.dims))[0].tolist()
+        out: Set[Hashable] = set()
+        for t, k in enumerate(row):
+            table = self._tables[t]
+            out |= table.get(k, set())
+            if self.probes:
+                for b in range(self.n_bits):
+                    out |= table.get(k ^ (1 << b), set())
+        return out
+
+    def query(self, vec: SparseVector, k: int) -> List[Tuple[Hashable, float]]:
+        """
+        Approximate top-k by cosine: shortlist via LSH buckets, then exact re-score.
+        Only positive scores are returned, best first, ties by id.
+        """
+        ids = list(self.candidates(vec))
+        if not ids:
+            return []
+        scores = csr_scores(stack_sparse([self._vec(i) for i in ids], self.dims), vec)
+        return [(ids[i], float(scores[i])) for i in top_k_indices(scores, max(1, k), ids.__getitem__)]
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.after_commit import defer
+from app.models.embedding import JobEmbedding, ResumeEmbedding
+from app.models.job import Job
+from app.models.resume_features import ResumeFeatures
+from app.ml.ann import LshIndex
+from app.ml.inverted import InvertedIndex
+from app.ml.skills import SkillIndex, stored_tags
+from app.ml.embeddings import EMBEDDING_DIMS, EMBEDDING_VERSION, SparseVector, unpack_sparse
+from app.ml.executor import MlExecutor, lane
+from app.ml.snapshot import Snapshot, open_snapshot, snapshot_key, write_snapshot
+from app.ml.store import load_job_vectors, load_resume_vectors
+
+log = logging.getLogger(__name__)
+
+# Re-read a little before the watermark: now() is the *transaction start* time, so a
+# long transaction can commit rows stamped earlier than what we already synced.
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+RetrievalIndex = Union[InvertedIndex, LshIndex]
+
+_DISCARD = object()
+
+
+class _Delta(NamedTuple):
+    watermark: Optional[datetime]
+    ids: List[Any]
+    vecs: List[Any]  # SparseVector; skill lists for the skill corpora
+    removed: List[Any]
+
+
+class CorpusIndex(ABC):
+    """
+    Process-wide retrieval index (ML_RETRIEVER) over one corpus (active jobs or resume features).
+
+    Built lazily on first use, then kept current two ways:
+      - writes made in this process call put()/discard() (see job_repo, resume_features_repo),
+        applied once their transaction commits and dropped if it rolls back
+      - sync() pulls rows changed by other processes since the last watermark,
+        at most every ML_INDEX_SYNC_SECONDS
+
+    Every read and write of the index runs on the corpus' executor lane (one thread, in
+    submission order), so queries never block the event loop and never race a write.
+
+    With ML_SNAPSHOT_DIR set, the index starts from the memory-mapped snapshot published
+    there (see publish()) plus the rows changed since it was taken, instead of reading and
+    re-embedding the whole corpus; a newer snapshot is swapped in on the next sync.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.index: Optional[RetrievalIndex] = None
+        self._watermark: Optional[datetime] = None
+        self._last_sync = 0.0
+        self._snapshot_key: Optional[Tuple[int, int]] = None
+        self._lock = asyncio.Lock()
+
+    def _new_index(self, snap: Optional[Snapshot] = None) -> RetrievalIndex:
+        cfg = get_settings()
+        quantized = cfg.ML_INDEX_PRECISION == "int8"
+        if cfg.ML_RETRIEVER != "lsh":
+            if snap is not None:
+                return InvertedIndex.from_snapshot(snap, quantized=quantized)
+            return InvertedIndex(dims=EMBEDDING_DIMS, quantized=quantized)
+        index = LshIndex(
+            dims=EMBEDDING_DIMS,
+            n_tables=cfg.ML_ANN_TABLES,
+            n_bits=cfg.ML_ANN_BITS,
+            probes=cfg.ML_ANN_PROBES,
+            quantized=quantized,
+        )
+        if snap is not None:
+            index.add([snap.id(i) for i in range(snap.n_rows)], [snap.matrix.row(i) for i in range(snap.n_rows)])
+        return index
+
+    def snapshot_path(self) -> Optional[Path]:
+        root = get_settings().ML_SNAPSHOT_DIR
+        return Path(root) / f"{self.name}.snap" if root else None
+
+    def _fresh_snapshot(self) -> Optional[Snapshot]:
+        """
+        The published snapshot if it differs from the one the current index was built from.
+        """
+        path = self.snapshot_path()
+        if path is None:
+            return None
+        key = snapshot_key(path)
+        if key is None or key == self._snapshot_key:
+            return None
+        snap = open_snapshot(path)
+        if snap is None or snap.version != EMBEDDING_VERSION or snap.corpus != self.name or snap.dims != EMBEDDING_DIMS:
+            return None
+        return snap
+
+    @property
+    def lane(self) -> MlExecutor:
+        return lane(self.name)
+
+    def _add(self, id_: uuid.UUID, vec: SparseVector) -> None:
+        if self.index is not None:
+            self.index.add([id_], [vec])
+
+    def _remove(self, id_: uuid.UUID) -> None:
+        if self.index is not None:
+            self.index.remove([id_])
+
+    def put(self, session: AsyncSession, id_: uuid.UUID, vec: SparseVector) -> None:
+        defer(session, f"corpus:{self.name}", (id_, vec), self._write)
+
+    def discard(self, session: AsyncSession, id_: uuid.UUID) -> None:
+        # a rolled back discard must not drop a live row: sync() only re-reads rows whose
+        # updated_at moved, so it would never come back
+        defer(session, f"corpus:{self.name}", (id_, _DISCARD), self._write)
+
+    def _write(self, ops: List[Tuple[uuid.UUID, Any]]) -> None:
+        # one transaction's writes, in order, on the lane
+        for id_, vec in ops:
+            if vec is _DISCARD:
+                self.lane.submit(self._remove, id_)
+            else:
+                self.lane.submit(self._add, id_, vec)
+
+    async def query(self, index: RetrievalIndex, vec: SparseVector, k: int) -> List[Tuple[Any, float]]:
+        return await self.lane.run(index.query, vec, k)
+
+    def reset(self) -> None:
+        self.index = None
+        self._watermark = None
+        self._last_sync = 0.0
+        self._snapshot_key = None
+
+    async def sync(self, session: AsyncSession, *, force: bool = False) -> RetrievalIndex:
+        async with self._lock:
+            due = time.monotonic() - self._last_sync >= get_settings().ML_INDEX_SYNC_SECONDS
+            if self.index is None or due or force:
+                snap = self._fresh_snapshot()
+                if snap is not None:
+                    # build aside and swap in one assignment; queries keep the old index meanwhile
+                    index = await self.lane.run(self._new_index, snap)
+                    self._watermark = await self._apply(index, session, snap.watermark)
+                    self.index, self._snapshot_key = index, snap.key
+                    log.info("corpus_snapshot_loaded", extra={"corpus": self.name, "rows": snap.n_rows})
+                else:
+                    if self.index is None:
+                        self.index = self._new_index()
+                        self._watermark = None
+                    self._watermark = await self._apply(self.index, session, self._watermark)
+                self._last_sync = time.monotonic()
+            assert self.index is not None
+            return self.index
+
+    async def _apply(
+        self, index: RetrievalIndex, session: AsyncSession, watermark: Optional[datetime]
+    ) -> Optional[datetime]:
+        """
+        Pull rows changed since `watermark` into `index`; returns the new watermark.
+        """
+        since = watermark - _SYNC_OVERLAP if watermark else None
+        delta = await self._pull(session, since)
+        await self.lane.run(_apply_delta, index, delta)
+        if delta.watermark and (watermark is None or delta.watermark > watermark):
+            return delta.watermark
+        return watermark
+
+    async def publish(self, session: AsyncSession) -> Optional[Path]:
+        """
+        Write the whole corpus (stored vectors, recomputing missing ones) to ML_SNAPSHOT_DIR.
+        Processes on this host pick it up on their next sync.
+        """
+        path = self.snapshot_path()
+        if path is None:
+            return None
+        delta = await self._pull(session, None)
+        return await asyncio.to_thread(
+            write_snapshot,
+            path,
+            delta.ids,
+            delta.vecs,
+            corpus=self.name,
+            version=EMBEDDING_VERSION,
+            watermark=delta.watermark,
+            quantized=get_settings().ML_INDEX_PRECISION == "int8",
+        )
+
+    @abstractmethod
+    async def _pull(self, session: AsyncSession, since: Optional[datetime]) -> _Delta:
+        """
+        Rows changed since `since` (everything live if None): vectors to upsert and ids to drop.
+        """
+
+
+def _apply_delta(index: RetrievalIndex, delta: _Delta) -> None:
+    index.remove(delta.removed)
+    index.add(delta.ids, delta.vecs)
+
+
+class _JobCorpus(CorpusIndex):
+    async def _pull(self, session: AsyncSession, since: Optional[datetime]) -> _Delta:
+        q = select(
+            Job.id, Job.is_active, JobEmbedding.vector,
+            func.greatest(Job.updated_at, func.coalesce(JobEmbedding.updated_at, Job.updated_at)),
+        ).outerjoin(
+            JobEmbedding, and_(JobEmbedding.job_id == Job.id, JobEmbedding.version == EMBEDDING_VERSION)
+        )
+        if since is None:
+            q = q.where(Job.is_active.is_(True))
+        else:
+            q = q.where(or_(Job.updated_at > since, JobEmbedding.updated_at > since))
+
+        watermark: Optional[datetime] = None
+        ids: List[Any] = []
+        vecs: List[SparseVector] = []
+        missing: List[uuid.UUID] = []
+        removed: List[Any] = []
+        for job_id, active, data, ts in (await session.execute(q)).all():
+            watermark = ts if watermark is None or ts > watermark else watermark
+            if not active:
+                removed.append(job_id)
+            elif data is None:
+                missing.append(job_id)
+            else:
+                ids.append(job_id)
+                vecs.append(unpack_sparse(data, EMBEDDING_DIMS))
+
+        if missing:
+            jobs = (await session.execute(select(Job).where(Job.id.in_(missing)))).scalars().all()
+            m = await load_job_vectors(session, jobs)
+            ids.extend(j.id for j in jobs)
+            vecs.extend(m.row(i) for i in range(m.n_rows))
+        return _Delta(watermark, ids, vecs, removed)
+
+
+class _ResumeCorpus(CorpusIndex):
+    async def _pull(self, session: AsyncSession, since: Optional[datetime]) -> _Delta:
+        q = select(
+            ResumeFeatures.resume_id, ResumeFeatures.updated_at,
+            ResumeEmbedding.vector, ResumeEmbedding.features_updated_at,
+        ).outerjoin(
+            ResumeEmbedding,
+            and_(
+                ResumeEmbedding.resume_id == ResumeFeatures.resume_id,
+                ResumeEmbedding.version == EMBEDDING_VERSION,
+            ),
+        )
+        if since is not None:
+            q = q.where(ResumeFeatures.updated_at > since)
+
+        watermark: Optional[datetime] = None
+        ids: List[Any] = []
+        vecs: List[SparseVector] = []
+        stale: List[uuid.UUID] = []
+        for rid, updated_at, data, features_ts in (await session.execute(q)).all():
+            watermark = updated_at if watermark is None or updated_at > watermark else watermark
+            if data is None or features_ts != updated_at:
+                stale.append(rid)
+            else:
+                ids.append(rid)
+                vecs.append(unpack_sparse(data, EMBEDDING_DIMS))
+
+        if stale:
+            feats = (await session.execute(
+                select(ResumeFeatures).where(ResumeFeatures.resume_id.in_(stale))
+            )).scalars().all()
+            m = await load_resume_vectors(session, feats)
+            ids.extend(f.resume_id for f in feats)
+            vecs.extend(m.row(i) for i in range(m.n_rows))
+        return _Delta(watermark, ids, vecs, [])
+
+
+class _SkillCorpus(CorpusIndex):
+    """
+    Same lifecycle as the embedding corpora (lazy build, put/discard, watermark sync,
+    executor lane), over a SkillIndex of the rows' canonical skill tags. Not snapshotted.
+    """
+
+    def _new_index(self, snap: Optional[Snapshot] = None) -> SkillIndex:  # type: ignore[override]
+        return SkillIndex()
+
+    def snapshot_path(self) -> Optional[Path]:
+        return None
+
+
+class _JobSkills(_SkillCorpus):
+    async def _pull(self, session: AsyncSession, since: Optional[datetime]) -> _Delta:
+        q = select(Job.id, Job.is_active, Job.skills, Job.skills_norm, Job.skills_version, Job.updated_at)
+        if since is None:
+            q = q.where(Job.is_active.is_(True))
+        else:
+            q = q.where(Job.updated_at > since)
+
+        watermark: Optional[datetime] = None
+        ids: List[Any] = []
+        skills: List[Any] = []
+        removed: List[Any] = []
+        for job_id, active, raw, norm, version, ts in (await session.execute(q)).all():
+            watermark = ts if watermark is None or ts > watermark else watermark
+            if active:
+                ids.append(job_id)
+                skills.append(stored_tags(raw, norm, version))
+            else:
+                removed.append(job_id)
+        return _Delta(watermark, ids, skills, removed)
+
+
+class _ResumeSkills(_SkillCorpus):
+    async def _pull(self, session: AsyncSession, since: Optional[datetime]) -> _Delta:
+        q = select(
+            ResumeFeatures.resume_id,
+            ResumeFeatures.skills,
+            ResumeFeatures.skills_norm,
+            ResumeFeatures.skills_version,
+            ResumeFeatures.updated_at,
+        )
+        if since is not None:
+            q = q.where(ResumeFeatures.updated_at > since)
+
+        watermark: Optional[datetime] = None
+        ids: List[Any] = []
+        skills: List[Any] = []
+        for rid, raw, norm, version, ts in (await session.execute(q)).all():
+            watermark = ts if watermark is None or ts > watermark else watermark
+            ids.append(rid)
+            skills.append(stored_tags(raw, norm, version))
+        return _Delta(watermark, ids, skills, [])
+
+
+job_corpus: CorpusIndex = _JobCorpus("jobs")
+resume_corpus: CorpusIndex = _ResumeCorpus("resumes")
+job_skills: CorpusIndex = _JobSkills("skills:jobs")
+resume_skills: CorpusIndex = _ResumeSkills("skills:resumes")
@@ -3,8 +3,20 @@ from __future__ import annotations
 import hashlib
 import math
 import re
-from typing import Iterable, List, Sequence
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
+import numpy as np
+
+
+# Hash-space size used by the recommenders. The sparse path keeps memory and CPU
+# proportional to the tokens actually present, so this can grow (e.g. 1 << 18)
+# to reduce collisions without touching the scoring code.
+EMBEDDING_DIMS = 512
+
+# Stamp stored alongside persisted vectors; bump whenever tokenization, hashing or
+# weighting changes so stale rows are recomputed instead of silently mixed in.
+EMBEDDING_VERSION = f"hbow-md5-{EMBEDDING_DIMS}-v1"
 
 _token_re = re.compile(r"[A-Za-z0-9\+\#\.\-]+")
 
@@ -15,6 +27,7 @@ def _tokenize(text: str) -> list[str]:
     return [t.lower() for t in _token_re.findall(text)]
 
 
+@lru_cache(maxsize=65536)
 def _hash_idx(token: str, dims: int) -> int:
     h = hashlib.md5(token.encode("utf-8")).hexdigest()
     return int(h, 16) % dims
@@ -52,3 +65,212 @@ def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
     if s > 1:
         return 1.0
     return float(round(s, 6))
+
+
+def embed_matrix(texts: Sequence[str], dims: int = 512) -> np.ndarray:
+    """
+    Array-backed variant of embed_texts: one contiguous float32 matrix of shape
+    (len(texts), dims) with L2-normalized rows (empty texts stay all-zero).
+    """
+    m = np.zeros((len(texts), dims), dtype=np.float32)
+    for i, text in enumerate(texts):
+        toks = _tokenize(text)
+        if not toks:
+            continue
+        idx = np.fromiter((_hash_idx(t, dims) for t in toks), dtype=np.intp, count=len(toks))
+        m[i] = np.bincount(idx, minlength=dims)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    m /= norms
+    return m
+
+
+def cosine_scores(matrix: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    """
+    Score every row of an L2-normalized matrix against one vector in a single
+    matrix-vector product. Clamped and rounded like cosine_similarity.
+    """
+    if matrix.size == 0 or vec.size == 0 or matrix.shape[1] != vec.shape[0]:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    s = matrix @ vec.astype(matrix.dtype, copy=False)
+    return np.round(np.clip(s, 0.0, 1.0), 6)
+
+
+class SparseVector(NamedTuple):
+    """
+    L2-normalized hashed bag-of-words: sorted unique bucket ids plus their weights.
+    """
+    indices: np.ndarray  # int32, sorted, unique
+    values: np.ndarray   # float32
+    dims: int
+
+
+class CsrMatrix(NamedTuple):
+    """
+    Batch of sparse vectors in CSR layout (row i spans indptr[i]:indptr[i+1]).
+    """
+    indptr: np.ndarray   # int64, len = n_rows + 1
+    indices: np.ndarray  # int32
+    data: np.ndarray     # float32
+    dims: int
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row(self, i: int) -> SparseVector:
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return SparseVector(self.indices[a:b], self.data[a:b], self.dims)
+
+
+def _sparse_one(text: str, dims: int) -> SparseVector:
+    toks = _tokenize(text)
+    if not toks:
+        return SparseVector(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), dims)
+    idx = np.fromiter((_hash_idx(t, dims) for t in toks), dtype=np.int32, count=len(toks))
+    uniq, counts = np.unique(idx, return_counts=True)
+    vals = counts.astype(np.float32)
+    vals /= np.float32(np.sqrt(np.dot(vals, vals)))
+    return SparseVector(uniq, vals, dims)
+
+
+def embed_sparse(texts: Sequence[str], dims: int = EMBEDDING_DIMS) -> list[SparseVector]:
+    """
+    Same embedding as embed_texts, but only the non-zero buckets are materialized.
+    """
+    return [_sparse_one(t, dims) for t in texts]
+
+
+def embed_csr(texts: Sequence[str], dims: int = EMBEDDING_DIMS) -> CsrMatrix:
+    """
+    Embed a batch of texts straight into one CSR matrix.
+    """
+    return stack_sparse(embed_sparse(texts, dims), dims)
+
+
+def stack_sparse(vecs: Sequence[SparseVector], dims: int = EMBEDDING_DIMS) -> CsrMatrix:
+    indptr = np.zeros(len(vecs) + 1, dtype=np.int64)
+    if vecs:
+        np.cumsum([len(v.indices) for v in vecs], out=indptr[1:])
+        indices = np.concatenate([v.indices for v in vecs]).astype(np.int32, copy=False)
+        data = np.concatenate([v.values for v in vecs]).astype(np.float32, copy=False)
+    else:
+        indices = np.empty(0, dtype=np.int32)
+        data = np.empty(0, dtype=np.float32)
+    return CsrMatrix(indptr, indices, data, dims)
+
+
+def sparse_dot(a: SparseVector, b: SparseVector) -> float:
+    """
+    Cosine similarity of two sparse vectors, clamped and rounded like cosine_similarity.
+    """
+    if a.dims != b.dims or not len(a.indices) or not len(b.indices):
+        return 0.0
+    _, ia, ib = np.intersect1d(a.indices, b.indices, assume_unique=True, return_indices=True)
+    s = float(np.dot(a.values[ia], b.values[ib]))
+    return float(round(min(max(s, 0.0), 1.0), 6))
+
+
+def csr_scores(matrix: CsrMatrix, vec: SparseVector) -> np.ndarray:
+    """
+    Score every row of a CSR batch against one sparse vector. Work is proportional to
+    the number of stored entries, not n_rows * dims.
+    """
+    n = matrix.n_rows
+    if n == 0 or matrix.dims != vec.dims or not len(vec.indices) or not len(matrix.indices):
+        return np.zeros(n, dtype=np.float32)
+    pos = np.searchsorted(vec.indices, matrix.indices)
+    pos[pos == len(vec.indices)] = 0
+    hit = vec.indices[pos] == matrix.indices
+    contrib = np.where(hit, matrix.data * vec.values[pos], np.float32(0.0))
+    rows = np.repeat(np.arange(n), np.diff(matrix.indptr))
+    s = np.bincount(rows, weights=contrib, minlength=n).astype(np.float32)
+    return np.round(np.clip(s, 0.0, 1.0), 6)
+
+
+def csr_to_dense(matrix: CsrMatrix, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Rows [start, stop) of a CSR batch as a dense float32 block.
+    """
+    stop = matrix.n_rows if stop is None else min(stop, matrix.n_rows)
+    n = max(0, stop - start)
+    out = np.zeros((n, matrix.dims), dtype=np.float32)
+    if n:
+        a, b = matrix.indptr[start], matrix.indptr[stop]
+        rows = np.repeat(np.arange(n), np.diff(matrix.indptr[start:stop + 1]))
+        out[rows, matrix.indices[a:b]] = matrix.data[a:b]
+    return out
+
+
+def csr_cross_scores(queries: CsrMatrix, corpus: CsrMatrix, *, block: Optional[int] = None) -> np.ndarray:
+    """
+    Score every query row against every corpus row in one pass: a (n_queries, n_corpus)
+    float32 matrix, clamped and rounded like csr_scores. The corpus is densified `block`
+    rows at a time (default: ~16 MB worth), so each block costs one BLAS matrix product
+    and memory stays bounded.
+    """
+    out = np.zeros((queries.n_rows, corpus.n_rows), dtype=np.float32)
+    if not queries.n_rows or not corpus.n_rows or queries.dims != corpus.dims:
+        return out
+    block = block or max(1, (1 << 22) // corpus.dims)
+    q = csr_to_dense(queries)
+    for start in range(0, corpus.n_rows, block):
+        stop = min(start + block, corpus.n_rows)
+        out[:, start:stop] = q @ csr_to_dense(corpus, start, stop).T
+    np.clip(out, 0.0, 1.0, out=out)
+    return np.round(out, 6, out=out)
+
+
+def pack_sparse(vec: SparseVector) -> bytes:
+    """
+    Serialize to bytes: little-endian int32 indices followed by float32 values.
+    """
+    return vec.indices.astype("<i4").tobytes() + vec.values.astype("<f4").tobytes()
+
+
+def unpack_sparse(data: bytes, dims: int = EMBEDDING_DIMS) -> SparseVector:
+    n = len(data) // 8
+    indices = np.frombuffer(data, dtype="<i4", count=n).astype(np.int32)
+    values = np.frombuffer(data, dtype="<f4", count=n, offset=n * 4).astype(np.float32)
+    return SparseVector(indices, values, dims)
+
+
+def quantize_values(values: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    uint8 codes for non-negative weights plus one scale (max / 255): value ~= code * scale.
+    """
+    top = float(values.max()) if len(values) else 0.0
+    if top <= 0.0:
+        return np.zeros(len(values), dtype=np.uint8), 0.0
+    scale = top / 255.0
+    return np.rint(np.clip(values, 0.0, None) / scale).astype(np.uint8), scale
+
+
+def _q8_index_dtype(dims: int) -> str:
+    return "<u2" if dims <= 1 << 16 else "<i4"
+
+
+def pack_sparse_q8(vec: SparseVector) -> bytes:
+    """
+    Compact lossy serialization with a per-vector scale: float32 scale, then indices
+    (uint16 while dims <= 65536, else int32), then uint8 codes. About 3 bytes per
+    non-zero bucket versus 8 for pack_sparse.
+    """
+    codes, scale = quantize_values(vec.values)
+    return (
+        np.float32(scale).astype("<f4").tobytes()
+        + vec.indices.astype(_q8_index_dtype(vec.dims)).tobytes()
+        + codes.tobytes()
+    )
+
+
+def unpack_sparse_q8(data: bytes, dims: int = EMBEDDING_DIMS) -> SparseVector:
+    """
+    Inverse of pack_sparse_q8; values come back dequantized as float32.
+    """
+    idx_dtype = np.dtype(_q8_index_dtype(dims))
+    n = (len(data) - 4) // (idx_dtype.itemsize + 1)
+    scale = np.frombuffer(data, dtype="<f4", count=1)[0]
+    indices = np.frombuffer(data, dtype=idx_dtype, count=n, offset=4).astype(np.int32)
+    codes = np.frombuffer(data, dtype=np.uint8, count=n, offset=4 + n * idx_dtype.itemsize)
+    return SparseVector(indices, codes.astype(np.float32) * scale, dims)
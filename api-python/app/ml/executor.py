@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.core.config import get_settings
+from app.core.exceptions import OverloadedError
+from app.core.metrics import LatencyRecorder
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _timed(fn: Callable[..., T], args: Tuple[Any, ...]) -> Tuple[float, float, T]:
+    """
+    Runs inside the worker (thread or process); time.monotonic is system-wide on the host,
+    so start/end are comparable with the submitting side.
+    """
+    start = time.monotonic()
+    out = fn(*args)
+    return start, time.monotonic(), out
+
+
+class MlExecutor:
+    """
+    Runs CPU-heavy ML work off the event loop on a thread or process pool (pool=None runs
+    inline). At most max_workers + max_queue calls may be in flight; beyond that run()
+    raises OverloadedError instead of letting latency grow without bound. Queue wait and
+    execution time are recorded per executor (see stats()).
+    """
+
+    def __init__(self, name: str, pool: Optional[Executor], *, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.pool = pool
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._failed = 0
+        self._wait = LatencyRecorder()
+        self._exec = LatencyRecorder()
+
+    def _enter(self, bounded: bool) -> None:
+        with self._lock:
+            if bounded and self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise OverloadedError(f"ML executor '{self.name}' is saturated", details="retry later")
+            self._in_flight += 1
+
+    def _exit(self, queued: float, result: Optional[Tuple[float, float, Any]]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if result is None:
+                self._failed += 1
+                return
+            start, end, _ = result
+            self._wait.add(max(0.0, start - queued))
+            self._exec.add(end - start)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Await fn(*args) on the pool. With a process pool, fn and args must be picklable.
+        """
+        self._enter(bounded=True)
+        queued = time.monotonic()
+        result: Optional[Tuple[float, float, T]] = None
+        try:
+            if self.pool is None:
+                result = _timed(fn, args)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self.pool, _timed, fn, args)
+            return result[2]
+        finally:
+            self._exit(queued, result)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Fire-and-forget. Never rejected (used for index writes that must not be dropped);
+        failures are logged.
+        """
+        self._enter(bounded=False)
+        queued = time.monotonic()
+        if self.pool is None:
+            result = None
+            try:
+                result = _timed(fn, args)
+            except Exception:
+                log.exception("ml_executor_task_failed", extra={"executor": self.name})
+            finally:
+                self._exit(queued, result)
+            return
+
+        def _done(fut: Future) -> None:
+            exc = fut.exception()
+            if exc is not None:
+                log.error("ml_executor_task_failed", exc_info=exc, extra={"executor": self.name})
+            self._exit(queued, None if exc else fut.result())
+
+        self.pool.submit(_timed, fn, args).add_done_callback(_done)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": type(self.pool).__name__ if self.pool else "inline",
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "failed": self._failed,
+                "queue_wait": self._wait.summary(),
+                "execution": self._exec.summary(),
+            }
+
+    def shutdown(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: Dict[str, MlExecutor] = {}
+_registry_lock = threading.Lock()
+
+
+def _get(name: str, factory: Callable[[], MlExecutor]) -> MlExecutor:
+    with _registry_lock:
+        ex = _executors.get(name)
+        if ex is None:
+            ex = _executors[name] = factory()
+        return ex
+
+
+def _threads(name: str, workers: int) -> MlExecutor:
+    cfg = get_settings()
+    pool = None if cfg.ML_EXECUTOR == "inline" else ThreadPoolExecutor(workers, thread_name_prefix=f"ml-{name}")
+    return MlExecutor(name, pool, max_workers=workers, max_queue=cfg.ML_EXECUTOR_QUEUE)
+
+
+def array_executor() -> MlExecutor:
+    """
+    Thread pool for numpy scoring/top-k: the heavy loops release the GIL.
+    """
+    return _get("array", lambda: _threads("array", get_settings().ML_THREAD_WORKERS))
+
+
+def python_executor() -> MlExecutor:
+    """
+    Process pool for pure-Python work (tokenizing + hashing texts), which would hold the GIL
+    on a thread. Falls back to the array thread pool when ML_PROCESS_WORKERS is 0.
+    """
+    cfg = get_settings()
+    if cfg.ML_EXECUTOR == "inline" or cfg.ML_PROCESS_WORKERS <= 0:
+        return array_executor()
+
+    def _make() -> MlExecutor:
+        pool = ProcessPoolExecutor(cfg.ML_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return MlExecutor("python", pool, max_workers=cfg.ML_PROCESS_WORKERS, max_queue=cfg.ML_EXECUTOR_QUEUE)
+
+    return _get("python", _make)
+
+
+def lane(name: str) -> MlExecutor:
+    """
+    Single-thread executor: everything submitted to one lane runs one at a time, in order.
+    Used to serialize reads and writes of a corpus index without blocking the event loop.
+    """
+    return _get(f"lane:{name}", lambda: _threads(f"lane:{name}", 1))
+
+
+def executor_stats() -> Dict[str, Any]:
+    with _registry_lock:
+        return {name: ex.stats() for name, ex in _executors.items()}
+
+
+def shutdown_executors() -> None:
+    with _registry_lock:
+        for ex in _executors.values():
+            ex.shutdown()
+        _executors.clear()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.job import Job
+from app.models.resume_features import ResumeFeatures
+from app.ml.corpus import job_corpus, job_skills, resume_corpus, resume_skills
+from app.ml.embeddings import CsrMatrix, SparseVector, csr_scores
+from app.ml.executor import array_executor
+from app.ml.idf import job_df, resume_df, weight_queries
+from app.ml.results import job_hit
+from app.ml.skills import SkillBits, overlap_scores, row_tags, shared_reasons, skill_vocab
+from app.ml.store import load_active_job_matrix, load_job_vectors, load_resume_matrix, load_resume_vectors
+from app.ml.topk import top_k_indices
+
+# Candidates taken from each index (skills, text) per request: max(top_k x factor, floor).
+_POOL_FACTOR = 5
+_POOL_MIN = 50
+
+
+class HybridWeights(NamedTuple):
+    skills: float
+    text: float
+    recency: float
+    half_life_days: float
+
+    @classmethod
+    def from_settings(cls) -> "HybridWeights":
+        cfg = get_settings()
+        return cls(
+            cfg.ML_HYBRID_SKILL_WEIGHT,
+            cfg.ML_HYBRID_TEXT_WEIGHT,
+            cfg.ML_HYBRID_RECENCY_WEIGHT,
+            cfg.ML_HYBRID_HALF_LIFE_DAYS,
+        )
+
+
+def _age_days(stamps: Sequence[datetime]) -> np.ndarray:
+    now = datetime.now(timezone.utc)
+    return np.fromiter(
+        (max(0.0, (now - ts).total_seconds() / 86400.0) for ts in stamps), dtype=np.float64, count=len(stamps)
+    )
+
+
+def fuse_scores(
+    query: SkillBits,
+    packed: SkillBits,
+    matrix: CsrMatrix,
+    vec: SparseVector,
+    age_days: np.ndarray,
+    weights: HybridWeights,
+    k: int,
+    keys: Sequence,
+) -> List[Tuple[int, float, float, float, float]]:
+    """
+    Score every candidate row on all three signals and keep the best k as
+    (row, fused, skills, text, recency), ties by keys[row]. Rows with neither skill nor
+    text overlap are never returned (recency alone does not make a match).
+    Runs on the array executor.
+    """
+    skill = overlap_scores(query, packed)
+    text = csr_scores(matrix, vec).astype(np.float64)
+    recency = np.exp2(-age_days / max(weights.half_life_days, 1e-9))
+    fused = weights.skills * skill + weights.text * text + weights.recency * recency
+    fused[(skill <= 0) & (text <= 0)] = 0.0
+    return [
+        (int(i), float(fused[i]), float(skill[i]), float(text[i]), float(recency[i]))
+        for i in top_k_indices(fused, k, keys.__getitem__)
+    ]
+
+
+def _pool(k: int) -> int:
+    return max(k * _POOL_FACTOR, _POOL_MIN)
+
+
+def _signals(skill: float, text: float, recency: float) -> Dict[str, float]:
+    return {"skills": round(skill, 4), "text": round(text, 6), "recency": round(recency, 4)}
+
+
+async def rank_jobs_for_resume(
+    session: AsyncSession,
+    *,
+    resume_id: uuid.UUID,
+    top_k: int = 10,
+) -> List[Dict]:
+    """
+    One ranking pass fusing skill overlap, text cosine and posting recency (weights from
+    ML_HYBRID_*). Candidates are the union of the skill index and the embedding index
+    hits; their rows and vectors are fetched in a single joined query and all signals
+    are computed together for a bounded top-k.
+    """
+    f = (await session.execute(
+        select(ResumeFeatures).where(ResumeFeatures.resume_id == resume_id)
+    )).scalar_one_or_none()
+    if not f:
+        return []
+
+    k = max(1, top_k)
+    vec = (await weight_queries(session, job_df, await load_resume_vectors(session, [f]))).row(0)
+    text_index = await job_corpus.sync(session)
+    skill_index = await job_skills.sync(session)
+    hits = await job_corpus.query(text_index, vec, _pool(k))
+    tags = row_tags(f)
+    hits += await job_skills.query(skill_index, tags, _pool(k))
+    if not hits:
+        return []
+
+    jobs, matrix = await load_active_job_matrix(session, list({h for h, _ in hits}))
+    rows = [row_tags(j) for j in jobs]
+    ranked = await array_executor().run(
+        fuse_scores,
+        skill_vocab.encode([tags]),
+        skill_vocab.encode(rows, learn=True),
+        matrix,
+        vec,
+        _age_days([j.posted_at for j in jobs]),
+        HybridWeights.from_settings(),
+        k,
+        [j.id for j in jobs],
+    )
+    return [
+        {
+            **job_hit(jobs[i], score),
+            "signals": _signals(*parts),
+            "reasons": shared_reasons(tags, rows[i]),
+        }
+        for i, score, *parts in ranked
+    ]
+
+
+async def rank_resumes_for_job(
+    session: AsyncSession,
+    *,
+    job_id: uuid.UUID,
+    top_k: int = 10,
+) -> List[Dict]:
+    """
+    rank_jobs_for_resume the other way round: resume features for a job, with recency
+    taken from the features' updated_at.
+    """
+    j = (await session.execute(select(Job).where(Job.id == job_id))).scalar_one_or_none()
+    if not j:
+        return []
+
+    k = max(1, top_k)
+    vec = (await weight_queries(session, resume_df, await load_job_vectors(session, [j]))).row(0)
+    text_index = await resume_corpus.sync(session)
+    skill_index = await resume_skills.sync(session)
+    hits = await resume_corpus.query(text_index, vec, _pool(k))
+    tags = row_tags(j)
+    hits += await resume_skills.query(skill_index, tags, _pool(k))
+    if not hits:
+        return []
+
+    feats, matrix = await load_resume_matrix(session, list({h for h, _ in hits}))
+    rows = [row_tags(f) for f in feats]
+    ranked = await array_executor().run(
+        fuse_scores,
+        skill_vocab.encode([tags]),
+        skill_vocab.encode(rows, learn=True),
+        matrix,
+        vec,
+        _age_days([f.updated_at for f in feats]),
+        HybridWeights.from_settings(),
+        k,
+        [f.resume_id for f in feats],
+    )
+    return [
+        {
+            "resume_id": str(feats[i].resume_id),
+            "full_name": feats[i].full_name,
+            "score": round(score, 6),
+            "signals": _signals(*parts),
+            "reasons": shared_reasons(tags, rows[i]),
+        }
+        for i, score, *parts in ranked
+    ]
+
+
+async def score_resume_for_jobs(session: AsyncSession, *, resume_id: uuid.UUID) -> List[Dict]:
+    """
+    The pair scores rank_resumes_for_job would give one resume, against every active job
+    in one pass (skill overlap and cosine are symmetric, recency is the resume's), as
+    dicts with job_id, score and reasons, best first. Pairs with neither skill nor text
+    overlap are left out. Used to fold a new or re-parsed resume into the job matches.
+    """
+    feats, resume_matrix = await load_resume_matrix(session, [resume_id])
+    if not feats:
+        return []
+    f = feats[0]
+    jobs, matrix = await load_active_job_matrix(session)
+    if not jobs:
+        return []
+
+    tags = row_tags(f)
+    rows = [row_tags(j) for j in jobs]
+    ranked = await array_executor().run(
+        fuse_scores,
+        skill_vocab.encode([tags]),
+        skill_vocab.encode(rows, learn=True),
+        await weight_queries(session, resume_df, matrix),
+        resume_matrix.row(0),
+        _age_days([f.updated_at] * len(jobs)),
+        HybridWeights.from_settings(),
+        len(jobs),
+        [j.id for j in jobs],
+    )
+    return [
+        {"job_id": jobs[i].id, "score": round(score, 6), "reasons": shared_reasons(tags, rows[i])}
+        for i, score, *_ in ranked
+    ]
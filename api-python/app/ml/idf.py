@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import time
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.after_commit import defer
+from app.db.base import Base
+from app.models.embedding import JobEmbedding, ResumeEmbedding, TermDf
+from app.ml.embeddings import (
+    EMBEDDING_DIMS,
+    EMBEDDING_VERSION,
+    CsrMatrix,
+    SparseVector,
+    unpack_sparse,
+)
+
+# TermDf.bucket holding the number of documents in the corpus.
+DOC_COUNT_BUCKET = -1
+# Rows per INSERT when writing frequencies (keeps bind params under asyncpg's limit).
+_WRITE_BATCH = 1000
+
+
+def maintained() -> bool:
+    """
+    Document frequencies are only read for ML_WEIGHTING=tfidf; otherwise writes skip them
+    (run rebuild_df after switching weighting on).
+    """
+    return get_settings().ML_WEIGHTING == "tfidf"
+
+
+class DfTable:
+    """
+    In-process copy of one corpus' document frequencies (TermDf), loaded on first use and
+    re-read every ML_IDF_REFRESH_SECONDS. Committed writes made in this process are applied
+    locally right away and buffered; the buffer is written to TermDf at most once per
+    ML_IDF_FLUSH_SECONDS (see record_df).
+
+    Only query vectors are IDF-weighted; stored vectors stay plain TF, so frequency drift
+    never invalidates persisted vectors or the retrieval indexes, and a query costs the same.
+    """
+
+    def __init__(self, corpus: str, model: Type[Base], dims: int = EMBEDDING_DIMS) -> None:
+        self.corpus = corpus
+        self.model = model
+        self.dims = dims
+        self.df = np.zeros(dims, dtype=np.int64)
+        self.n_docs = 0
+        self._idf: Optional[np.ndarray] = None
+        self._loaded_at: Optional[float] = None
+        self._pending = np.zeros(dims, dtype=np.int64)
+        self._pending_docs = 0
+        self._flushed_at = time.monotonic()
+
+    async def load(self, session: AsyncSession, *, force: bool = False) -> "DfTable":
+        due = (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= get_settings().ML_IDF_REFRESH_SECONDS
+        )
+        if due or force:
+            q = select(TermDf.bucket, TermDf.df).where(
+                TermDf.corpus == self.corpus, TermDf.version == EMBEDDING_VERSION
+            )
+            df = np.zeros(self.dims, dtype=np.int64)
+            n_docs = 0
+            for bucket, count in (await session.execute(q)).all():
+                if bucket == DOC_COUNT_BUCKET:
+                    n_docs = int(count)
+                elif 0 <= bucket < self.dims:
+                    df[bucket] = count
+            self.df, self.n_docs, self._idf = df, n_docs, None
+            self._loaded_at = time.monotonic()
+            # committed here but not flushed yet
+            self.apply(self._pending, self._pending_docs)
+        return self
+
+    def apply(self, delta: np.ndarray, n_docs: int) -> None:
+        self.df += delta
+        np.maximum(self.df, 0, out=self.df)
+        self.n_docs = max(0, self.n_docs + n_docs)
+        self._idf = None
+
+    def buffer(self, delta: np.ndarray, n_docs: int) -> None:
+        self._pending += delta
+        self._pending_docs += n_docs
+
+    def take_pending(self) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        The buffered delta if a flush is due (None otherwise); the buffer is emptied.
+        """
+        if time.monotonic() - self._flushed_at < get_settings().ML_IDF_FLUSH_SECONDS:
+            return None
+        self._flushed_at = time.monotonic()
+        if not self._pending_docs and not self._pending.any():
+            return None
+        out = (self._pending, self._pending_docs)
+        self.discard_pending()
+        return out
+
+    def discard_pending(self) -> None:
+        self._pending = np.zeros(self.dims, dtype=np.int64)
+        self._pending_docs = 0
+
+    @property
+    def idf(self) -> np.ndarray:
+        """
+        Smoothed idf: ln((1 + N) / (1 + df)) + 1. All ones for an empty corpus.
+        """
+        if self._idf is None:
+            self._idf = (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        return self._idf
+
+    def weight_csr(self, matrix: CsrMatrix) -> CsrMatrix:
+        """
+        Scale every row by idf and re-normalize it to unit length.
+        """
+        if not len(matrix.data):
+            return matrix
+        data = matrix.data * self.idf[matrix.indices]
+        rows = np.repeat(np.arange(matrix.n_rows), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=matrix.n_rows))
+        norms[norms == 0] = 1.0
+        data = (data / norms[rows]).astype(np.float32)
+        return CsrMatrix(matrix.indptr, matrix.indices, data, matrix.dims)
+
+    def weight(self, vec: SparseVector) -> SparseVector:
+        if not len(vec.indices):
+            return vec
+        data = vec.values * self.idf[vec.indices]
+        data /= np.float32(np.sqrt(np.dot(data, data)))
+        return SparseVector(vec.indices, data.astype(np.float32), vec.dims)
+
+
+async def weight_queries(session: AsyncSession, table: DfTable, queries: CsrMatrix) -> CsrMatrix:
+    """
+    Apply ML_WEIGHTING to query vectors searched against `table`'s corpus.
+    """
+    if not maintained():
+        return queries
+    return (await table.load(session)).weight_csr(queries)
+
+
+def df_delta(
+    new: Sequence[SparseVector], old: Sequence[SparseVector], dims: int = EMBEDDING_DIMS
+) -> Tuple[np.ndarray, int]:
+    """
+    Change in per-bucket document frequency when the `old` vectors are replaced by `new`
+    (documents appearing only in `new` are additions); returns (delta, change in doc count).
+    """
+    delta = np.zeros(dims, dtype=np.int64)
+    for v in new:
+        delta[v.indices] += 1
+    for v in old:
+        delta[v.indices] -= 1
+    return delta, len(new) - len(old)
+
+
+async def _write_df(session: AsyncSession, corpus: str, delta: np.ndarray, n_docs: int) -> None:
+    rows = [
+        {"corpus": corpus, "version": EMBEDDING_VERSION, "bucket": int(b), "df": int(delta[b])}
+        for b in np.flatnonzero(delta)
+    ]
+    if n_docs:
+        # the doc count row sorts first, so concurrent writers lock rows in the same order
+        rows.insert(0, {"corpus": corpus, "version": EMBEDDING_VERSION, "bucket": DOC_COUNT_BUCKET, "df": n_docs})
+    for i in range(0, len(rows), _WRITE_BATCH):
+        stmt = pg_insert(TermDf).values(rows[i:i + _WRITE_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TermDf.corpus, TermDf.version, TermDf.bucket],
+            set_={"df": TermDf.df + stmt.excluded.df},
+        )
+        await session.execute(stmt)
+
+
+async def record_df(
+    session: AsyncSession,
+    table: DfTable,
+    new: Sequence[SparseVector],
+    old: Sequence[SparseVector] = (),
+) -> None:
+    """
+    Account for stored vectors being written (`new`) over previous ones (`old`, same version).
+    The delta is staged on the session and buffered in `table` once it commits; a due buffer
+    is flushed with this write, so the doc count row every writer updates is locked once per
+    flush interval rather than by every write. Racing writers on the same document can double
+    count, and a process exiting with a full buffer loses it; rebuild_df repairs both.
+    """
+    delta, n_docs = df_delta(new, old, table.dims)
+    if n_docs or delta.any():
+        defer(session, "idf.staged", (table, delta, n_docs), _committed)
+
+    flush = table.take_pending()
+    if flush is not None:
+        # the flushed buffer goes down with a rolled back transaction; keep it for the next flush
+        defer(session, "idf.flushed", (table, *flush), None, _rebuffer)
+        await _write_df(session, table.corpus, *flush)
+
+
+def _committed(items: List[Tuple[Any, np.ndarray, int]]) -> None:
+    for table, delta, n_docs in items:
+        table.apply(delta, n_docs)
+        table.buffer(delta, n_docs)
+
+
+def _rebuffer(items: List[Tuple[Any, np.ndarray, int]]) -> None:
+    for table, delta, n_docs in items:
+        table.buffer(delta, n_docs)
+
+
+async def rebuild_df(session: AsyncSession, table: DfTable, *, batch_size: int = 5000) -> int:
+    """
+    Recompute a corpus' document frequencies from its stored vectors. Returns the doc count.
+    """
+    delta = np.zeros(table.dims, dtype=np.int64)
+    n_docs = 0
+    q = select(table.model.vector).where(table.model.version == EMBEDDING_VERSION)
+    stream = await session.stream_scalars(q.execution_options(yield_per=batch_size))
+    async for data in stream:
+        delta[unpack_sparse(data, table.dims).indices] += 1
+        n_docs += 1
+
+    await session.execute(delete(TermDf).where(
+        TermDf.corpus == table.corpus, TermDf.version == EMBEDDING_VERSION
+    ))
+    await _write_df(session, table.corpus, delta, n_docs)
+    table.df, table.n_docs, table._idf = delta, n_docs, None
+    # the recount already includes every committed write
+    table.discard_pending()
+    return n_docs
+
+
+job_df = DfTable("jobs", JobEmbedding)
+resume_df = DfTable("resumes", ResumeEmbedding)
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIMS, CsrMatrix, SparseVector, quantize_values, stack_sparse
+from app.ml.topk import top_k_indices
+
+if TYPE_CHECKING:
+    from app.ml.snapshot import Snapshot
+
+
+# A posting list's tail segment is merged into its main segment once it holds at least
+# _MERGE_MIN postings and _MERGE_RATIO of the main segment's length.
+_MERGE_MIN = 256
+_MERGE_RATIO = 0.25
+
+_EMPTY_DOCS = np.empty(0, dtype=np.int32)
+_EMPTY_VALS = np.empty(0, dtype=np.float32)
+
+
+class _Postings:
+    """
+    One hash bucket's posting list: a main segment and a tail segment of recent additions
+    (doc slots ascending in each), plus chunks appended since the last freeze.
+    A freeze folds new chunks into the float32 tail only, so a single put costs O(tail);
+    the main segment is rebuilt (and re-quantized) when the tail outgrows it, see
+    _MERGE_MIN / _MERGE_RATIO. Frozen segments never contain deleted docs.
+    Main weights are vals * scale: float32 with scale 1, or uint8 codes with a per-list scale.
+    """
+
+    __slots__ = ("docs", "vals", "scale", "max", "tail_docs", "tail_vals", "tail_max", "pending", "dirty")
+
+    def __init__(self) -> None:
+        self.docs = _EMPTY_DOCS
+        self.vals = _EMPTY_VALS
+        self.scale = 1.0
+        self.max = 0.0
+        self.tail_docs = _EMPTY_DOCS
+        self.tail_vals = _EMPTY_VALS
+        self.tail_max = 0.0
+        self.pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.dirty = False  # holds deleted docs
+
+    def __len__(self) -> int:
+        return len(self.docs) + len(self.tail_docs)
+
+    def freeze(self, alive: np.ndarray, quantized: bool = False, *, merge: bool = False) -> None:
+        if not (self.dirty or self.pending or merge):
+            return
+        if self.dirty or merge:
+            keep = alive[self.docs]
+            if not keep.all():
+                # codes stay valid under the list's scale; only the bound shrinks
+                self.docs, self.vals = self.docs[keep], self.vals[keep]
+                self.max = float(self.vals.max()) * self.scale if len(self.vals) else 0.0
+        docs = np.concatenate([self.tail_docs] + [d for d, _ in self.pending])
+        vals = np.concatenate([self.tail_vals] + [v for _, v in self.pending])
+        keep = alive[docs]
+        docs, vals = docs[keep], vals[keep]
+        self.pending = []
+        self.dirty = False
+
+        if merge or len(docs) >= max(_MERGE_MIN, _MERGE_RATIO * len(self.docs)):
+            # new slots are always above existing ones, so the concatenation stays sorted
+            docs = np.concatenate([self.docs, docs])
+            vals = np.concatenate([self.vals.astype(np.float32) * np.float32(self.scale), vals])
+            if quantized:
+                self.vals, self.scale = quantize_values(vals)
+                self.max = float(self.vals.max()) * self.scale if len(vals) else 0.0
+            else:
+                self.vals, self.scale = vals, 1.0
+                self.max = float(vals.max()) if len(vals) else 0.0
+            self.docs = docs
+            docs, vals = _EMPTY_DOCS, _EMPTY_VALS
+        self.tail_docs, self.tail_vals = docs, vals
+        self.tail_max = float(vals.max()) if len(vals) else 0.0
+
+    def segments(self) -> Iterable[Tuple[np.ndarray, np.ndarray, float, float]]:
+        """
+        Non-empty frozen segments as (docs, vals, scale, max weight).
+        """
+        if len(self.docs):
+            yield self.docs, self.vals, self.scale, self.max
+        if len(self.tail_docs):
+            yield self.tail_docs, self.tail_vals, 1.0, self.tail_max
+
+
+class InvertedIndex:
+    """
+    Bucket -> posting-list index over sparse hashed embeddings with exact top-k retrieval.
+
+    Scores are the same cosine values as csr_scores. Because all weights are non-negative,
+    each query term has an upper bound (query weight x max posting weight). Terms are
+    processed in descending bound order; once the bounds of the remaining terms can no
+    longer lift an unseen document to the current k-th score, only the surviving
+    candidates are looked up (binary search) in the remaining lists (MaxScore pruning).
+
+    quantized=True stores posting weights as uint8 codes (5 bytes per posting instead of 8).
+    Top-k is then exact for the quantized scores, which are within ~0.2% per term of the
+    float ones; callers re-score an oversampled shortlist with the float vectors.
+
+    from_snapshot() starts from a memory-mapped Snapshot: its rows become the first slots
+    and its posting lists are used in place (shared with every process mapping the file);
+    a list is copied into process memory only once a delete or a tail merge touches it.
+    """
+
+    def __init__(self, *, dims: int = EMBEDDING_DIMS, quantized: bool = False) -> None:
+        self.dims = dims
+        self.quantized = quantized
+        self._postings: Dict[int, _Postings] = {}
+        self._base: Optional["Snapshot"] = None
+        self._n_base = 0  # slots [0, _n_base) are snapshot rows; _ids/_slot/_terms cover the rest
+        self._ids: List[Hashable] = []
+        self._slot: Dict[Hashable, int] = {}
+        self._terms: Dict[int, np.ndarray] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._live = 0
+        self._dead = 0
+
+    @classmethod
+    def from_snapshot(cls, snap: "Snapshot", *, quantized: bool = False) -> "InvertedIndex":
+        index = cls(dims=snap.dims, quantized=quantized)
+        index._base = snap
+        index._n_base = index._live = snap.n_rows
+        index._alive = np.ones(snap.n_rows, dtype=bool)
+        same = (snap.precision == "int8") == quantized
+        for t in np.flatnonzero(np.diff(snap.post_ptr)).tolist():
+            a, b = snap.post_ptr[t], snap.post_ptr[t + 1]
+            p = index._postings[t] = _Postings()
+            if same:
+                p.docs, p.vals = snap.post_docs[a:b], snap.post_vals[a:b]
+                p.scale, p.max = float(snap.post_scale[t]), float(snap.post_max[t])
+            else:
+                vals = snap.post_vals[a:b].astype(np.float32) * snap.post_scale[t]
+                p.pending.append((snap.post_docs[a:b], vals))
+        return index
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, id_: Hashable) -> bool:
+        return self._find(id_) is not None
+
+    def _n_slots(self) -> int:
+        return self._n_base + len(self._ids)
+
+    def _find(self, id_: Hashable) -> Optional[int]:
+        slot = self._slot.get(id_)
+        if slot is None and self._base is not None:
+            row = self._base.find(id_)
+            if row is not None and self._alive[row]:
+                slot = row
+        return slot
+
+    def _id(self, slot: int) -> Hashable:
+        if slot < self._n_base:
+            assert self._base is not None
+            return self._base.id(slot)
+        return self._ids[slot - self._n_base]
+
+    def _slot_terms(self, slot: int) -> np.ndarray:
+        if slot < self._n_base:
+            assert self._base is not None
+            m = self._base.matrix
+            return m.indices[m.indptr[slot]:m.indptr[slot + 1]]
+        return self._terms[slot]
+
+    def _grow(self, n: int) -> None:
+        if n > len(self._alive):
+            alive = np.zeros(max(n, 2 * len(self._alive), 1024), dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+
+    def add(self, ids: Sequence[Hashable], vecs: Sequence[SparseVector]) -> None:
+        """
+        Insert or replace vectors. Empty vectors are dropped.
+        """
+        self.add_matrix(ids, stack_sparse(vecs, self.dims))
+
+    def add_matrix(self, ids: Sequence[Hashable], m: CsrMatrix) -> None:
+        """
+        Bulk insert/replace from a CSR batch (row i belongs to ids[i]). Replaced docs get
+        a fresh slot, so posting lists stay sorted by slot.
+        """
+        self.remove(ids)
+        lens = np.diff(m.indptr)
+        rows = np.flatnonzero(lens)
+        if not len(rows):
+            return
+        base = self._n_slots()
+        self._grow(base + len(rows))
+        slot_of_row = np.full(m.n_rows, -1, dtype=np.int32)
+        slot_of_row[rows] = np.arange(base, base + len(rows), dtype=np.int32)
+        for n, r in enumerate(rows.tolist()):
+            self._ids.append(ids[r])
+            self._slot[ids[r]] = base + n
+            self._terms[base + n] = m.indices[m.indptr[r]:m.indptr[r + 1]]
+        self._alive[base:base + len(rows)] = True
+        self._live += len(rows)
+
+        slots = np.repeat(slot_of_row, lens)
+        order = np.argsort(m.indices, kind="stable")
+        terms, slots, vals = m.indices[order], slots[order], m.data[order]
+        bounds = np.flatnonzero(np.diff(terms)) + 1
+        for t, d, v in zip(
+            terms[np.r_[0, bounds]].tolist(), np.split(slots, bounds), np.split(vals, bounds)
+        ):
+            p = self._postings.get(t)
+            if p is None:
+                p = self._postings[t] = _Postings()
+            p.pending.append((d, v))
+
+    def remove(self, ids: Iterable[Hashable]) -> None:
+        for id_ in ids:
+            slot = self._find(id_)
+            if slot is None:
+                continue
+            self._alive[slot] = False
+            for t in self._slot_terms(slot).tolist():
+                self._postings[t].dirty = True
+            self._slot.pop(id_, None)
+            self._terms.pop(slot, None)
+            self._live -= 1
+            self._dead += 1
+        if self._dead > 1024 and self._dead > self._live:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Drop tombstoned slots by rebuilding from the live postings (this also detaches
+        a snapshot base: everything moves into process memory).
+        """
+        n = self._n_slots()
+        live = np.flatnonzero(self._alive[:n])
+        remap = np.full(n, -1, dtype=np.int32)
+        remap[live] = np.arange(len(live), dtype=np.int32)
+        for p in self._postings.values():
+            p.freeze(self._alive, self.quantized, merge=True)
+            p.docs = remap[p.docs]
+        self._postings = {t: p for t, p in self._postings.items() if len(p)}
+        live_slots = live.tolist()
+        self._terms = {n: np.array(self._slot_terms(s)) for n, s in enumerate(live_slots)}
+        self._ids = [self._id(s) for s in live_slots]
+        self._slot = {id_: n for n, id_ in enumerate(self._ids)}
+        self._base = None
+        self._n_base = 0
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._dead = 0
+
+    def query(self, vec: SparseVector, k: int) -> List[Tuple[Hashable, float]]:
+        """
+        Exact top-k by cosine (positive scores only, best first, ties by id); with
+        quantized=True, exact over the quantized weights.
+        """
+        k = max(1, k)
+        # every segment is its own sorted list with its own bound: a doc is in only one of them
+        lists: List[Tuple[float, float, np.ndarray, np.ndarray]] = []
+        for t, w in zip(vec.indices.tolist(), vec.values.tolist()):
+            p = self._postings.get(t)
+            if p is None:
+                continue
+            p.freeze(self._alive, self.quantized)
+            for docs, vals, scale, top in p.segments():
+                lists.append((w * top, np.float32(w * scale), docs, vals))
+        if not lists:
+            return []
+        lists.sort(key=lambda x: x[0], reverse=True)
+        remaining = np.cumsum([ub for ub, _, _, _ in lists][::-1])[::-1].tolist() + [0.0]
+
+        acc = np.zeros(self._n_slots(), dtype=np.float32)
+        seen = np.zeros(self._n_slots(), dtype=bool)
+        cand = np.empty(0, dtype=np.int32)
+        theta = 0.0
+        i = 0
+        # Essential phase: full posting scans while an unseen doc could still reach top-k.
+        while i < len(lists) and remaining[i] >= theta:
+            _, w, docs, vals = lists[i]
+            acc[docs] += w * vals
+            fresh = docs[~seen[docs]]
+            seen[fresh] = True
+            cand = np.concatenate([cand, fresh])
+            i += 1
+            if len(cand) >= k:
+                theta = float(np.partition(acc[cand], len(cand) - k)[len(cand) - k])
+
+        # Non-essential phase: only docs that can still reach theta. Short candidate lists
+        # are binary-searched into the postings; long ones use the `seen` mask, which
+        # holds exactly the current candidates.
+        cand.sort()
+        while i < len(lists) and len(cand):
+            keep = acc[cand] + remaining[i] >= theta
+            seen[cand[~keep]] = False
+            cand = cand[keep]
+            _, w, docs, vals = lists[i]
+            if len(cand) * 8 < len(docs):
+                pos = np.searchsorted(docs, cand)
+                pos[pos == len(docs)] = 0
+                hit = docs[pos] == cand
+                acc[cand[hit]] += w * vals[pos[hit]]
+            else:
+                hit = seen[docs]
+                acc[docs[hit]] += w * vals[hit]
+            i += 1
+
+        scores = np.round(np.clip(acc[cand], 0.0, 1.0), 6)
+        order = top_k_indices(scores, k, lambda j: self._id(cand[j]))
+        return [(self._id(cand[j]), float(scores[j])) for j in order]
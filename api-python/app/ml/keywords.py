@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.ml.skills import norm_tag
+
+# Word tokens of a text; the same character class norm_tag keeps, so "Node.js" in a
+# keyword list and "node.js" / "Node JS" in a resume both become ("node", "js").
+_word_re = re.compile(r"[a-z0-9+#]+")
+
+
+class KeywordScanner:
+    """
+    Aho-Corasick automaton over word tokens for one keyword set. A text is scanned in a
+    single pass regardless of the number of keywords; matches are whole words only
+    ("java" does not hit "javascript") and multi-word keywords match across any
+    punctuation or whitespace between their words.
+    """
+
+    __slots__ = ("keywords", "_goto", "_fail", "_out")
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: List[str] = list(dict.fromkeys(k for k in map(norm_tag, keywords) if k))
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for kid, kw in enumerate(self.keywords):
+            state = 0
+            for tok in kw.split():
+                nxt = goto[state].get(tok)
+                if nxt is None:
+                    nxt = goto[state][tok] = len(goto)
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (kid,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and tok not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(tok, 0) if state else 0
+                out[nxt] += out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def counts(self, text: str) -> List[int]:
+        """
+        Hits per keyword (aligned with self.keywords) in one pass over the text's words.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = [0] * len(self.keywords)
+        state = 0
+        for tok in _word_re.findall(text.lower()):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            for kid in out[state]:
+                hits[kid] += 1
+        return hits
+
+    def scan(self, text: str) -> Dict[str, int]:
+        """
+        {keyword: hits} for the keywords that occur in `text`.
+        """
+        return {kw: n for kw, n in zip(self.keywords, self.counts(text)) if n}
+
+    def score(self, text: str) -> int:
+        """
+        Number of distinct keywords that occur in `text`.
+        """
+        return sum(1 for n in self.counts(text) if n)
+
+
+@lru_cache(maxsize=256)
+def _compiled(keywords: Tuple[str, ...]) -> KeywordScanner:
+    return KeywordScanner(keywords)
+
+
+def scanner_for(keywords: Sequence[str]) -> KeywordScanner:
+    """
+    Compiled scanner for a keyword list (e.g. a JobKeywords.keywords entry), built once
+    per distinct list and shared by every resume ranked against it.
+    """
+    return _compiled(tuple(keywords))
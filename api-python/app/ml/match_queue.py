@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.after_commit import defer
+
+log = logging.getLogger(__name__)
+
+# Celery task names (app.workers.match_tasks) keeping the job -> candidate matches current.
+RESUME_WRITTEN = "matches.resume_written"
+JOB_WRITTEN = "matches.job_written"
+JOB_DEACTIVATED = "matches.job_deactivated"
+
+def schedule(session: AsyncSession, task: str, key: uuid.UUID) -> None:
+    """
+    Queue `task` for `key` once `session` commits; nothing is sent for rolled back
+    writes, and repeated writes of the same row in one transaction collapse to one task.
+    """
+    defer(session, "match_queue", (task, key), _send)
+
+
+def _send(items: List[Tuple[str, Any]]) -> None:
+    pending = list(dict.fromkeys(items))
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _publish(pending)
+        return
+    # after_commit fires on the event-loop thread; a slow or unreachable broker (kombu
+    # publish retries) must not stall every other request on the loop
+    loop.run_in_executor(None, _publish, pending)
+
+
+def _publish(pending: List[Tuple[str, Any]]) -> None:
+    try:
+        from app.workers.celery_app import celery_app
+
+        for task, key in pending:
+            celery_app.send_task(task, args=[str(key)])
+    except Exception:
+        # the matches only lag; recommend.materialize_job_matches rebuilds them
+        log.exception("match_queue_send_failed", extra={"tasks": len(pending)})
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.job import Job
+from app.ml.hybrid import rank_resumes_for_job, score_resume_for_jobs
+from app.repositories.match_repo import merge_resume_matches, replace_job_matches
+
+
+async def materialize_job_matches(
+    session: AsyncSession, job_id: uuid.UUID, *, top_k: Optional[int] = None
+) -> int:
+    """
+    Recompute a job's stored matches: the hybrid ranker's best top_k (ML_MATCH_TOP_K)
+    resume features replace whatever was materialized before. Caller commits.
+    Returns the number of rows written.
+    """
+    k = top_k or get_settings().ML_MATCH_TOP_K
+    ranked = await rank_resumes_for_job(session, job_id=job_id, top_k=k)
+    return await replace_job_matches(session, job_id, ranked)
+
+
+async def materialize_resume_matches(
+    session: AsyncSession, resume_id: uuid.UUID, *, top_k: Optional[int] = None
+) -> int:
+    """
+    Fold a new or re-parsed resume into the stored matches: scored against every active
+    job, written only where it enters a job's top_k. Caller commits.
+    Returns the number of rows written.
+    """
+    k = top_k or get_settings().ML_MATCH_TOP_K
+    scored = await score_resume_for_jobs(session, resume_id=resume_id)
+    return await merge_resume_matches(session, resume_id, scored, keep=k)
+
+
+async def active_job_ids(session: AsyncSession) -> List[uuid.UUID]:
+    q = select(Job.id).where(Job.is_active.is_(True)).order_by(Job.id)
+    return list((await session.execute(q)).scalars().all())
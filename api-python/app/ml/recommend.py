@@ -1,46 +1,103 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.job import Job
 from app.models.resume_features import ResumeFeatures
-from app.ml.embeddings import embed_texts, cosine_similarity
-
-
-def _resume_text(f: ResumeFeatures) -> str:
-    parts: list[str] = []
-    if f.full_name:
-        parts.append(f.full_name)
-    if f.summary:
-        parts.append(f.summary)
-    if f.skills:
-        parts.append(" ".join(f.skills))
-    if f.languages:
-        parts.append(" ".join(f.languages))
-    if f.experience:
-        items = (f.experience.get("items") or []) if isinstance(f.experience, dict) else []
-        for it in items:
-            title = (it.get("title") or "") if isinstance(it, dict) else ""
-            desc = (it.get("description") or "") if isinstance(it, dict) else ""
-            parts.append(f"{title} {desc}".strip())
-    if f.education:
-        items = (f.education.get("items") or []) if isinstance(f.education, dict) else []
-        for it in items:
-            deg = (it.get("degree") or "") if isinstance(it, dict) else ""
-            fld = (it.get("field_of_study") or "") if isinstance(it, dict) else ""
-            parts.append(f"{deg} {fld}".strip())
-    return " ".join(x for x in parts if x)
-
-
-def _job_text(j: Job) -> str:
-    parts: list[str] = [j.title or "", j.description or ""]
-    if j.location:
-        parts.append(j.location)
-    if j.skills:
-        parts.append(" ".join(j.skills))
-    return " ".join(x for x in parts if x)
+from app.core.config import get_settings
+from app.ml.corpus import RetrievalIndex, job_corpus, resume_corpus
+from app.ml.embeddings import CsrMatrix, SparseVector, csr_cross_scores, csr_scores
+from app.ml.executor import array_executor
+from app.ml.idf import job_df, resume_df, weight_queries
+from app.ml import result_cache
+from app.ml.results import job_hit
+from app.ml.store import load_active_job_matrix, load_job_vectors, load_resume_vectors
+from app.ml.topk import select_top_k, top_k_indices
+
+# Candidate pools for ML_RETRIEVER=recent.
+_RECENT_JOBS = 500
+_RECENT_RESUMES = 1000
+# Extra index hits fetched so rows filtered out by the DB re-check don't shrink top_k.
+_INDEX_SLACK = 10
+# Shortlist size (x top_k) taken from a quantized index before the exact float re-score.
+_RERANK_FACTOR = 3
+# Resumes scored per matrix pass in the batch path; bounds the (chunk x jobs) score block.
+_BATCH_CHUNK = 256
+
+
+def _rank(matrix: CsrMatrix, vec: SparseVector, k: int, keys: Sequence) -> List[Tuple[int, float]]:
+    """
+    Top-k rows of `matrix` for `vec` as (row, score); ties by keys[row]. Runs on the array executor.
+    """
+    scores = csr_scores(matrix, vec)
+    return [(int(i), float(scores[i])) for i in top_k_indices(scores, k, keys.__getitem__)]
+
+
+def _rank_block(queries: CsrMatrix, corpus: CsrMatrix, k: int, keys: Sequence) -> List[List[Tuple[int, float]]]:
+    """
+    _rank for every query row in one matrix pass.
+    """
+    scores = csr_cross_scores(queries, corpus)
+    return [
+        [(int(j), float(row[j])) for j in top_k_indices(row, k, keys.__getitem__)]
+        for row in scores
+    ]
+
+
+def _shortlist(index: RetrievalIndex, k: int) -> int:
+    return k * (_RERANK_FACTOR if index.quantized else 1) + _INDEX_SLACK
+
+
+async def _score_jobs(session: AsyncSession, vec: SparseVector, k: int) -> list[tuple[float, Job]]:
+    if get_settings().ML_RETRIEVER != "recent":
+        index = await job_corpus.sync(session)
+        hits = await job_corpus.query(index, vec, _shortlist(index, k))
+        if not hits:
+            return []
+        rows = (await session.execute(
+            select(Job).where(Job.id.in_([h for h, _ in hits]), Job.is_active.is_(True))
+        )).scalars().all()
+        if index.quantized:
+            exact = csr_scores(await load_job_vectors(session, rows), vec)
+            return [(float(exact[i]), j) for i, j in enumerate(rows) if exact[i] > 0]
+        by_id = {j.id: j for j in rows}
+        return [(s, by_id[h]) for h, s in hits if h in by_id]
+
+    jobs = (await session.execute(
+        select(Job).where(Job.is_active.is_(True)).order_by(Job.posted_at.desc()).limit(_RECENT_JOBS)
+    )).scalars().all()
+    matrix = await load_job_vectors(session, jobs)
+    ranked = await array_executor().run(_rank, matrix, vec, k, [j.id for j in jobs])
+    return [(s, jobs[i]) for i, s in ranked]
+
+
+async def _score_resumes(
+    session: AsyncSession, vec: SparseVector, k: int
+) -> list[tuple[float, ResumeFeatures]]:
+    if get_settings().ML_RETRIEVER != "recent":
+        index = await resume_corpus.sync(session)
+        hits = await resume_corpus.query(index, vec, _shortlist(index, k))
+        if not hits:
+            return []
+        rows = (await session.execute(
+            select(ResumeFeatures).where(ResumeFeatures.resume_id.in_([h for h, _ in hits]))
+        )).scalars().all()
+        if index.quantized:
+            exact = csr_scores(await load_resume_vectors(session, rows), vec)
+            return [(float(exact[i]), f) for i, f in enumerate(rows) if exact[i] > 0]
+        by_id = {f.resume_id: f for f in rows}
+        return [(s, by_id[h]) for h, s in hits if h in by_id]
+
+    feats = (await session.execute(
+        select(ResumeFeatures).order_by(ResumeFeatures.updated_at.desc()).limit(_RECENT_RESUMES)
+    )).scalars().all()
+    matrix = await load_resume_vectors(session, feats)
+    ranked = await array_executor().run(_rank, matrix, vec, k, [f.resume_id for f in feats])
+    return [(s, feats[i]) for i, s in ranked]
 
 
 async def recommend_jobs_for_resume(
@@ -51,6 +108,9 @@ async def recommend_jobs_for_resume(
 ) -> List[Dict]:
     """
     Embed candidate features vs. active jobs and rank by cosine similarity.
+    The whole active corpus is searched through the ML_RETRIEVER index; with
+    ML_RETRIEVER=recent only the most recent jobs are scored exhaustively.
+    Results are cached per (features updated_at, job corpus version, top_k).
     """
     f = (await session.execute(
         select(ResumeFeatures).where(ResumeFeatures.resume_id == resume_id)
@@ -58,31 +118,72 @@ async def recommend_jobs_for_resume(
     if not f:
         return []
 
-    jobs = (await session.execute(
-        select(Job).where(Job.is_active.is_(True)).order_by(Job.posted_at.desc()).limit(500)
-    )).scalars().all()
-
-    cand_vec = embed_texts([_resume_text(f)], dims=512)[0]
-    job_texts = [_job_text(j) for j in jobs]
-    job_vecs = embed_texts(job_texts, dims=512)
+    k = max(1, top_k)
+    key = await result_cache.result_key(
+        result_cache.JOBS, f"resume:{resume_id}:{f.updated_at.isoformat()}", k
+    )
+    cached = await result_cache.get_results(key)
+    if cached is not None:
+        return cached
+
+    cand_vec = (await weight_queries(session, job_df, await load_resume_vectors(session, [f]))).row(0)
+    scored = select_top_k(
+        await _score_jobs(session, cand_vec, k), k,
+        score=lambda x: x[0], tiebreak=lambda x: x[1].id,
+    )
+    out = [job_hit(j, s) for s, j in scored]
+    await result_cache.put_results(key, out)
+    return out
 
-    scored: list[tuple[float, Job]] = []
-    for j, v in zip(jobs, job_vecs):
-        s = cosine_similarity(cand_vec, v)
-        if s > 0:
-            scored.append((s, j))
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    out = [
-        {
-            "job_id": str(j.id),
-            "title": j.title,
-            "location": j.location,
-            "employment_type": j.employment_type.value,
-            "score": float(round(s, 6)),
-        }
-        for s, j in scored[:max(1, top_k)]
-    ]
+async def iter_job_recommendations(
+    session: AsyncSession,
+    *,
+    resume_ids: Optional[Sequence[uuid.UUID]] = None,
+    top_k: int = 10,
+    chunk_size: int = _BATCH_CHUNK,
+) -> AsyncIterator[Dict[str, List[Dict]]]:
+    """
+    Batch variant of recommend_jobs_for_resume. The active job corpus is loaded and
+    embedded once; resumes are then scored against it chunk_size at a time in a single
+    matrix product per chunk. Yields {resume_id: top_k jobs} per chunk (resumes without
+    features map to []). Scoring is exact over all active jobs regardless of ML_RETRIEVER.
+    resume_ids=None means every resume that has features.
+    """
+    if resume_ids is None:
+        resume_ids = (await session.execute(
+            select(ResumeFeatures.resume_id).order_by(ResumeFeatures.resume_id)
+        )).scalars().all()
+    k = max(1, top_k)
+    step = max(1, chunk_size)
+    jobs, job_matrix = await load_active_job_matrix(session)
+    job_ids = [j.id for j in jobs]
+
+    for start in range(0, len(resume_ids), step):
+        chunk = resume_ids[start:start + step]
+        feats = (await session.execute(
+            select(ResumeFeatures).where(ResumeFeatures.resume_id.in_(chunk))
+        )).scalars().all()
+        queries = await weight_queries(session, job_df, await load_resume_vectors(session, feats))
+        ranked = await array_executor().run(_rank_block, queries, job_matrix, k, job_ids)
+        out: Dict[str, List[Dict]] = {str(rid): [] for rid in chunk}
+        for f, hits in zip(feats, ranked):
+            out[str(f.resume_id)] = [job_hit(jobs[j], s) for j, s in hits]
+        yield out
+
+
+async def recommend_jobs_for_resumes(
+    session: AsyncSession,
+    *,
+    resume_ids: Sequence[uuid.UUID],
+    top_k: int = 10,
+) -> Dict[str, List[Dict]]:
+    """
+    Top-k jobs for many resumes at once (see iter_job_recommendations).
+    """
+    out: Dict[str, List[Dict]] = {}
+    async for chunk in iter_job_recommendations(session, resume_ids=resume_ids, top_k=top_k):
+        out.update(chunk)
     return out
 
 
@@ -93,7 +194,9 @@ async def recommend_resumes_for_job(
     top_k: int = 10,
 ) -> List[Dict]:
     """
-    Embed job posting vs. recent candidate features and rank by cosine similarity.
+    Embed job posting vs. candidate features and rank by cosine similarity
+    (all resume features via the ML_RETRIEVER index, or only the most recent ones).
+    Results are cached per (job updated_at, resume corpus version, top_k).
     """
     j = (await session.execute(
         select(Job).where(Job.id == job_id)
@@ -101,27 +204,26 @@ async def recommend_resumes_for_job(
     if not j:
         return []
 
-    feats = (await session.execute(
-        select(ResumeFeatures).order_by(ResumeFeatures.updated_at.desc()).limit(1000)
-    )).scalars().all()
-
-    job_vec = embed_texts([_job_text(j)], dims=512)[0]
-    res_texts = [_resume_text(f) for f in feats]
-    res_vecs = embed_texts(res_texts, dims=512)
-
-    scored: list[tuple[float, ResumeFeatures]] = []
-    for f, v in zip(feats, res_vecs):
-        s = cosine_similarity(job_vec, v)
-        if s > 0:
-            scored.append((s, f))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
+    k = max(1, top_k)
+    key = await result_cache.result_key(
+        result_cache.RESUMES, f"job:{job_id}:{j.updated_at.isoformat()}", k
+    )
+    cached = await result_cache.get_results(key)
+    if cached is not None:
+        return cached
+
+    job_vec = (await weight_queries(session, resume_df, await load_job_vectors(session, [j]))).row(0)
+    scored = select_top_k(
+        await _score_resumes(session, job_vec, k), k,
+        score=lambda x: x[0], tiebreak=lambda x: x[1].resume_id,
+    )
     out = [
         {
             "resume_id": str(f.resume_id),
             "full_name": f.full_name,
             "score": float(round(s, 6)),
         }
-        for s, f in scored[:max(1, top_k)]
+        for s, f in scored
     ]
+    await result_cache.put_results(key, out)
     return out
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Iterable, List, Optional
+
+from redis import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.after_commit import defer
+from app.integrations.redis_cache import cache_json_get, cache_json_set, get_redis
+from app.ml.embeddings import EMBEDDING_VERSION
+
+log = logging.getLogger(__name__)
+
+JOBS = "jobs"
+RESUMES = "resumes"
+
+_disabled_logged = False
+_bump_client: Optional[Redis] = None
+
+
+def _configured() -> bool:
+    """
+    False (logged once per process) when REDIS_URL is unset: the cache is simply off,
+    which is not worth a warning per request.
+    """
+    global _disabled_logged
+    if os.getenv("REDIS_URL"):
+        return True
+    if not _disabled_logged:
+        _disabled_logged = True
+        log.info("reco_cache_disabled", extra={"reason": "REDIS_URL is not set"})
+    return False
+
+
+def _version_key(corpus: str) -> str:
+    return f"reco:corpus:{corpus}:version"
+
+
+async def corpus_version(corpus: str) -> Optional[int]:
+    """
+    Current version of a corpus (0 if never bumped), or None when Redis is unavailable.
+    """
+    if not _configured():
+        return None
+    try:
+        raw = await get_redis().get(_version_key(corpus))
+    except Exception:
+        log.warning("reco_cache_unavailable", exc_info=True)
+        return None
+    return int(raw) if raw else 0
+
+
+def bump_after_commit(session: AsyncSession, corpus: str) -> None:
+    """
+    Bump the version of `corpus` once `session` commits, so entries keyed on the old
+    version are never read again (the TTL only reclaims their memory). Bumping earlier
+    would let a concurrent reader re-cache the pre-commit results under the new version;
+    rolled back writes bump nothing.
+    """
+    defer(session, "result_cache", corpus, _send)
+
+
+def _send(items: List[str]) -> None:
+    corpora = sorted(set(items))
+    if not _configured():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _bump(corpora)
+        return
+    # off the event-loop thread, like match_queue: after_commit is synchronous
+    loop.run_in_executor(None, _bump, corpora)
+
+
+def _bump(corpora: Iterable[str]) -> None:
+    global _bump_client
+    try:
+        if _bump_client is None:
+            # a blocking client: it runs on executor threads, not bound to any loop
+            _bump_client = Redis.from_url(os.environ["REDIS_URL"])
+        pipe = _bump_client.pipeline(transaction=False)
+        for corpus in corpora:
+            pipe.incr(_version_key(corpus))
+        pipe.execute()
+    except Exception:
+        log.warning("reco_cache_bump_failed", exc_info=True, extra={"corpora": list(corpora)})
+
+
+def _settings_tag() -> str:
+    cfg = get_settings()
+    raw = f"{EMBEDDING_VERSION}|{cfg.ML_RETRIEVER}|{cfg.ML_WEIGHTING}|{cfg.ML_INDEX_PRECISION}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()[:8]
+
+
+async def result_key(corpus: str, subject: str, top_k: int) -> Optional[str]:
+    """
+    Cache key for the top_k results of `subject` (which must embed its own version, e.g. an
+    updated_at) against `corpus`; None disables caching for this call.
+    """
+    if get_settings().ML_RECO_CACHE_TTL <= 0:
+        return None
+    version = await corpus_version(corpus)
+    if version is None:
+        return None
+    return f"reco:{corpus}:v{version}:{_settings_tag()}:{subject}:k{top_k}"
+
+
+async def get_results(key: Optional[str]) -> Optional[Any]:
+    if key is None:
+        return None
+    try:
+        return await cache_json_get(key)
+    except Exception:
+        log.warning("reco_cache_get_failed", exc_info=True)
+        return None
+
+
+async def put_results(key: Optional[str], results: Any) -> None:
+    if key is None:
+        return
+    try:
+        await cache_json_set(key, results, ttl=get_settings().ML_RECO_CACHE_TTL)
+    except Exception:
+        log.warning("reco_cache_set_failed", exc_info=True)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from app.models.job import Job
+
+
+def job_hit(j: Job, s: float) -> Dict:
+    """
+    Response row for a recommended job (recommend, hybrid): id, title, location,
+    employment type and the score rounded to 6 places.
+    """
+    return {
+        "job_id": str(j.id),
+        "title": j.title,
+        "location": j.location,
+        "employment_type": j.employment_type.value,
+        "score": float(round(s, 6)),
+    }
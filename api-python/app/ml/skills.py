@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import math
+import re
+import sys
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.ml.topk import top_k_indices
+
+_tag_re = re.compile(r"[^a-z0-9+#]+")
+
+# Stamp stored with the skills_norm columns; bump whenever norm_tag or _SYNONYMS change so
+# rows canonicalized under the old rules are recomputed (see backfill_skills_norm).
+SKILL_CANON_VERSION = "skills-syn-v2"
+
+# norm_tag form of an alias -> canonical tag (itself in norm_tag form). Only aliases that
+# are unambiguous as a standalone skill: "tf" (Terraform), "ci" and "pg" are left alone.
+_SYNONYMS: Dict[str, str] = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "node": "node js",
+    "nodejs": "node js",
+    "reactjs": "react",
+    "react js": "react",
+    "vuejs": "vue",
+    "vue js": "vue",
+    "angularjs": "angular",
+    "angular js": "angular",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "cpp": "c++",
+    "c plus plus": "c++",
+    "csharp": "c#",
+    "c sharp": "c#",
+    "k8s": "kubernetes",
+    "kube": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "mssql": "sql server",
+    "ms sql": "sql server",
+    "microsoft sql server": "sql server",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "ai": "artificial intelligence",
+    "sklearn": "scikit learn",
+    "scikit": "scikit learn",
+    "torch": "pytorch",
+    "cicd": "ci cd",
+    "restful": "rest api",
+    "rest": "rest api",
+    "html5": "html",
+    "css3": "css",
+}
+
+
+def norm_tag(s: str) -> str:
+    return _tag_re.sub(" ", s.strip().lower()).strip()
+
+
+@lru_cache(maxsize=65536)
+def canonical_tag(raw: str) -> str:
+    """
+    Canonical form of one raw skill: norm_tag, then the synonym table. Interned and
+    cached, so the regex runs once per distinct raw string per process.
+    """
+    tag = norm_tag(raw)
+    return sys.intern(_SYNONYMS.get(tag, tag))
+
+
+def skill_tags(skills: Optional[Iterable[str]]) -> Set[str]:
+    """
+    Canonical, de-duplicated skill set (the unit score_skills_overlap compares).
+    """
+    return {canonical_tag(x) for x in skills or () if x}
+
+
+def canonicalize(skills: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    Value stored in the skills_norm columns: sorted skill_tags, None when there are no skills.
+    """
+    return sorted(skill_tags(skills)) if skills is not None else None
+
+
+def canonicalize_many(skill_lists: Iterable[Optional[Iterable[str]]]) -> List[Optional[List[str]]]:
+    """
+    Bulk canonicalize (e.g. a backfill batch); repeated raw tags hit the intern cache.
+    """
+    return [canonicalize(x) for x in skill_lists]
+
+
+def stored_tags(skills: Optional[Sequence[str]], norm: Optional[Sequence[str]], version: Optional[str]) -> Sequence[str]:
+    """
+    Canonical tags of a row: its stored skills_norm when written under the current
+    SKILL_CANON_VERSION, recomputed from the raw skills otherwise.
+    """
+    if norm is not None and version == SKILL_CANON_VERSION:
+        return norm
+    return canonicalize(skills) or []
+
+
+def row_tags(row: Any) -> Sequence[str]:
+    """
+    stored_tags of a Job / ResumeFeatures instance.
+    """
+    return stored_tags(row.skills, row.skills_norm, row.skills_version)
+
+
+def overlap_score(inter: int, n_a: int, n_b: int) -> float:
+    """
+    Symmetric overlap of two skill sets with `inter` tags in common (0..1, 4 decimals).
+    """
+    if not inter or not n_a or not n_b:
+        return 0.0
+    return round(inter / math.sqrt(n_a * n_b), 4)
+
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class SkillBits(NamedTuple):
+    """
+    Skill sets packed as fixed-width bitsets over a SkillVocab: row i has bit b set when
+    entity i carries the tag with id b. sizes[i] is the full size of its normalized skill
+    set, including tags the vocabulary didn't know when it was encoded.
+    """
+
+    bits: np.ndarray   # (n, words) uint64
+    sizes: np.ndarray  # (n,) int32
+
+    @property
+    def words(self) -> int:
+        return self.bits.shape[1]
+
+
+class SkillVocab:
+    """
+    Global tag -> bit id dictionary. Grows as skills are indexed (SkillIndex.add sees every
+    Job.skills / ResumeFeatures.skills list); ids are never reused, so bitsets encoded
+    earlier stay valid and are zero-padded to the current width when compared.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def words(self) -> int:
+        return max(1, -(-len(self._ids) // 64))
+
+    def learn(self, tags: Iterable[str]) -> None:
+        new = [t for t in tags if t not in self._ids]
+        if new:
+            with self._lock:
+                for t in new:
+                    self._ids.setdefault(t, len(self._ids))
+
+    def encode(self, tag_lists: Sequence[Optional[Iterable[str]]], *, learn: bool = False) -> SkillBits:
+        """
+        Pack canonical tag lists (see row_tags / skill_tags); unknown tags still count
+        towards sizes but set no bit.
+        """
+        sets = [set(x or ()) for x in tag_lists]
+        if learn:
+            self.learn(t for tags in sets for t in tags)
+        ids = self._ids
+        rows: List[int] = []
+        cols: List[int] = []
+        for i, tags in enumerate(sets):
+            for t in tags:
+                b = ids.get(t)
+                if b is not None:
+                    rows.append(i)
+                    cols.append(b)
+        bits = np.zeros((len(sets), self.words), dtype=np.uint64)
+        if rows:
+            c = np.asarray(cols, dtype=np.int64)
+            np.bitwise_or.at(bits, (np.asarray(rows), c >> 6), np.left_shift(np.uint64(1), (c & 63).astype(np.uint64)))
+        return SkillBits(bits, np.fromiter((len(t) for t in sets), dtype=np.int32, count=len(sets)))
+
+
+skill_vocab = SkillVocab()
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT8[np.ascontiguousarray(bits).view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+def _pad(bits: np.ndarray, words: int) -> np.ndarray:
+    if bits.shape[1] >= words:
+        return bits
+    return np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
+
+
+def overlap_scores(query: SkillBits, corpus: SkillBits) -> np.ndarray:
+    """
+    overlap_score of the single skill set in `query` against every row of `corpus`, as
+    one vectorized AND + popcount over the packed rows.
+    """
+    words = max(query.words, corpus.words)
+    inter = _popcount_rows(_pad(corpus.bits, words) & _pad(query.bits, words)[0])
+    denom = np.sqrt(corpus.sizes.astype(np.float64) * float(query.sizes[0]))
+    out = np.zeros(len(inter), dtype=np.float64)
+    np.divide(inter, denom, out=out, where=(inter > 0) & (denom > 0))
+    return np.round(out, 4)
+
+
+def shared_reasons(a: Iterable[str], b: Iterable[str]) -> List[str]:
+    """
+    Human-readable match reasons from two canonical tag lists: up to six shared tags, sorted.
+    """
+    return reasons_for(sorted(set(a) & set(b)))
+
+
+def reasons_for(common: Sequence[str]) -> List[str]:
+    return [f"Shared skills: {', '.join(common[:6])}"] if common else []
+
+
+class _TagPostings:
+    """
+    Slots (ascending) of the entities carrying one tag, plus slots appended since the
+    last freeze. Frozen lists never contain removed entities.
+    """
+
+    __slots__ = ("slots", "pending", "dirty")
+
+    def __init__(self) -> None:
+        self.slots = np.empty(0, dtype=np.int32)
+        self.pending: List[int] = []
+        self.dirty = False
+
+    def freeze(self, alive: np.ndarray) -> np.ndarray:
+        if self.dirty:
+            slots = np.concatenate([self.slots, np.asarray(self.pending, dtype=np.int32)])
+            self.slots = slots[alive[slots]]
+            self.pending = []
+            self.dirty = False
+        return self.slots
+
+
+class SkillIndex:
+    """
+    Normalized skill tag -> posting-list index over every job / resume in a corpus.
+
+    A query only touches entities sharing at least one tag with it: the query's posting
+    lists are merged (one bincount over their concatenation) into per-entity overlap
+    counts, which give exactly score_skills_overlap for every candidate. Top-k is exact
+    over the whole corpus, ties by id.
+    """
+
+    quantized = False
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, _TagPostings] = {}
+        self._ids: List[Hashable] = []
+        self._slot: Dict[Hashable, int] = {}
+        self._tags: Dict[int, Tuple[str, ...]] = {}
+        self._size = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, id_: Hashable) -> bool:
+        return id_ in self._slot
+
+    def _grow(self, n: int) -> None:
+        if n > len(self._alive):
+            cap = max(n, 2 * len(self._alive), 1024)
+            self._alive = np.concatenate([self._alive, np.zeros(cap - len(self._alive), dtype=bool)])
+            self._size = np.concatenate([self._size, np.zeros(cap - len(self._size), dtype=np.int32)])
+
+    def add(self, ids: Sequence[Hashable], tag_lists: Sequence[Optional[Iterable[str]]]) -> None:
+        """
+        Insert or replace entities' canonical tag lists (row_tags). Entities without
+        tags are dropped.
+        """
+        self.remove(ids)
+        for id_, raw in zip(ids, tag_lists):
+            tags = tuple(sorted(set(raw or ())))
+            if not tags:
+                continue
+            skill_vocab.learn(tags)
+            if id_ in self._slot:  # repeated within the batch
+                self.remove([id_])
+            slot = len(self._ids)
+            self._grow(slot + 1)
+            self._ids.append(id_)
+            self._slot[id_] = slot
+            self._tags[slot] = tags
+            self._alive[slot] = True
+            self._size[slot] = len(tags)
+            for t in tags:
+                p = self._postings.get(t)
+                if p is None:
+                    p = self._postings[t] = _TagPostings()
+                p.pending.append(slot)
+                p.dirty = True
+
+    def remove(self, ids: Iterable[Hashable]) -> None:
+        for id_ in ids:
+            slot = self._slot.pop(id_, None)
+            if slot is None:
+                continue
+            self._alive[slot] = False
+            for t in self._tags.pop(slot):
+                self._postings[t].dirty = True
+            self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._slot):
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Drop tombstoned slots by re-adding the live entities in slot order.
+        """
+        live = [(id_, self._tags[s]) for id_, s in sorted(self._slot.items(), key=lambda x: x[1])]
+        self._postings = {}
+        self._ids = []
+        self._slot = {}
+        self._tags = {}
+        self._size = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._dead = 0
+        self.add([id_ for id_, _ in live], [tags for _, tags in live])
+
+    def query(self, tags: Optional[Iterable[str]], k: int) -> List[Tuple[Hashable, float]]:
+        """
+        Top-k entities by skill overlap with the canonical `tags` (positive scores only,
+        best first).
+        """
+        k = max(1, k)
+        query = set(tags or ())
+        lists = [p.freeze(self._alive) for p in (self._postings.get(t) for t in query) if p is not None]
+        lists = [s for s in lists if len(s)]
+        if not lists:
+            return []
+        counts = np.bincount(np.concatenate(lists), minlength=len(self._ids))
+        cand = np.flatnonzero(counts)
+        scores = np.round(counts[cand] / np.sqrt(len(query) * self._size[cand].astype(np.float64)), 4)
+        top = top_k_indices(scores, k, lambda i: self._ids[cand[i]])
+        return [(self._ids[cand[i]], float(scores[i])) for i in top.tolist()]
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIMS, CsrMatrix, SparseVector, quantize_values, stack_sparse
+
+_MAGIC = b"HBOWSNP1"
+_ALIGN = 64
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped corpus snapshot. Every process that opens the same file shares
+    one page-cached copy; the arrays below are views into the mapping, never copies.
+
+      ids         (n,) S16     uuid bytes, ascending (row i = slot i)
+      matrix      CsrMatrix    float32 rows, for re-scoring and deletes
+      post_ptr    (dims+1,)    posting list of bucket t spans post_ptr[t]:post_ptr[t+1]
+      post_docs   int32        row numbers, ascending within a list
+      post_vals   float32, or uint8 codes when precision == "int8"
+      post_scale  (dims,)      per-list scale (1.0 for float32)
+      post_max    (dims,)      per-list max weight
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            self.key = st.st_ino, st.st_mtime_ns
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not an embedding snapshot")
+        hlen = int.from_bytes(self._mm[8:12], "little")
+        self.header: Dict[str, Any] = json.loads(self._mm[12:12 + hlen].decode("utf-8"))
+        arrays = {
+            name: np.frombuffer(self._mm, dtype=np.dtype(dt), count=count, offset=off)
+            for name, (off, dt, count) in self.header["arrays"].items()
+        }
+        self.corpus: str = self.header["corpus"]
+        self.version: str = self.header["version"]
+        self.precision: str = self.header["precision"]
+        self.dims: int = self.header["dims"]
+        wm = self.header["watermark"]
+        self.watermark: Optional[datetime] = datetime.fromisoformat(wm) if wm else None
+        self.ids = arrays["ids"]
+        self.matrix = CsrMatrix(arrays["indptr"], arrays["indices"], arrays["data"], self.dims)
+        self.post_ptr = arrays["post_ptr"]
+        self.post_docs = arrays["post_docs"]
+        self.post_vals = arrays["post_vals"]
+        self.post_scale = arrays["post_scale"]
+        self.post_max = arrays["post_max"]
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.ids)
+
+    def id(self, row: int) -> uuid.UUID:
+        return uuid.UUID(bytes=self.ids[row:row + 1].tobytes())
+
+    def find(self, id_: Any) -> Optional[int]:
+        if not isinstance(id_, uuid.UUID) or not len(self.ids):
+            return None
+        key = np.array(id_.bytes, dtype="S16")
+        i = int(np.searchsorted(self.ids, key))
+        return i if i < len(self.ids) and self.ids[i] == key else None
+
+
+def _postings(m: CsrMatrix, quantized: bool) -> Tuple[np.ndarray, ...]:
+    """
+    Column-major (bucket -> rows) copy of a CSR batch, optionally uint8-quantized per list.
+    """
+    rows = np.repeat(np.arange(m.n_rows, dtype=np.int32), np.diff(m.indptr))
+    order = np.argsort(m.indices, kind="stable")
+    terms, docs, vals = m.indices[order], rows[order], m.data[order]
+    ptr = np.zeros(m.dims + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=m.dims), out=ptr[1:])
+    scale = np.ones(m.dims, dtype=np.float32)
+    top = np.zeros(m.dims, dtype=np.float32)
+    codes = np.empty(len(vals), dtype=np.uint8) if quantized else vals
+    for t in np.flatnonzero(np.diff(ptr)).tolist():
+        a, b = ptr[t], ptr[t + 1]
+        top[t] = vals[a:b].max()
+        if quantized:
+            codes[a:b], scale[t] = quantize_values(vals[a:b])
+    return ptr, docs, codes, scale, top
+
+
+def write_snapshot(
+    path: Path,
+    ids: Sequence[uuid.UUID],
+    vecs: Sequence[SparseVector],
+    *,
+    corpus: str,
+    version: str,
+    watermark: Optional[datetime],
+    quantized: bool = False,
+    dims: int = EMBEDDING_DIMS,
+) -> Path:
+    """
+    Write a snapshot next to `path` and atomically rename it into place: readers that
+    already mapped the previous file keep using it until they re-open. Empty vectors are dropped.
+    """
+    keep = sorted({i.bytes: v for i, v in zip(ids, vecs) if len(v.indices)}.items())
+    id_arr = np.array([b for b, _ in keep], dtype="S16")
+    m = stack_sparse([v for _, v in keep], dims)
+    post_ptr, post_docs, post_vals, post_scale, post_max = _postings(m, quantized)
+    arrays = {
+        "ids": id_arr,
+        "indptr": m.indptr,
+        "indices": m.indices,
+        "data": m.data,
+        "post_ptr": post_ptr,
+        "post_docs": post_docs,
+        "post_vals": post_vals,
+        "post_scale": post_scale,
+        "post_max": post_max,
+    }
+
+    # Offsets depend on the header length, so lay out from a generous fixed header budget.
+    header: Dict[str, Any] = {
+        "corpus": corpus,
+        "version": version,
+        "precision": "int8" if quantized else "float32",
+        "dims": dims,
+        "watermark": watermark.isoformat() if watermark else None,
+        "arrays": {},
+    }
+    off = _ALIGN * (1 + (12 + len(json.dumps(header)) + 96 * len(arrays)) // _ALIGN)
+    for name, a in arrays.items():
+        header["arrays"][name] = (off, a.dtype.str, len(a))
+        off += -(-a.nbytes // _ALIGN) * _ALIGN
+    blob = json.dumps(header).encode("utf-8")
+    if 12 + len(blob) > header["arrays"]["ids"][0]:
+        raise ValueError("snapshot header overflows its reserved space")
+
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "wb") as fh:
+        fh.write(_MAGIC + len(blob).to_bytes(4, "little") + blob)
+        for name, a in arrays.items():
+            fh.seek(header["arrays"][name][0])
+            fh.write(np.ascontiguousarray(a).tobytes())
+        fh.truncate(off)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def open_snapshot(path: Path) -> Optional[Snapshot]:
+    """
+    Map the snapshot at `path`, or None if there is none (or it cannot be read).
+    """
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def snapshot_key(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Identity of the file currently published at `path` (changes on every atomic swap).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns
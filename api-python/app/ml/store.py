@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.embedding import JobEmbedding, ResumeEmbedding
+from app.models.job import Job
+from app.models.resume_features import ResumeFeatures
+from app.ml.embeddings import (
+    EMBEDDING_DIMS,
+    EMBEDDING_VERSION,
+    CsrMatrix,
+    SparseVector,
+    embed_sparse,
+    pack_sparse,
+    stack_sparse,
+    unpack_sparse,
+)
+from app.ml.executor import python_executor
+from app.ml.idf import DfTable, job_df, maintained, record_df, resume_df
+from app.ml.skills import SKILL_CANON_VERSION, canonicalize_many
+from app.ml.texts import job_text, resume_text
+
+# Rows per INSERT when writing back many vectors (keeps bind params under asyncpg's limit).
+_UPSERT_BATCH = 1000
+
+
+def embed_job(job: Job) -> SparseVector:
+    return embed_sparse([job_text(job)], dims=EMBEDDING_DIMS)[0]
+
+
+def embed_resume(features: ResumeFeatures) -> SparseVector:
+    return embed_sparse([resume_text(features)], dims=EMBEDDING_DIMS)[0]
+
+
+async def _embed_batch(texts: List[str]) -> List[SparseVector]:
+    """
+    Embed many texts off the event loop (tokenizing + hashing is pure Python).
+    """
+    if not texts:
+        return []
+    return await python_executor().run(embed_sparse, texts, EMBEDDING_DIMS)
+
+
+async def _upsert_vectors(session: AsyncSession, model: Type[Base], rows: List[Dict[str, Any]]) -> None:
+    """
+    INSERT ... ON CONFLICT DO UPDATE on the model's primary key; every other given column is overwritten.
+    """
+    if not rows:
+        return
+    pk = [c.name for c in model.__table__.primary_key.columns]
+    stmt = pg_insert(model).values(rows)
+    set_ = {k: stmt.excluded[k] for k in rows[0] if k not in pk}
+    set_["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(index_elements=pk, set_=set_)
+    await session.execute(stmt)
+
+
+async def _write_vectors(session: AsyncSession, table: DfTable, rows: List[Dict[str, Any]]) -> None:
+    """
+    Upsert vector rows into table.model in batches, keeping its document frequencies current
+    when they are in use.
+    """
+    model = table.model
+    pk = next(iter(model.__table__.primary_key.columns))
+    for i in range(0, len(rows), _UPSERT_BATCH):
+        batch = rows[i:i + _UPSERT_BATCH]
+        if not maintained():
+            await _upsert_vectors(session, model, batch)
+            continue
+        q = select(model.vector).where(
+            pk.in_([r[pk.name] for r in batch]), model.version == EMBEDDING_VERSION
+        )
+        old = [unpack_sparse(data, EMBEDDING_DIMS) for data in (await session.execute(q)).scalars()]
+        await _upsert_vectors(session, model, batch)
+        await record_df(session, table, [unpack_sparse(r["vector"], EMBEDDING_DIMS) for r in batch], old)
+
+
+def _job_row(job_id: uuid.UUID, vec: SparseVector) -> Dict[str, Any]:
+    return {"job_id": job_id, "version": EMBEDDING_VERSION, "vector": pack_sparse(vec)}
+
+
+def _resume_row(f: ResumeFeatures, vec: SparseVector) -> Dict[str, Any]:
+    return {
+        "resume_id": f.resume_id,
+        "version": EMBEDDING_VERSION,
+        "vector": pack_sparse(vec),
+        "features_updated_at": f.updated_at,
+    }
+
+
+# ----- jobs -----
+
+async def save_job_embedding(session: AsyncSession, job: Job) -> SparseVector:
+    """
+    Compute and persist the embedding of a job that was just written.
+    """
+    vec = embed_job(job)
+    await _write_vectors(session, job_df, [_job_row(job.id, vec)])
+    return vec
+
+
+async def load_job_vectors(session: AsyncSession, jobs: Sequence[Job]) -> CsrMatrix:
+    """
+    Stored vectors for `jobs` as one CSR batch (row order follows `jobs`).
+    Rows that are missing or carry another EMBEDDING_VERSION are recomputed and written back.
+    """
+    if not jobs:
+        return stack_sparse([])
+    q = select(JobEmbedding.job_id, JobEmbedding.vector).where(
+        JobEmbedding.job_id.in_([j.id for j in jobs]),
+        JobEmbedding.version == EMBEDDING_VERSION,
+    )
+    stored = {job_id: data for job_id, data in (await session.execute(q)).all()}
+
+    vecs = [unpack_sparse(stored[j.id], EMBEDDING_DIMS) if j.id in stored else None for j in jobs]
+    await _fill_jobs(session, jobs, vecs)
+    return stack_sparse(vecs)
+
+
+async def _fill_jobs(session: AsyncSession, jobs: Sequence[Job], vecs: List[Optional[SparseVector]]) -> None:
+    """
+    Embed the jobs whose slot in `vecs` is None, fill them in and write them back.
+    """
+    todo = [i for i, v in enumerate(vecs) if v is None]
+    computed = await _embed_batch([job_text(jobs[i]) for i in todo])
+    for i, v in zip(todo, computed):
+        vecs[i] = v
+    await _write_vectors(session, job_df, [_job_row(jobs[i].id, v) for i, v in zip(todo, computed)])
+
+
+async def load_active_job_matrix(
+    session: AsyncSession, ids: Optional[Sequence[uuid.UUID]] = None
+) -> Tuple[List[Job], CsrMatrix]:
+    """
+    Every active job (ordered by id), or the active ones among `ids`, with its vector in
+    one joined query. Without `ids` there is no IN list, so it scales to the whole corpus.
+    Missing or stale vectors are recomputed and written back in batches.
+    """
+    q = (
+        select(Job, JobEmbedding.vector)
+        .outerjoin(
+            JobEmbedding, and_(JobEmbedding.job_id == Job.id, JobEmbedding.version == EMBEDDING_VERSION)
+        )
+        .where(Job.is_active.is_(True))
+        .order_by(Job.id)
+    )
+    if ids is not None:
+        q = q.where(Job.id.in_(ids))
+    jobs: List[Job] = []
+    vecs: List[Optional[SparseVector]] = []
+    for job, data in (await session.execute(q)).all():
+        jobs.append(job)
+        vecs.append(None if data is None else unpack_sparse(data, EMBEDDING_DIMS))
+    await _fill_jobs(session, jobs, vecs)
+    return jobs, stack_sparse(vecs)
+
+
+async def backfill_job_embeddings(session: AsyncSession, *, batch_size: int = 500) -> int:
+    """
+    Compute embeddings for every job that has none or a stale version.
+    Returns the number of rows written.
+    """
+    written = 0
+    while True:
+        q = (
+            select(Job)
+            .outerjoin(JobEmbedding, JobEmbedding.job_id == Job.id)
+            .where(or_(JobEmbedding.job_id.is_(None), JobEmbedding.version != EMBEDDING_VERSION))
+            .order_by(Job.id)
+            .limit(batch_size)
+        )
+        jobs = (await session.execute(q)).scalars().all()
+        if not jobs:
+            return written
+        computed = await _embed_batch([job_text(j) for j in jobs])
+        await _write_vectors(session, job_df, [_job_row(j.id, v) for j, v in zip(jobs, computed)])
+        await session.commit()
+        written += len(jobs)
+
+
+# ----- resume features -----
+
+async def save_resume_embedding(session: AsyncSession, features: ResumeFeatures) -> SparseVector:
+    """
+    Compute and persist the embedding of freshly upserted resume features.
+    """
+    vec = embed_resume(features)
+    await _write_vectors(session, resume_df, [_resume_row(features, vec)])
+    return vec
+
+
+async def forget_resume_embedding(session: AsyncSession, resume_id: uuid.UUID) -> None:
+    """
+    Take a resume's vector out of the document frequencies before its row is deleted
+    (the embedding itself goes with the ON DELETE CASCADE).
+    """
+    if not maintained():
+        return
+    q = select(ResumeEmbedding.vector).where(
+        ResumeEmbedding.resume_id == resume_id, ResumeEmbedding.version == EMBEDDING_VERSION
+    )
+    data = (await session.execute(q)).scalar_one_or_none()
+    if data is not None:
+        await record_df(session, resume_df, [], [unpack_sparse(data, EMBEDDING_DIMS)])
+
+
+async def load_resume_vectors(session: AsyncSession, feats: Sequence[ResumeFeatures]) -> CsrMatrix:
+    """
+    Stored vectors for `feats` as one CSR batch (row order follows `feats`).
+    A vector is reused only if its version and features_updated_at still match; anything
+    else is recomputed lazily and written back.
+    """
+    if not feats:
+        return stack_sparse([])
+    q = select(
+        ResumeEmbedding.resume_id, ResumeEmbedding.vector, ResumeEmbedding.features_updated_at
+    ).where(
+        ResumeEmbedding.resume_id.in_([f.resume_id for f in feats]),
+        ResumeEmbedding.version == EMBEDDING_VERSION,
+    )
+    stored = {rid: (data, ts) for rid, data, ts in (await session.execute(q)).all()}
+
+    vecs: List[Optional[SparseVector]] = []
+    for f in feats:
+        hit = stored.get(f.resume_id)
+        fresh = hit is not None and hit[1] == f.updated_at
+        vecs.append(unpack_sparse(hit[0], EMBEDDING_DIMS) if fresh else None)
+    await _fill_resumes(session, feats, vecs)
+    return stack_sparse(vecs)
+
+
+async def _fill_resumes(
+    session: AsyncSession, feats: Sequence[ResumeFeatures], vecs: List[Optional[SparseVector]]
+) -> None:
+    """
+    Embed the features whose slot in `vecs` is None, fill them in and write them back.
+    """
+    todo = [i for i, v in enumerate(vecs) if v is None]
+    computed = await _embed_batch([resume_text(feats[i]) for i in todo])
+    for i, v in zip(todo, computed):
+        vecs[i] = v
+    await _write_vectors(session, resume_df, [_resume_row(feats[i], v) for i, v in zip(todo, computed)])
+
+
+async def load_resume_matrix(
+    session: AsyncSession, ids: Sequence[uuid.UUID]
+) -> Tuple[List[ResumeFeatures], CsrMatrix]:
+    """
+    Resume features among `ids` (ordered by resume_id) with their vectors in one joined
+    query; stale or missing vectors are recomputed and written back.
+    """
+    q = (
+        select(ResumeFeatures, ResumeEmbedding.vector, ResumeEmbedding.features_updated_at)
+        .outerjoin(
+            ResumeEmbedding,
+            and_(
+                ResumeEmbedding.resume_id == ResumeFeatures.resume_id,
+                ResumeEmbedding.version == EMBEDDING_VERSION,
+            ),
+        )
+        .where(ResumeFeatures.resume_id.in_(ids))
+        .order_by(ResumeFeatures.resume_id)
+    )
+    feats: List[ResumeFeatures] = []
+    vecs: List[Optional[SparseVector]] = []
+    for f, data, ts in (await session.execute(q)).all():
+        feats.append(f)
+        vecs.append(unpack_sparse(data, EMBEDDING_DIMS) if data is not None and ts == f.updated_at else None)
+    await _fill_resumes(session, feats, vecs)
+    return feats, stack_sparse(vecs)
+
+
+async def backfill_resume_embeddings(session: AsyncSession, *, batch_size: int = 500) -> int:
+    """
+    Compute embeddings for resume features with no vector, a stale version, or a stale updated_at.
+    Returns the number of rows written.
+    """
+    written = 0
+    while True:
+        q = (
+            select(ResumeFeatures)
+            .outerjoin(ResumeEmbedding, ResumeEmbedding.resume_id == ResumeFeatures.resume_id)
+            .where(or_(
+                ResumeEmbedding.resume_id.is_(None),
+                ResumeEmbedding.version != EMBEDDING_VERSION,
+                ResumeEmbedding.features_updated_at != ResumeFeatures.updated_at,
+            ))
+            .order_by(ResumeFeatures.resume_id)
+            .limit(batch_size)
+        )
+        feats = (await session.execute(q)).scalars().all()
+        if not feats:
+            return written
+        computed = await _embed_batch([resume_text(f) for f in feats])
+        await _write_vectors(session, resume_df, [_resume_row(f, v) for f, v in zip(feats, computed)])
+        await session.commit()
+        written += len(feats)
+
+
+# ----- normalized skills -----
+
+async def backfill_skills_norm(session: AsyncSession, *, batch_size: int = 1000) -> int:
+    """
+    (Re)compute the skills_norm column of jobs / resume features written before it
+    existed or under an older SKILL_CANON_VERSION (synonym table change).
+    updated_at is kept as is, so stored embeddings are not invalidated; in-memory skill
+    corpora recompute stale rows themselves until they are rebuilt.
+    Returns the number of rows written.
+    """
+    written = 0
+    for table in (Job.__table__, ResumeFeatures.__table__):
+        key = next(iter(table.primary_key.columns))
+        stmt = (
+            update(table)
+            .where(key == bindparam("_key"))
+            .values(
+                skills_norm=bindparam("_norm"),
+                skills_version=SKILL_CANON_VERSION,
+                updated_at=table.c.updated_at,
+            )
+        )
+        while True:
+            rows = (await session.execute(
+                select(key, table.c.skills)
+                .where(
+                    table.c.skills.is_not(None),
+                    table.c.skills_version.is_distinct_from(SKILL_CANON_VERSION),
+                )
+                .order_by(key)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            norms = canonicalize_many(s for _, s in rows)
+            await session.execute(stmt, [{"_key": k, "_norm": n} for (k, _), n in zip(rows, norms)])
+            await session.commit()
+            written += len(rows)
+    return written
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from app.models.job import Job
+from app.models.resume_features import ResumeFeatures
+
+
+def resume_text(f: ResumeFeatures) -> str:
+    parts: list[str] = []
+    if f.full_name:
+        parts.append(f.full_name)
+    if f.summary:
+        parts.append(f.summary)
+    if f.skills:
+        parts.append(" ".join(f.skills))
+    if f.languages:
+        parts.append(" ".join(f.languages))
+    if f.experience:
+        items = (f.experience.get("items") or []) if isinstance(f.experience, dict) else []
+        for it in items:
+            title = (it.get("title") or "") if isinstance(it, dict) else ""
+            desc = (it.get("description") or "") if isinstance(it, dict) else ""
+            parts.append(f"{title} {desc}".strip())
+    if f.education:
+        items = (f.education.get("items") or []) if isinstance(f.education, dict) else []
+        for it in items:
+            deg = (it.get("degree") or "") if isinstance(it, dict) else ""
+            fld = (it.get("field_of_study") or "") if isinstance(it, dict) else ""
+            parts.append(f"{deg} {fld}".strip())
+    return " ".join(x for x in parts if x)
+
+
+def job_text(j: Job) -> str:
+    parts: list[str] = [j.title or "", j.description or ""]
+    if j.location:
+        parts.append(j.location)
+    if j.skills:
+        parts.append(" ".join(j.skills))
+    return " ".join(x for x in parts if x)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import heapq
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+def select_top_k(
+    items: Iterable[T],
+    k: int,
+    *,
+    score: Callable[[T], float],
+    tiebreak: Callable[[T], Any],
+) -> List[T]:
+    """
+    The k items with the highest score, best first; equal scores are ordered by
+    tiebreak ascending (e.g. job/resume id). Streams `items` through a k-sized heap,
+    so it is O(n log k) and never holds more than k candidates.
+    """
+    if k <= 0:
+        return []
+    return heapq.nsmallest(k, items, key=lambda x: (-score(x), tiebreak(x)))
+
+
+def top_k_indices(
+    scores: np.ndarray,
+    k: int,
+    tiebreak: Optional[Callable[[int], Any]] = None,
+) -> np.ndarray:
+    """
+    Indices of the k highest positive entries of `scores`, best first.
+    O(n) argpartition-style selection; only the boundary set is sorted, with ties
+    broken by tiebreak(i) ascending (index order if not given).
+    """
+    pos = np.flatnonzero(scores > 0)
+    if k <= 0 or not len(pos):
+        return np.empty(0, dtype=np.intp)
+    if len(pos) > k:
+        vals = scores[pos]
+        kth = np.partition(vals, len(vals) - k)[len(vals) - k]
+        pos = pos[vals >= kth]
+    tb = tiebreak or (lambda i: i)
+    ordered = sorted(pos.tolist(), key=lambda i: (-float(scores[i]), tb(i)))
+    return np.asarray(ordered[:k], dtype=np.intp)
@@ -7,6 +7,8 @@ from .application import Application, ApplicationStatus
 from .resume import Resume, ParseStatus
 from .resume_features import ResumeFeatures
 from .audit import AuditLog
+from .embedding import JobEmbedding, ResumeEmbedding, TermDf
+from .match import JobMatch
 
 __all__ = [
     "User",
@@ -19,4 +21,8 @@ __all__ = [
     "ParseStatus",
     "ResumeFeatures",
     "AuditLog",
+    "JobEmbedding",
+    "ResumeEmbedding",
+    "TermDf",
+    "JobMatch",
 ]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from datetime import datetime
+
+
+from app.db.base import Base
+
+
+class JobEmbedding(Base):
+    """
+    Precomputed hashed bag-of-words vector for a Job (1:1), packed by app.ml.embeddings.pack_sparse.
+    `version` is the EMBEDDING_VERSION the vector was computed with.
+    """
+    job_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("job.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    version: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<JobEmbedding job={self.job_id} version={self.version}>"
+
+
+class ResumeEmbedding(Base):
+    """
+    Precomputed vector for ResumeFeatures (1:1). `features_updated_at` mirrors the
+    ResumeFeatures.updated_at it was computed from; a mismatch means the vector is stale.
+    """
+    resume_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("resumefeatures.resume_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    version: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    features_updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ResumeEmbedding resume={self.resume_id} version={self.version}>"
+
+
+class TermDf(Base):
+    """
+    Document frequency of one hash bucket: how many stored vectors of `corpus` ("jobs" /
+    "resumes") at `version` have a non-zero weight there. Bucket -1 holds the document count.
+    Maintained incrementally by app.ml.store under ML_WEIGHTING=tfidf; app.ml.idf.rebuild_df
+    recomputes it from scratch.
+    """
+    corpus: Mapped[str] = mapped_column(String(16), primary_key=True)
+    version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    df: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<TermDf {self.corpus}/{self.version} bucket={self.bucket} df={self.df}>"
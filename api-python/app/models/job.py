@@ -4,7 +4,7 @@ import uuid
 from enum import Enum
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Enum as SAEnum, ForeignKey, String, Text, func
+from sqlalchemy import Boolean, DateTime, Enum as SAEnum, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -26,6 +26,11 @@ class Job(Base):
     """
     Job posting created by an employer (User with role=employer).
     """
+    __table_args__ = (
+        Index("ix_job_skills_gin", "skills", postgresql_using="gin"),
+        Index("ix_job_skills_norm_gin", "skills_norm", postgresql_using="gin"),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     employer_id: Mapped[uuid.UUID] = mapped_column(
@@ -38,6 +43,11 @@ class Job(Base):
     employment_type: Mapped[EmploymentType] = mapped_column(SAEnum(EmploymentType, name="employment_type"), nullable=False, default=EmploymentType.full_time, index=True)
 
     skills: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(100)))
+    # Sorted, de-duplicated canonical tags of `skills` (app.ml.skills.canonicalize), written
+    # with `skills` so matching never re-normalizes; skills_version is the
+    # SKILL_CANON_VERSION they were computed under.
+    skills_norm: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(100)))
+    skills_version: Mapped[Optional[str]] = mapped_column(String(32))
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False, index=True)
 
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class JobMatch(Base):
+    """
+    Materialized job -> candidate match (app.ml.matches): the hybrid ranker's fused score
+    and shared-skill reasons for one (job, resume features) pair. Read by
+    GET /jobs/{job_id}/candidates with a (score desc, resume_id) keyset cursor.
+    """
+    job_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("job.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    resume_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("resumefeatures.resume_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    reasons: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(100)))
+
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<JobMatch job={self.job_id} resume={self.resume_id} score={self.score}>"
+
+
+# One backward-free index scan per page: job, then score desc, resume_id asc (the cursor order).
+Index("ix_jobmatch_job_score", JobMatch.job_id, JobMatch.score.desc(), JobMatch.resume_id)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -17,6 +17,11 @@ class ResumeFeatures(Base):
     """
     Normalized, queryable resume information (1:1 with Resume).
     """
+    __table_args__ = (
+        Index("ix_resumefeatures_skills_gin", "skills", postgresql_using="gin"),
+        Index("ix_resumefeatures_skills_norm_gin", "skills_norm", postgresql_using="gin"),
+    )
+
     resume_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("resume.id", ondelete="CASCADE"),
@@ -29,6 +34,11 @@ class ResumeFeatures(Base):
     summary: Mapped[Optional[str]] = mapped_column(Text)
 
     skills: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(100)))
+    # Sorted, de-duplicated canonical tags of `skills` (app.ml.skills.canonicalize), written
+    # with `skills` so matching never re-normalizes; skills_version is the
+    # SKILL_CANON_VERSION they were computed under.
+    skills_norm: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(100)))
+    skills_version: Mapped[Optional[str]] = mapped_column(String(32))
     languages: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(60)))
 
     education: Mapped[Optional[dict]] = mapped_column(JSONB)   # e.g., {"schools": [...]} or a list; normalizer decides
@@ -19,6 +19,10 @@ from .job_repo import (
     update_job,
     deactivate_job,
 )
+from .match_repo import (
+    list_job_matches,
+    replace_job_matches,
+)
 from .application_repo import (
     create_application,
     get_application,
@@ -56,6 +60,9 @@ __all__ = [
     "list_jobs",
     "update_job",
     "deactivate_job",
+    # job matches
+    "list_job_matches",
+    "replace_job_matches",
     # applications
     "create_application",
     "get_application",
@@ -8,6 +8,14 @@ from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.job import Job, EmploymentType
+from app.ml.corpus import job_corpus, job_skills
+from app.ml.match_queue import JOB_DEACTIVATED, JOB_WRITTEN, schedule
+from app.ml.result_cache import JOBS, bump_after_commit
+from app.ml.skills import SKILL_CANON_VERSION, canonicalize, row_tags
+from app.ml.store import load_job_vectors, save_job_embedding
+
+# Columns that feed the job embedding (see app.ml.texts.job_text).
+_EMBEDDED_FIELDS = frozenset({"title", "description", "location", "skills"})
 
 
 async def create_job(
@@ -28,10 +36,18 @@ async def create_job(
         location=location,
         employment_type=employment_type,
         skills=skills,
+        skills_norm=canonicalize(skills),
+        skills_version=SKILL_CANON_VERSION,
         is_active=is_active,
     )
     session.add(obj)
     await session.flush()
+    vec = await save_job_embedding(session, obj)
+    if obj.is_active:
+        job_corpus.put(session, obj.id, vec)
+        job_skills.put(session, obj.id, row_tags(obj))
+        schedule(session, JOB_WRITTEN, obj.id)
+        bump_after_commit(session, JOBS)
     return obj
 
 
@@ -109,6 +125,8 @@ async def update_job(
         values["employment_type"] = employment_type
     if skills is not None:
         values["skills"] = skills
+        values["skills_norm"] = canonicalize(skills)
+        values["skills_version"] = SKILL_CANON_VERSION
     if is_active is not None:
         values["is_active"] = is_active
 
@@ -117,10 +135,34 @@ async def update_job(
 
     q = update(Job).where(Job.id == job_id).values(**values)
     res = await session.execute(q)
-    return res.rowcount or 0
+    rows = res.rowcount or 0
+    if rows:
+        bump_after_commit(session, JOBS)
+
+    if rows and (_EMBEDDED_FIELDS | {"is_active"}) & values.keys():
+        fresh = select(Job).where(Job.id == job_id).execution_options(populate_existing=True)
+        job = (await session.execute(fresh)).scalar_one_or_none()
+        if job:
+            schedule(session, JOB_WRITTEN, job.id)
+            if _EMBEDDED_FIELDS & values.keys():
+                vec = await save_job_embedding(session, job)
+            else:
+                vec = (await load_job_vectors(session, [job])).row(0)
+            if job.is_active:
+                job_corpus.put(session, job.id, vec)
+                job_skills.put(session, job.id, row_tags(job))
+            else:
+                job_corpus.discard(session, job.id)
+                job_skills.discard(session, job.id)
+    return rows
 
 
 async def deactivate_job(session: AsyncSession, job_id: uuid.UUID) -> int:
     q = update(Job).where(Job.id == job_id).values(is_active=False)
     res = await session.execute(q)
+    if res.rowcount:
+        job_corpus.discard(session, job_id)
+        job_skills.discard(session, job_id)
+        schedule(session, JOB_DEACTIVATED, job_id)
+        bump_after_commit(session, JOBS)
     return res.rowcount or 0
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import base64
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, any_, bindparam, delete, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.job import Job
+from app.models.match import JobMatch
+from app.models.resume_features import ResumeFeatures
+
+# (score, resume_id) of the last row of a page; the next page starts strictly after it.
+MatchCursor = Tuple[float, uuid.UUID]
+
+
+def encode_cursor(score: float, resume_id: uuid.UUID) -> str:
+    raw = f"{score!r}|{resume_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> MatchCursor:
+    """
+    Inverse of encode_cursor; raises ValueError for anything it did not produce.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        score, rid = raw.split("|", 1)
+        return float(score), uuid.UUID(rid)
+    except Exception as ex:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from ex
+
+
+async def list_job_matches(
+    session: AsyncSession,
+    job_id: uuid.UUID,
+    *,
+    limit: int = 20,
+    after: Optional[MatchCursor] = None,
+) -> List[Any]:
+    """
+    One page of a job's materialized matches, best first, as rows of
+    (resume_id, full_name, score, reasons, job_title). A single scan of
+    ix_jobmatch_job_score starting after the cursor.
+    """
+    q = (
+        select(
+            JobMatch.resume_id,
+            ResumeFeatures.full_name,
+            JobMatch.score,
+            JobMatch.reasons,
+            Job.title.label("job_title"),
+        )
+        .join(ResumeFeatures, ResumeFeatures.resume_id == JobMatch.resume_id)
+        .join(Job, Job.id == JobMatch.job_id)
+        .where(JobMatch.job_id == job_id)
+    )
+    if after is not None:
+        score, rid = after
+        q = q.where(or_(JobMatch.score < score, and_(JobMatch.score == score, JobMatch.resume_id > rid)))
+    q = q.order_by(JobMatch.score.desc(), JobMatch.resume_id).limit(max(1, limit))
+    return list((await session.execute(q)).all())
+
+
+def _upsert():
+    # job_written / resume_written / full rebuilds may race on the same (job, resume)
+    # pair: the later write wins instead of failing on the primary key
+    stmt = pg_insert(JobMatch)
+    return stmt.on_conflict_do_update(
+        index_elements=[JobMatch.job_id, JobMatch.resume_id],
+        set_={"score": stmt.excluded.score, "reasons": stmt.excluded.reasons, "computed_at": func.now()},
+    )
+
+
+def _rows(matches: Sequence[Dict], **fixed: Any) -> List[Dict]:
+    return [
+        {
+            "job_id": uuid.UUID(str(m["job_id"])) if "job_id" in m else None,
+            "resume_id": uuid.UUID(str(m["resume_id"])) if "resume_id" in m else None,
+            "score": float(m["score"]),
+            "reasons": m.get("reasons"),
+            **fixed,
+        }
+        for m in matches
+    ]
+
+
+async def replace_job_matches(session: AsyncSession, job_id: uuid.UUID, matches: Sequence[Dict]) -> int:
+    """
+    Replace all stored matches of a job with `matches` (dicts with resume_id, score and
+    reasons, e.g. rank_resumes_for_job output). Returns the number of rows written.
+    """
+    await session.execute(delete(JobMatch).where(JobMatch.job_id == job_id))
+    if not matches:
+        return 0
+    rows = _rows(matches, job_id=job_id)
+    await session.execute(_upsert(), rows)
+    return len(rows)
+
+
+async def delete_job_matches(session: AsyncSession, job_id: uuid.UUID) -> int:
+    """
+    Tombstone pass for a deactivated job: drop every stored match of it.
+    """
+    res = await session.execute(delete(JobMatch).where(JobMatch.job_id == job_id))
+    return res.rowcount or 0
+
+
+def _job_ids_param(job_ids: Sequence[uuid.UUID]):
+    # one array parameter instead of an IN list as long as the active job corpus
+    return any_(bindparam("job_ids", list(job_ids), type_=ARRAY(UUID(as_uuid=True)), unique=True))
+
+
+def _ranked(job_ids: Sequence[uuid.UUID]):
+    rank = func.row_number().over(
+        partition_by=JobMatch.job_id, order_by=(JobMatch.score.desc(), JobMatch.resume_id)
+    )
+    return (
+        select(JobMatch.job_id, JobMatch.resume_id, JobMatch.score, rank.label("rank"))
+        .where(JobMatch.job_id == _job_ids_param(job_ids))
+        .subquery()
+    )
+
+
+async def merge_resume_matches(
+    session: AsyncSession,
+    resume_id: uuid.UUID,
+    matches: Sequence[Dict],
+    *,
+    keep: int,
+) -> int:
+    """
+    Fold one resume's fresh pair scores (dicts with job_id, score and reasons, e.g.
+    score_resume_for_jobs output) into jobs that keep their best `keep` matches.
+    The resume's old rows are dropped; a pair is written only if it beats the current
+    keep-th score of its job; jobs that received a row are trimmed back to `keep`.
+    Returns the number of rows written.
+    """
+    await session.execute(delete(JobMatch).where(JobMatch.resume_id == resume_id))
+    if not matches:
+        return 0
+
+    job_ids = [m["job_id"] for m in matches]
+    full = _ranked(job_ids)
+    floor = dict((await session.execute(
+        select(full.c.job_id, full.c.score).where(full.c.rank == keep)
+    )).all())
+    rows = [
+        r for r in _rows(matches, resume_id=resume_id)
+        if r["job_id"] not in floor or r["score"] >= floor[r["job_id"]]
+    ]
+    if not rows:
+        return 0
+    await session.execute(_upsert(), rows)
+
+    trim = [r["job_id"] for r in rows if r["job_id"] in floor]
+    if trim:
+        over = _ranked(trim)
+        await session.execute(
+            delete(JobMatch).where(
+                tuple_(JobMatch.job_id, JobMatch.resume_id).in_(
+                    select(over.c.job_id, over.c.resume_id).where(over.c.rank > keep)
+                )
+            )
+        )
+    return len(rows)
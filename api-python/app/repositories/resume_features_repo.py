@@ -9,6 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
 from app.models.resume_features import ResumeFeatures
+from app.ml.corpus import resume_corpus, resume_skills
+from app.ml.match_queue import RESUME_WRITTEN, schedule
+from app.ml.result_cache import RESUMES, bump_after_commit
+from app.ml.skills import SKILL_CANON_VERSION, canonicalize, row_tags
+from app.ml.store import save_resume_embedding
 
 
 async def get_resume_features(session: AsyncSession, resume_id: uuid.UUID) -> Optional[ResumeFeatures]:
@@ -34,6 +39,7 @@ async def upsert_resume_features(
 ) -> None:
     """
     Postgres-native upsert (INSERT ... ON CONFLICT DO UPDATE) on primary key = resume_id.
+    The row's embedding is recomputed in the same transaction, stamped with its updated_at.
     """
     stmt = pg_insert(ResumeFeatures).values(
         resume_id=resume_id,
@@ -42,6 +48,8 @@ async def upsert_resume_features(
         phone=phone,
         summary=summary,
         skills=skills,
+        skills_norm=canonicalize(skills),
+        skills_version=SKILL_CANON_VERSION,
         languages=languages,
         education=education,
         experience=experience,
@@ -55,6 +63,8 @@ async def upsert_resume_features(
         "phone": stmt.excluded.phone,
         "summary": stmt.excluded.summary,
         "skills": stmt.excluded.skills,
+        "skills_norm": stmt.excluded.skills_norm,
+        "skills_version": stmt.excluded.skills_version,
         "languages": stmt.excluded.languages,
         "education": stmt.excluded.education,
         "experience": stmt.excluded.experience,
@@ -62,5 +72,13 @@ async def upsert_resume_features(
         "total_experience_months": stmt.excluded.total_experience_months,
         "updated_at": func.now(),
     }
-    stmt = stmt.on_conflict_do_update(index_elements=[ResumeFeatures.resume_id], set_=update_cols)
-    await session.execute(stmt)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResumeFeatures.resume_id], set_=update_cols
+    ).returning(ResumeFeatures)
+    res = await session.execute(stmt, execution_options={"populate_existing": True})
+    features = res.scalar_one()
+    vec = await save_resume_embedding(session, features)
+    resume_corpus.put(session, resume_id, vec)
+    resume_skills.put(session, resume_id, row_tags(features))
+    schedule(session, RESUME_WRITTEN, resume_id)
+    bump_after_commit(session, RESUMES)
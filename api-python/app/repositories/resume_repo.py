@@ -7,6 +7,9 @@ from sqlalchemy import Select, func, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.resume import Resume, ParseStatus
+from app.ml.corpus import resume_corpus, resume_skills
+from app.ml.result_cache import RESUMES, bump_after_commit
+from app.ml.store import forget_resume_embedding
 
 
 async def create_resume(
@@ -81,6 +84,11 @@ async def save_resume_raw_docintel(
 
 
 async def delete_resume(session: AsyncSession, resume_id: uuid.UUID) -> int:
+    await forget_resume_embedding(session, resume_id)
     q = delete(Resume).where(Resume.id == resume_id)
     res = await session.execute(q)
+    if res.rowcount:
+        resume_corpus.discard(session, resume_id)
+        resume_skills.discard(session, resume_id)
+        bump_after_commit(session, RESUMES)
     return res.rowcount or 0
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 
+from app.db.pg_pool import pg_pool_stats
+from app.ml.executor import executor_stats
+
 router = APIRouter()
 
 @router.get("", summary="Liveness")
@@ -9,3 +12,11 @@ async def liveness():
 @router.get("/ready", summary="Readiness")
 async def readiness():
     return {"status": "ready"}
+
+@router.get("/ml", summary="ML executor queue/latency metrics")
+async def ml_executors():
+    return {"executors": executor_stats()}
+
+@router.get("/pg-pool", summary="asyncpg pool size/acquire metrics")
+async def pg_pool():
+    return {"pool": pg_pool_stats()}
@@ -19,6 +19,8 @@ from app.schemas.job import (
     JobResponse,
     JobListResponse,
     EmploymentType,
+    MatchedCandidate,
+    MatchedCandidatesResponse,
 )
 from app.core.authz import require_role, require_org_member
 
@@ -152,22 +154,42 @@ async def delete_job(
     )
 
 
-@router.get("/{job_id}/candidates", summary="Get matched candidates for a job")
+@router.get(
+    "/{job_id}/candidates",
+    response_model=MatchedCandidatesResponse,
+    summary="Get matched candidates for a job",
+)
 async def get_matched_candidates(
     job_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=100, description="Page size (1-100)"),
+    cursor: str | None = Query(None, max_length=200, description="next_cursor of the previous page"),
+    explain: bool = Query(False, description="Include the shared skills behind each match"),
     job_service: JobService = Depends(get_job_service),
     user: Dict[str, Any] = Depends(require_role("org:admin")),
-) -> Dict[str, Any]:
+) -> MatchedCandidatesResponse:
     """
     Get candidates that match the requirements for a specific job.
     
+    Served from the precomputed match table (best match first), paginated by cursor.
     Only organization admins can view matched candidates.
+    
+    - **limit**: Number of candidates per page
+    - **cursor**: Continue after the previous page
+    - **explain**: Include match reasons
     """
-    job = await job_service.get_job(job_id)
+    title, rows, next_cursor = await job_service.list_matched_candidates(job_id, limit=limit, cursor=cursor)
     
-    return {
-        "job_id": str(job_id),
-        "job_title": job.title,
-        "candidates": [],
-        "message": "Candidate matching functionality coming soon",
-    }
+    return MatchedCandidatesResponse(
+        job_id=job_id,
+        job_title=title,
+        candidates=[
+            MatchedCandidate(
+                resume_id=r.resume_id,
+                full_name=r.full_name,
+                score=round(r.score, 6),
+                reasons=(r.reasons or []) if explain else None,
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor,
+    )
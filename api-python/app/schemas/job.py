@@ -103,3 +103,19 @@ class JobListResponse(ORMModel):
 JobCreate = JobCreateRequest
 JobUpdate = JobUpdateRequest
 JobRead = JobResponse
+
+
+class MatchedCandidate(ORMModel):
+    """One precomputed job -> candidate match."""
+    resume_id: uuid.UUID = Field(description="Matched resume ID")
+    full_name: Optional[str] = Field(None, description="Candidate name")
+    score: float = Field(description="Match score (higher is better)")
+    reasons: Optional[List[str]] = Field(None, description="Shared skills (only with explain=true)")
+
+
+class MatchedCandidatesResponse(ORMModel):
+    """Response schema for a job's matched candidates."""
+    job_id: uuid.UUID = Field(description="Job ID")
+    job_title: str = Field(description="Job title")
+    candidates: List[MatchedCandidate] = Field(description="Candidates, best match first")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page (None on the last page)")
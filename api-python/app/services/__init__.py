@@ -10,6 +10,7 @@ from .parsing import parse_resume_via_docintel
 from .normalize import normalize_docintel_resume
 from .matching import (
     score_skills_overlap,
+    score_skills_overlap_batch,
     match_jobs_for_candidate,
     match_candidates_for_job,
 )
@@ -34,6 +35,7 @@ __all__ = [
     "normalize_docintel_resume",
     # matching
     "score_skills_overlap",
+    "score_skills_overlap_batch",
     "match_jobs_for_candidate",
     "match_candidates_for_job",
     # storage
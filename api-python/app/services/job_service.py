@@ -7,12 +7,12 @@ repositories and providing a clean interface for route handlers.
 from __future__ import annotations
 
 import uuid
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.job import Job, EmploymentType
-from app.repositories import job_repo
+from app.repositories import job_repo, match_repo
 from app.core.exceptions import JobNotFoundError, InvalidJobDataError
 
 
@@ -142,6 +142,42 @@ class JobService:
             size=size,
         )
     
+    async def list_matched_candidates(
+        self,
+        job_id: uuid.UUID,
+        *,
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> Tuple[str, List[Any], str | None]:
+        """
+        Page through a job's materialized candidate matches, best first.
+        
+        Args:
+            job_id: UUID of the job
+            limit: Page size
+            cursor: next_cursor of the previous page (None for the first page)
+            
+        Returns:
+            (job title, match rows, next page cursor or None)
+            
+        Raises:
+            JobNotFoundError: If job doesn't exist
+            InvalidJobDataError: If the cursor is malformed
+        """
+        try:
+            after = match_repo.decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise InvalidJobDataError(str(e)) from e
+        
+        rows = await match_repo.list_job_matches(self.session, job_id, limit=limit, after=after)
+        if not rows:
+            # no matches (yet): still 404 for unknown jobs
+            return (await self.get_job(job_id)).title, [], None
+        
+        last = rows[-1]
+        next_cursor = match_repo.encode_cursor(last.score, last.resume_id) if len(rows) == limit else None
+        return rows[0].job_title, rows, next_cursor
+    
     async def update_job(
         self,
         job_id: uuid.UUID,
@@ -1,34 +1,82 @@
 from __future__ import annotations
 
-import math
-import re
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Float, Numeric, String, any_, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 
+from app.core.config import get_settings
 from app.models.job import Job
 from app.models.resume_features import ResumeFeatures
+from app.ml.corpus import job_skills, resume_skills
+from app.ml.skills import (
+    SKILL_CANON_VERSION,
+    SkillBits,
+    overlap_score,
+    overlap_scores,
+    reasons_for,
+    row_tags,
+    shared_reasons,
+    skill_tags,
+    skill_vocab,
+)
+from app.ml.topk import top_k_indices
 
-
-def _norm_tag(s: str) -> str:
-    return re.sub(r"[^a-z0-9+#]+", " ", s.strip().lower()).strip()
+# Pools scored exhaustively with ML_SKILL_MATCH=recent.
+_RECENT_JOBS = 200
+_RECENT_RESUMES = 500
+# Extra index hits fetched so rows dropped by the DB re-check don't shrink the limit.
+_INDEX_SLACK = 10
 
 
 def score_skills_overlap(a: Sequence[str] | None, b: Sequence[str] | None) -> float:
     """
     Simple symmetric overlap score between two skill lists (0..1).
     """
-    if not a or not b:
-        return 0.0
-    A = { _norm_tag(x) for x in a if x }
-    B = { _norm_tag(x) for x in b if x }
-    if not A or not B:
-        return 0.0
-    inter = len(A & B)
-    denom = math.sqrt(len(A) * len(B))
-    if denom == 0:
-        return 0.0
-    return round(inter / denom, 4)
+    A = skill_tags(a)
+    B = skill_tags(b)
+    return overlap_score(len(A & B), len(A), len(B))
+
+
+def score_skills_overlap_batch(a: Sequence[str] | None, packed: SkillBits) -> np.ndarray:
+    """
+    score_skills_overlap of `a` against every row of `packed` (skill_vocab.encode of many
+    skill lists, e.g. all candidate jobs, or all candidate resumes for a job) in one
+    vectorized bitset pass.
+    """
+    return overlap_scores(skill_vocab.encode([skill_tags(a)]), packed)
+
+
+def _sql_ranked(model: Any, key: Any, columns: Sequence[Any], tags: List[str], limit: int, *where: Any):
+    """
+    Top `limit` rows of `model` by skill overlap with `tags`, scored in Postgres.
+    Candidates come from the GIN index on skills_norm (&&); each row yields `columns`,
+    the shared tags (sorted bytewise, like Python) and the score, rounded to 4 places.
+    Only rows canonicalized under the current SKILL_CANON_VERSION are compared (their
+    skills_norm and the query tags share one synonym table); rows written before a version
+    bump are left out until app.ml.store.backfill_skills_norm has rewritten them.
+    """
+    q = cast(tags, ARRAY(String))
+    tag = func.unnest(model.skills_norm).column_valued("tag")
+    shared = (
+        select(func.array_agg(aggregate_order_by(tag, tag.collate("C"))))
+        .where(tag == any_(q))
+        .scalar_subquery()
+    )
+    inner = (
+        select(*columns, shared.label("shared"), func.cardinality(model.skills_norm).label("n"))
+        .where(model.skills_norm.op("&&")(q), model.skills_version == SKILL_CANON_VERSION, *where)
+        .subquery()
+    )
+    ratio = cast(func.cardinality(inner.c.shared), Float) / func.sqrt(cast(inner.c.n * len(tags), Float), type_=Float)
+    score = func.round(cast(ratio, Numeric), 4)
+    return (
+        select(inner, score.label("score"))
+        .order_by(score.desc(), inner.c[key.name])
+        .limit(limit)
+    )
 
 
 async def match_jobs_for_candidate(
@@ -39,35 +87,54 @@ async def match_jobs_for_candidate(
 ) -> List[Dict]:
     """
     Scores active jobs against a candidate's skills and returns ranked list with reasons.
+    ML_SKILL_MATCH picks where the whole active corpus is searched: the in-memory skill
+    index (only jobs sharing a skill are touched) or Postgres; =recent scores only the
+    newest jobs. Skills are compared in their stored canonical form (row_tags).
     """
-    q = select(Job).where(Job.is_active.is_(True)).order_by(Job.posted_at.desc()).limit(200)
+    tags = row_tags(features)
+    mode = get_settings().ML_SKILL_MATCH
+    if mode == "sql":
+        if not tags:
+            return []
+        cols = (Job.id, Job.title, Job.location, Job.employment_type)
+        rows = (await session.execute(
+            _sql_ranked(Job, Job.id, cols, list(tags), limit, Job.is_active.is_(True))
+        )).all()
+        return [
+            {
+                "job_id": str(r.id),
+                "title": r.title,
+                "location": r.location,
+                "employment_type": r.employment_type.value,
+                "score": float(r.score),
+                "reasons": reasons_for(r.shared),
+            }
+            for r in rows
+        ]
+
+    if mode != "recent":
+        index = await job_skills.sync(session)
+        hits = await job_skills.query(index, tags, limit + _INDEX_SLACK)
+        if not hits:
+            return []
+        q = select(Job).where(Job.id.in_([h for h, _ in hits]), Job.is_active.is_(True))
+    else:
+        q = select(Job).where(Job.is_active.is_(True)).order_by(Job.posted_at.desc()).limit(_RECENT_JOBS)
     jobs = (await session.execute(q)).scalars().all()
 
-    cand_skills = features.skills or []
-    results: List[Tuple[float, Job, List[str]]] = []
-
-    for job in jobs:
-        s = score_skills_overlap(cand_skills, job.skills or [])
-        reasons = []
-        if s > 0:
-            common = sorted(set(_norm_tag(x) for x in cand_skills) & set(_norm_tag(x) for x in (job.skills or [])))
-            if common:
-                reasons.append(f"Shared skills: {', '.join(common[:6])}")
-        score = s
-        if score > 0:
-            results.append((score, job, reasons))
-
-    results.sort(key=lambda x: x[0], reverse=True)
+    rows = [row_tags(j) for j in jobs]
+    scores = overlap_scores(skill_vocab.encode([tags]), skill_vocab.encode(rows, learn=True))
+    best = [(float(scores[i]), i) for i in top_k_indices(scores, limit, lambda i: jobs[i].id)]
     out = [
         {
-            "job_id": str(job.id),
-            "title": job.title,
-            "location": job.location,
-            "employment_type": job.employment_type.value,
+            "job_id": str(jobs[i].id),
+            "title": jobs[i].title,
+            "location": jobs[i].location,
+            "employment_type": jobs[i].employment_type.value,
             "score": float(score),
-            "reasons": reasons,
+            "reasons": shared_reasons(tags, rows[i]),
         }
-        for (score, job, reasons) in results[:limit]
+        for (score, i) in best
     ]
     return out
 
@@ -79,32 +146,48 @@ async def match_candidates_for_job(
     limit: int = 20,
 ) -> List[Dict]:
     """
-    Scores candidates (by features) for a given job and returns ranked list.
+    Scores candidates (by features) for a given job and returns ranked list
+    (all resume features via the skill index or Postgres, or only the most recent ones).
     """
-    q = select(ResumeFeatures).order_by(ResumeFeatures.updated_at.desc()).limit(500)
+    tags = row_tags(job)
+    mode = get_settings().ML_SKILL_MATCH
+    if mode == "sql":
+        if not tags:
+            return []
+        cols = (ResumeFeatures.resume_id, ResumeFeatures.full_name)
+        rows = (await session.execute(
+            _sql_ranked(ResumeFeatures, ResumeFeatures.resume_id, cols, list(tags), limit)
+        )).all()
+        return [
+            {
+                "resume_id": str(r.resume_id),
+                "full_name": r.full_name,
+                "score": float(r.score),
+                "reasons": reasons_for(r.shared),
+            }
+            for r in rows
+        ]
+
+    if mode != "recent":
+        index = await resume_skills.sync(session)
+        hits = await resume_skills.query(index, tags, limit + _INDEX_SLACK)
+        if not hits:
+            return []
+        q = select(ResumeFeatures).where(ResumeFeatures.resume_id.in_([h for h, _ in hits]))
+    else:
+        q = select(ResumeFeatures).order_by(ResumeFeatures.updated_at.desc()).limit(_RECENT_RESUMES)
     feats = (await session.execute(q)).scalars().all()
-    results: List[Tuple[float, ResumeFeatures, List[str]]] = []
-
-    req_skills = job.skills or []
-    for f in feats:
-        s = score_skills_overlap(req_skills, f.skills or [])
-        reasons = []
-        if s > 0:
-            common = sorted(set(_norm_tag(x) for x in req_skills) & set(_norm_tag(x) for x in (f.skills or [])))
-            if common:
-                reasons.append(f"Shared skills: {', '.join(common[:6])}")
-        score = s
-        if score > 0:
-            results.append((score, f, reasons))
-
-    results.sort(key=lambda x: x[0], reverse=True)
+
+    rows = [row_tags(f) for f in feats]
+    scores = overlap_scores(skill_vocab.encode([tags]), skill_vocab.encode(rows, learn=True))
+    best = [(float(scores[i]), i) for i in top_k_indices(scores, limit, lambda i: feats[i].resume_id)]
     out = [
         {
-            "resume_id": str(f.resume_id),
-            "full_name": f.full_name,
+            "resume_id": str(feats[i].resume_id),
+            "full_name": feats[i].full_name,
             "score": float(score),
-            "reasons": reasons,
+            "reasons": shared_reasons(tags, rows[i]),
         }
-        for (score, f, reasons) in results[:limit]
+        for (score, i) in best
     ]
     return out
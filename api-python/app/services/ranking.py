@@ -1,8 +1,122 @@
 from __future__ import annotations
+import logging
+import time
 from collections import Counter
-from typing import Iterable
+from typing import Any, Callable, Dict, Iterable, Sequence, Tuple
+
+import asyncpg
+
+from app.core.exceptions import JobNotFoundError
+from app.ml.keywords import scanner_for
+
+log = logging.getLogger(__name__)
 
 def jaccard(a: Iterable[str], b: Iterable[str]) -> float:
     sa, sb = set(x.lower() for x in a), set(x.lower() for x in b)
     if not sa or not sb: return 0.0
     return len(sa & sb) / float(len(sa | sb))
+
+
+# Per-transaction staging table for upsert_rankings (same column types as the target).
+_STAGE = "resume_ranking_stage"
+
+
+async def upsert_rankings(
+    conn: asyncpg.Connection,
+    job_id: Any,
+    rows: Sequence[Tuple[Any, float]],
+) -> Dict[str, float]:
+    """
+    Write a job's (resume_id, score) rankings in one transaction and two round-trips of
+    data: binary COPY into a temp staging table, then a single INSERT ... ON CONFLICT
+    merge into pyapi.resume_ranking (a resume listed twice is written once).
+    Returns rows written, seconds and rows/sec.
+    """
+    start = time.perf_counter()
+    if rows:
+        async with conn.transaction():
+            await conn.execute(f"""
+                create temp table if not exists {_STAGE}
+                (like pyapi.resume_ranking including defaults) on commit drop
+            """)
+            await conn.execute(f"truncate {_STAGE}")
+            await conn.copy_records_to_table(
+                _STAGE,
+                records=[(job_id, rid, float(score)) for rid, score in rows],
+                columns=["job_id", "resume_id", "score"],
+            )
+            await conn.execute(f"""
+                insert into pyapi.resume_ranking (job_id, resume_id, score)
+                select distinct on (job_id, resume_id) job_id, resume_id, score
+                from {_STAGE}
+                on conflict (job_id, resume_id)
+                do update set score = excluded.score, created_at = now()
+            """)
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": len(rows),
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(len(rows) / seconds, 1) if rows and seconds > 0 else 0.0,
+    }
+    log.info("resume_ranking_upsert", extra={"job_id": str(job_id), **stats})
+    return stats
+
+
+# Celery task (app.workers.ranking_tasks) running rank_job_keywords off the request path.
+RANK_TASK = "ranking.rank_job_keywords"
+
+_APPLICANTS = """
+    select r.id as resume_id, coalesce(r.text,'') as text
+    from resumes r
+    join applications a on a.resume_id = r.id
+    where a.job_id = $1
+"""
+
+
+async def rank_job_keywords(
+    reader: asyncpg.Connection,
+    writer: asyncpg.Connection,
+    job_id: Any,
+    *,
+    chunk_size: int = 1000,
+    on_progress: Callable[[Dict[str, Any]], None] = lambda meta: None,
+) -> Dict[str, Any]:
+    """
+    Keyword-rank every applicant resume of a job without holding it all in memory:
+    `reader` streams applicants through a server-side cursor in chunk_size batches,
+    each batch is scored with the job's KeywordScanner and flushed (upsert_rankings)
+    on `writer` in its own transaction, then on_progress gets done/total/percent and
+    rows/sec so far. Raises JobNotFoundError for unknown jobs.
+    """
+    rec = await reader.fetchrow("select keywords from jobs where id = $1", job_id)
+    if not rec:
+        raise JobNotFoundError(f"Job with ID {job_id} not found")
+    scanner = scanner_for((rec["keywords"] or "").split())
+    total = await reader.fetchval("select count(*) from applications where job_id = $1", job_id)
+
+    start = time.perf_counter()
+    done = chunks = 0
+
+    def _meta() -> Dict[str, Any]:
+        seconds = time.perf_counter() - start
+        return {
+            "job_id": str(job_id),
+            "done": done,
+            "total": total,
+            "percent": round(100.0 * done / total, 1) if total else 100.0,
+            "chunks": chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(done / seconds, 1) if done and seconds > 0 else 0.0,
+        }
+
+    async with reader.transaction():
+        cursor = await reader.cursor(_APPLICANTS, job_id, prefetch=chunk_size)
+        while True:
+            batch = await cursor.fetch(chunk_size)
+            if not batch:
+                break
+            await upsert_rankings(writer, job_id, [(r["resume_id"], float(scanner.score(r["text"]))) for r in batch])
+            done += len(batch)
+            chunks += 1
+            on_progress(_meta())
+    return _meta()
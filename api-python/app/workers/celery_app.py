@@ -21,6 +21,9 @@ def make_celery() -> Celery:
         include=[
             "app.workers.resume_tasks",
             "app.workers.analytics_tasks",
+            "app.workers.recommend_tasks",
+            "app.workers.match_tasks",
+            "app.workers.ranking_tasks",
         ],
     )
     app.conf.update(
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.workers.celery_app import celery_app
+from app.db.session import async_session
+from app.models.job import Job
+from app.ml.match_queue import JOB_DEACTIVATED, JOB_WRITTEN, RESUME_WRITTEN
+from app.ml.matches import materialize_job_matches, materialize_resume_matches
+from app.repositories.match_repo import delete_job_matches
+
+log = logging.getLogger(__name__)
+
+
+async def _in_session(fn: Callable[[AsyncSession], Awaitable[int]]) -> int:
+    async with async_session() as session:  # type: AsyncSession
+        return await fn(session)
+
+
+def _run(name: str, key: str, fn: Callable[[AsyncSession, uuid.UUID], Awaitable[int]]) -> Dict[str, Any]:
+    try:
+        kid = uuid.UUID(key)
+    except Exception as ex:
+        raise ValueError(f"Invalid id: {key}") from ex
+    try:
+        rows = asyncio.run(_in_session(lambda s: fn(s, kid)))
+        log.info(f"{name}_done", extra={"id": key, "rows": rows})
+        return {"id": key, "rows": rows}
+    except Exception:
+        log.exception(f"{name}_failed", extra={"id": key})
+        raise
+
+
+async def _job_written(session: AsyncSession, job_id: uuid.UUID) -> int:
+    active = (await session.execute(select(Job.is_active).where(Job.id == job_id))).scalar_one_or_none()
+    if not active:
+        return await delete_job_matches(session, job_id)
+    return await materialize_job_matches(session, job_id)
+
+
+@celery_app.task(name=RESUME_WRITTEN)
+def resume_written_task(resume_id: str) -> Dict[str, Any]:
+    """
+    Score a new or re-parsed resume against every active job and fold the pairs into
+    the jobs' stored matches.
+    """
+    return _run("match_resume_written", resume_id, materialize_resume_matches)
+
+
+@celery_app.task(name=JOB_WRITTEN)
+def job_written_task(job_id: str) -> Dict[str, Any]:
+    """
+    Recompute a created / edited job's stored matches (or drop them if it is inactive).
+    """
+    return _run("match_job_written", job_id, _job_written)
+
+
+@celery_app.task(name=JOB_DEACTIVATED)
+def job_deactivated_task(job_id: str) -> Dict[str, Any]:
+    """
+    Tombstone pass: drop a deactivated job's stored matches.
+    """
+    return _run("match_job_deactivated", job_id, delete_job_matches)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict
+
+from app.workers.celery_app import celery_app
+from app.db.pg_pool import close_pg_pool, pg_connection
+from app.services.ranking import RANK_TASK, rank_job_keywords
+
+log = logging.getLogger(__name__)
+
+
+async def _run_rank(job_id: str, chunk_size: int, on_progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    try:
+        async with pg_connection() as reader, pg_connection() as writer:
+            return await rank_job_keywords(reader, writer, job_id, chunk_size=chunk_size, on_progress=on_progress)
+    finally:
+        await close_pg_pool()
+
+
+@celery_app.task(name=RANK_TASK, bind=True)
+def rank_job_keywords_task(self, job_id: str, chunk_size: int = 1000) -> Dict[str, Any]:
+    """
+    Keyword-rank all applicants of a job into pyapi.resume_ranking, chunk by chunk.
+    Progress (done/total/percent/rows_per_sec) is published as PROGRESS state after
+    every flushed chunk; the final counts are the task result.
+    """
+    def _progress(meta: Dict[str, Any]) -> None:
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta=meta)
+
+    try:
+        result = asyncio.run(_run_rank(job_id, max(1, chunk_size), _progress))
+        log.info("rank_job_keywords_task_done", extra=result)
+        return result
+    except Exception:
+        log.exception("rank_job_keywords_task_failed", extra={"job_id": job_id})
+        raise
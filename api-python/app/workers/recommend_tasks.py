@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from app.workers.celery_app import celery_app
+from app.db.session import async_session
+from app.integrations.redis_cache import cache_json_set, close_redis
+from app.ml.corpus import job_corpus, resume_corpus
+from app.ml.matches import active_job_ids, materialize_job_matches
+from app.ml.recommend import iter_job_recommendations
+
+log = logging.getLogger(__name__)
+
+# Chunk results live as long as Celery task results (result_expires).
+_CHUNK_TTL = 3600
+
+
+def chunk_key(task_id: str, n: int) -> str:
+    return f"reco:batch:{task_id}:{n}"
+
+
+async def _run_batch(
+    task_id: str,
+    resume_ids: Optional[List[uuid.UUID]],
+    top_k: int,
+    chunk_size: int,
+    on_progress: Callable[[Dict[str, int]], None],
+) -> Dict[str, Any]:
+    chunks = resumes = 0
+    try:
+        async with async_session() as session:  # type: AsyncSession
+            async for chunk in iter_job_recommendations(
+                session, resume_ids=resume_ids, top_k=top_k, chunk_size=chunk_size
+            ):
+                # lazily recomputed vectors are written back per chunk
+                await session.commit()
+                await cache_json_set(chunk_key(task_id, chunks), chunk, ttl=_CHUNK_TTL)
+                chunks += 1
+                resumes += len(chunk)
+                on_progress({"chunks": chunks, "resumes": resumes})
+    finally:
+        await close_redis()
+    return {"chunks": chunks, "resumes": resumes, "key_prefix": f"reco:batch:{task_id}:"}
+
+
+@celery_app.task(name="recommend.jobs_for_resumes", bind=True)
+def recommend_jobs_batch_task(
+    self,
+    resume_ids: Optional[List[str]] = None,
+    top_k: int = 10,
+    chunk_size: int = 256,
+) -> Dict[str, Any]:
+    """
+    Job recommendations for many resumes (all resumes with features if resume_ids is None).
+    Each scored chunk is published to Redis under chunk_key(task_id, n) as soon as it is
+    ready, with PROGRESS state updates, so consumers can stream results instead of
+    waiting for the whole batch.
+    """
+    try:
+        rids = [uuid.UUID(r) for r in resume_ids] if resume_ids is not None else None
+    except Exception as ex:
+        raise ValueError(f"Invalid resume_ids: {ex}") from ex
+
+    task_id = self.request.id or str(uuid.uuid4())
+
+    def _progress(meta: Dict[str, int]) -> None:
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta=meta)
+
+    try:
+        result = asyncio.run(_run_batch(task_id, rids, top_k, chunk_size, _progress))
+        log.info("recommend_batch_task_done", extra=result)
+        return result
+    except Exception:
+        log.exception("recommend_batch_task_failed", extra={"task_id": task_id})
+        raise
+
+
+async def _run_publish() -> Dict[str, Any]:
+    async with async_session() as session:  # type: AsyncSession
+        out: Dict[str, Any] = {}
+        for corpus in (job_corpus, resume_corpus):
+            path = await corpus.publish(session)
+            out[corpus.name] = str(path) if path else None
+        # vectors recomputed while reading are worth keeping
+        await session.commit()
+        return out
+
+
+@celery_app.task(name="recommend.publish_snapshots")
+def publish_snapshots_task() -> Dict[str, Any]:
+    """
+    Publish job/resume corpus snapshots to ML_SNAPSHOT_DIR on the host running this worker.
+    """
+    try:
+        return asyncio.run(_run_publish())
+    except Exception:
+        log.exception("publish_snapshots_task_failed")
+        raise
+
+
+async def _run_materialize(
+    job_ids: Optional[List[uuid.UUID]],
+    on_progress: Callable[[Dict[str, int]], None],
+) -> Dict[str, Any]:
+    jobs = rows = 0
+    async with async_session() as session:  # type: AsyncSession
+        for job_id in job_ids if job_ids is not None else await active_job_ids(session):
+            rows += await materialize_job_matches(session, job_id)
+            # one transaction per job: readers never see a half-replaced candidate list
+            await session.commit()
+            jobs += 1
+            on_progress({"jobs": jobs, "rows": rows})
+    return {"jobs": jobs, "rows": rows}
+
+
+@celery_app.task(name="recommend.materialize_job_matches", bind=True)
+def materialize_job_matches_task(self, job_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Rebuild the job -> candidate match table served by GET /jobs/{job_id}/candidates,
+    for the given jobs or every active job.
+    """
+    try:
+        jids = [uuid.UUID(j) for j in job_ids] if job_ids is not None else None
+    except Exception as ex:
+        raise ValueError(f"Invalid job_ids: {ex}") from ex
+
+    def _progress(meta: Dict[str, int]) -> None:
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta=meta)
+
+    try:
+        result = asyncio.run(_run_materialize(jids, _progress))
+        log.info("materialize_matches_task_done", extra=result)
+        return result
+    except Exception:
+        log.exception("materialize_matches_task_failed")
+        raise
@@ -0,0 +1,87 @@
+"""
+Exhaustive CSR scoring vs. InvertedIndex (MaxScore) top-k at several corpus sizes.
+
+    python -m benchmarks.bench_inverted_index --sizes 10000,100000,1000000 --json out.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIMS, csr_scores
+from app.ml.inverted import InvertedIndex
+
+from benchmarks.synthetic import sparse_corpus
+
+
+def _exhaustive_topk(mat, q, k: int) -> np.ndarray:
+    s = csr_scores(mat, q)
+    top = np.argpartition(-s, min(k, len(s) - 1))[:k]
+    return np.sort(s[top])[::-1]
+
+
+def run(n_docs: int, *, dims: int, queries: int, k: int) -> Dict[str, Any]:
+    corpus = sparse_corpus(n_docs, dims=dims, seed=1)
+    qs = sparse_corpus(queries, dims=dims, seed=2)
+
+    t0 = time.perf_counter()
+    index = InvertedIndex(dims=dims)
+    index.add_matrix(range(n_docs), corpus)
+    for p in index._postings.values():  # freeze up front so queries are timed warm
+        p.freeze(index._alive)
+    build_s = time.perf_counter() - t0
+
+    exh: List[float] = []
+    inv: List[float] = []
+    mismatches = 0
+    for i in range(queries):
+        q = qs.row(i)
+        t0 = time.perf_counter()
+        ref = _exhaustive_topk(corpus, q, k)
+        exh.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        got = index.query(q, k)
+        inv.append(time.perf_counter() - t0)
+        ref = ref[ref > 0]
+        if not np.allclose(ref, [s for _, s in got], atol=2e-6):
+            mismatches += 1
+
+    return {
+        "n_docs": n_docs,
+        "dims": dims,
+        "nnz": int(len(corpus.indices)),
+        "k": k,
+        "queries": queries,
+        "build_s": round(build_s, 3),
+        "exhaustive_ms_p50": round(float(np.median(exh)) * 1000, 3),
+        "inverted_ms_p50": round(float(np.median(inv)) * 1000, 3),
+        "speedup": round(float(np.median(exh) / np.median(inv)), 2),
+        "topk_mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dims", type=int, default=EMBEDDING_DIMS)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--json", dest="json_path")
+    args = ap.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = run(n, dims=args.dims, queries=args.queries, k=args.k)
+        print(json.dumps(r))
+        results.append(r)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
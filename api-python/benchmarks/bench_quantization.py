@@ -0,0 +1,127 @@
+"""
+Memory and recall of int8-quantized embeddings (pack_sparse_q8, InvertedIndex(quantized=True))
+against float32, with and without the exact re-score of an oversampled shortlist.
+
+    python -m benchmarks.bench_quantization --sizes 10000,100000,1000000 --json out.json
+
+Memory figures are extrapolated to 1M vectors from the measured corpus.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+from app.ml.embeddings import (
+    EMBEDDING_DIMS,
+    csr_scores,
+    pack_sparse,
+    pack_sparse_q8,
+    stack_sparse,
+)
+from app.ml.inverted import InvertedIndex
+from app.ml.topk import top_k_indices
+
+from benchmarks.synthetic import sparse_corpus
+
+_MB = 1 << 20
+
+
+def _build(corpus, dims: int, quantized: bool) -> InvertedIndex:
+    index = InvertedIndex(dims=dims, quantized=quantized)
+    index.add_matrix(range(corpus.n_rows), corpus)
+    for p in index._postings.values():
+        p.freeze(index._alive, quantized)
+    return index
+
+
+def _postings_bytes(index: InvertedIndex) -> int:
+    return sum(p.docs.nbytes + p.vals.nbytes for p in index._postings.values())
+
+
+def _rerank(corpus, q, hits, k: int) -> List[int]:
+    ids = [h for h, _ in hits]
+    if not ids:
+        return []
+    s = csr_scores(stack_sparse([corpus.row(i) for i in ids], corpus.dims), q)
+    return [ids[i] for i in top_k_indices(s, k, ids.__getitem__)]
+
+
+def _recall(truth: Set[int], got: List[int]) -> float:
+    return len(truth & set(got)) / len(truth) if truth else 1.0
+
+
+def run(n_docs: int, *, dims: int, queries: int, k: int, factor: int) -> Dict[str, Any]:
+    corpus = sparse_corpus(n_docs, dims=dims, seed=1)
+    qs = sparse_corpus(queries, dims=dims, seed=2)
+    per_m = 1_000_000 / n_docs
+    sample = range(0, n_docs, max(1, n_docs // 10_000))
+    avg_f32 = float(np.mean([len(pack_sparse(corpus.row(i))) for i in sample]))
+    avg_q8 = float(np.mean([len(pack_sparse_q8(corpus.row(i))) for i in sample]))
+
+    f32 = _build(corpus, dims, quantized=False)
+    q8 = _build(corpus, dims, quantized=True)
+
+    t_f32: List[float] = []
+    t_q8: List[float] = []
+    coarse: List[float] = []
+    reranked: List[float] = []
+    for i in range(queries):
+        q = qs.row(i)
+        t0 = time.perf_counter()
+        ref = f32.query(q, k)
+        t_f32.append(time.perf_counter() - t0)
+        truth = {h for h, _ in ref}
+
+        coarse.append(_recall(truth, [h for h, _ in q8.query(q, k)]))
+        t0 = time.perf_counter()
+        got = _rerank(corpus, q, q8.query(q, k * factor), k)
+        t_q8.append(time.perf_counter() - t0)
+        reranked.append(_recall(truth, got))
+
+    return {
+        "n_docs": n_docs,
+        "dims": dims,
+        "k": k,
+        "rerank_factor": factor,
+        "queries": queries,
+        "mb_per_1m": {
+            "dense_float32": round(dims * 4 * 1_000_000 / _MB, 1),
+            "dense_python_list": round(dims * 32 * 1_000_000 / _MB, 1),
+            "sparse_float32": round(avg_f32 * 1_000_000 / _MB, 1),
+            "sparse_int8": round(avg_q8 * 1_000_000 / _MB, 1),
+            "postings_float32": round(_postings_bytes(f32) * per_m / _MB, 1),
+            "postings_int8": round(_postings_bytes(q8) * per_m / _MB, 1),
+        },
+        "recall_at_k_coarse": round(float(np.mean(coarse)), 4),
+        "recall_at_k_reranked": round(float(np.mean(reranked)), 4),
+        "float32_ms_p50": round(float(np.median(t_f32)) * 1000, 3),
+        "int8_rerank_ms_p50": round(float(np.median(t_q8)) * 1000, 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dims", type=int, default=EMBEDDING_DIMS)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--factor", type=int, default=3, help="shortlist = k * factor before re-score")
+    ap.add_argument("--json", dest="json_path")
+    args = ap.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = run(n, dims=args.dims, queries=args.queries, k=args.k, factor=args.factor)
+        print(json.dumps(r))
+        results.append(r)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Stage-by-stage benchmark of the ML ranking path on synthetic jobs / ResumeFeatures-shaped
+records. Offline: no database, no Redis.
+
+    python -m benchmarks.bench_ranking --sizes 1000,10000,100000,1000000 --json out.json
+    python -m benchmarks.bench_ranking --sizes 10000 --baseline out.json
+
+Stages are timed separately (text building, tokenization, keyword scanning, embedding,
+scoring, top-k) and the four ranking functions are timed per call through the same
+kernels they run once their rows are loaded:
+
+    match_jobs_for_candidate / match_candidates_for_job
+        SkillIndex query over every record + reasons for the winners
+    recommend_jobs_for_resume / recommend_resumes_for_job
+        corpus index query (ML_RETRIEVER / ML_INDEX_PRECISION) + exact re-score
+
+Pure-Python stages run on at most --text-limit records (throughput is per item); above
+that the array stages use a Zipf corpus of the full size with the same shape.
+Each stage reports seconds, items/s and its own peak traced memory (tracemalloc, on a
+separate untimed run; --no-memory skips it). Results for every size are printed as JSON
+lines and written to --json; --baseline prints per-stage speedups against a saved run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.ml.ann import LshIndex
+from app.ml.corpus import RetrievalIndex
+from app.ml.embeddings import (
+    EMBEDDING_DIMS,
+    CsrMatrix,
+    SparseVector,
+    _tokenize,
+    cosine_similarity,
+    csr_scores,
+    embed_csr,
+    embed_texts,
+    stack_sparse,
+)
+from app.ml.inverted import InvertedIndex
+from app.ml.keywords import KeywordScanner
+from app.ml.recommend import _RERANK_FACTOR
+from app.ml.skills import SkillIndex, row_tags, shared_reasons, skill_vocab
+from app.ml.texts import job_text, resume_text
+from app.ml.topk import select_top_k, top_k_indices
+from app.services.matching import score_skills_overlap, score_skills_overlap_batch
+
+from benchmarks.synthetic import sparse_corpus, synthetic_jobs, synthetic_resumes
+
+_MB = 1 << 20
+# Dense python-list vectors are ~16 KB each; keep the legacy stages small.
+_DENSE_LIMIT = 10_000
+
+
+def _stage(fn: Callable[[], Any], items: int, *, memory: bool) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    out: Dict[str, Any] = {
+        "items": items,
+        "seconds": round(seconds, 4),
+        "per_sec": round(items / seconds, 1) if seconds else None,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            out["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / _MB, 2)
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+def _latency(fn: Callable[[int], Any], calls: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+    p50, p95 = np.percentile(samples, [50, 95]).tolist()
+    return {"calls": calls, "p50_ms": round(p50 * 1000, 3), "p95_ms": round(p95 * 1000, 3)}
+
+
+def _match(index: SkillIndex, query: Any, records: List[Any], k: int) -> List[Dict]:
+    tags = row_tags(query)
+    return [
+        {"score": s, "reasons": shared_reasons(tags, row_tags(records[i]))}
+        for i, s in index.query(tags, k)
+    ]
+
+
+def _build_index(matrix: CsrMatrix, dims: int) -> RetrievalIndex:
+    """
+    The retrieval index the corpora use (ML_RETRIEVER / ML_INDEX_PRECISION), filled with `matrix`.
+    """
+    cfg = get_settings()
+    quantized = cfg.ML_INDEX_PRECISION == "int8"
+    if cfg.ML_RETRIEVER != "lsh":
+        index = InvertedIndex(dims=dims, quantized=quantized)
+        index.add_matrix(range(matrix.n_rows), matrix)
+        return index
+    lsh = LshIndex(
+        dims=dims,
+        n_tables=cfg.ML_ANN_TABLES,
+        n_bits=cfg.ML_ANN_BITS,
+        probes=cfg.ML_ANN_PROBES,
+        quantized=quantized,
+    )
+    lsh.add(range(matrix.n_rows), [matrix.row(i) for i in range(matrix.n_rows)])
+    return lsh
+
+
+def _recommend(index: RetrievalIndex, matrix: CsrMatrix, q: SparseVector, k: int, factor: int) -> List[int]:
+    hits = index.query(q, k * factor if index.quantized else k)
+    rows = [h for h, _ in hits]
+    if not index.quantized or not rows:
+        return rows[:k]
+    exact = csr_scores(stack_sparse([matrix.row(r) for r in rows], matrix.dims), q)
+    return [rows[i] for i in top_k_indices(exact, k, rows.__getitem__)]
+
+
+def run(
+    n: int,
+    *,
+    dims: int,
+    queries: int,
+    k: int,
+    text_limit: int,
+    memory: bool,
+) -> Dict[str, Any]:
+    m = min(n, text_limit)
+    jobs = synthetic_jobs(m, seed=1)
+    resumes = synthetic_resumes(m, seed=2)
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    job_texts: List[str] = []
+    resume_texts: List[str] = []
+
+    def _build_text() -> None:
+        job_texts[:] = [job_text(j) for j in jobs]
+        resume_texts[:] = [resume_text(r) for r in resumes]
+
+    stages["build_text"] = _stage(_build_text, 2 * m, memory=memory)
+    stages["tokenize"] = _stage(lambda: [_tokenize(t) for t in job_texts], m, memory=memory)
+    # keyword ranker: 50 job keywords against every resume text, one automaton pass each
+    keywords = [f"tok{i}" for i in range(0, 500, 10)]
+    stages["keyword_substring"] = _stage(
+        lambda: [sum(1 for kw in keywords if kw in t.lower()) for t in resume_texts], m, memory=memory
+    )
+    scanner = KeywordScanner(keywords)
+    stages["keyword_scan"] = _stage(lambda: [scanner.score(t) for t in resume_texts], m, memory=memory)
+
+    d = min(m, _DENSE_LIMIT)
+    dense: List[List[float]] = []
+
+    def _embed_dense() -> None:
+        dense[:] = embed_texts(job_texts[:d], dims)
+
+    stages["embed_texts"] = _stage(_embed_dense, d, memory=memory)
+    embedded: Dict[str, Any] = {}
+    stages["embed_csr"] = _stage(lambda: embedded.update(m=embed_csr(job_texts, dims)), m, memory=memory)
+
+    # Array-side corpus at full size: the embedded records, or a same-shape Zipf corpus.
+    matrix = embedded["m"] if n == m else sparse_corpus(n, dims=dims, seed=1)
+    qs = embed_csr(resume_texts[:queries], dims)
+    q = qs.row(0)
+    qd = embed_texts(resume_texts[:1], dims)[0]
+
+    stages["cosine_similarity"] = _stage(lambda: [cosine_similarity(qd, v) for v in dense], d, memory=memory)
+    stages["score_skills_overlap"] = _stage(
+        lambda: [score_skills_overlap(resumes[0].skills, j.skills) for j in jobs], m, memory=memory
+    )
+    packed = skill_vocab.encode([row_tags(j) for j in jobs], learn=True)
+    stages["score_skills_overlap_batch"] = _stage(
+        lambda: score_skills_overlap_batch(resumes[0].skills, packed), m, memory=memory
+    )
+    scores: Dict[str, np.ndarray] = {}
+    stages["csr_scores"] = _stage(lambda: scores.update(s=csr_scores(matrix, q)), n, memory=memory)
+    stages["top_k_indices"] = _stage(lambda: top_k_indices(scores["s"], k), n, memory=memory)
+    pairs = list(zip(scores["s"][:m].tolist(), range(m)))
+    stages["select_top_k"] = _stage(
+        lambda: select_top_k(pairs, k, score=lambda x: x[0], tiebreak=lambda x: x[1]), m, memory=memory
+    )
+
+    built: Dict[str, RetrievalIndex] = {}
+    stages["index_build"] = _stage(lambda: built.update(i=_build_index(matrix, dims)), n, memory=False)
+    index = built["i"]
+    index.query(q, k)  # freeze posting lists outside the timed calls
+
+    job_skills, resume_skills = SkillIndex(), SkillIndex()
+    stages["skill_index_build"] = _stage(
+        lambda: (job_skills.add(range(m), [row_tags(j) for j in jobs]),
+                 resume_skills.add(range(m), [row_tags(r) for r in resumes])),
+        2 * m, memory=False,
+    )
+    ranking = {
+        "match_jobs_for_candidate": _latency(
+            lambda i: _match(job_skills, resumes[i % m], jobs, k), queries
+        ),
+        "match_candidates_for_job": _latency(
+            lambda i: _match(resume_skills, jobs[i % m], resumes, k), queries
+        ),
+        "recommend_jobs_for_resume": _latency(
+            lambda i: _recommend(index, matrix, qs.row(i % qs.n_rows), k, _RERANK_FACTOR), queries
+        ),
+        "recommend_resumes_for_job": _latency(
+            lambda i: _recommend(index, matrix, matrix.row(i), k, _RERANK_FACTOR), queries
+        ),
+    }
+
+    return {
+        "n": n,
+        "text_records": m,
+        "dims": dims,
+        "k": k,
+        "index": type(index).__name__,
+        "quantized": bool(index.quantized),
+        "stages": stages,
+        "ranking": ranking,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _env() -> Dict[str, Any]:
+    try:
+        rev: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "commit": rev,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def _compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as fh:
+        base = {r["n"]: r for r in json.load(fh)["results"]}
+    for r in results:
+        b = base.get(r["n"])
+        if b is None:
+            continue
+        for name, s in r["stages"].items():
+            old = b["stages"].get(name)
+            if old and s["seconds"]:
+                print(f"n={r['n']:>8} {name:<22} x{old['seconds'] / s['seconds']:.2f}")
+        for name, s in r["ranking"].items():
+            old = b["ranking"].get(name)
+            if old and s["p50_ms"]:
+                print(f"n={r['n']:>8} {name:<26} x{old['p50_ms'] / s['p50_ms']:.2f} (p50)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000,100000,1000000")
+    ap.add_argument("--dims", type=int, default=EMBEDDING_DIMS)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--text-limit", type=int, default=100_000, help="max records for pure-Python stages")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--json", dest="json_path")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    args = ap.parse_args()
+
+    results = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        r = run(n, dims=args.dims, queries=args.queries, k=args.k,
+                text_limit=args.text_limit, memory=not args.no_memory)
+        print(json.dumps(r))
+        results.append(r)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump({"env": _env(), "results": results}, fh, indent=2)
+    if args.baseline:
+        _compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
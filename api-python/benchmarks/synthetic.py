@@ -0,0 +1,146 @@
+"""
+Synthetic corpora for the ML ranking benchmarks. Offline: no database, no Redis.
+"""
+from __future__ import annotations
+
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIMS, CsrMatrix, _hash_idx
+from app.ml.skills import SKILL_CANON_VERSION, canonicalize_many
+
+
+def token_buckets(vocab: int, dims: int) -> np.ndarray:
+    """
+    Hash bucket of each synthetic token "tok<i>", exactly as embed_texts would place it.
+    """
+    return np.fromiter((_hash_idx(f"tok{i}", dims) for i in range(vocab)), dtype=np.int32, count=vocab)
+
+
+def sparse_corpus(
+    n_docs: int,
+    *,
+    dims: int = EMBEDDING_DIMS,
+    vocab: int = 50_000,
+    min_tokens: int = 20,
+    max_tokens: int = 120,
+    zipf_a: float = 1.1,
+    seed: int = 0,
+    chunk: int = 50_000,
+) -> CsrMatrix:
+    """
+    L2-normalized hashed bag-of-words rows whose tokens follow a Zipf law, built directly
+    in CSR form (same layout embed_csr produces) so 1M-document corpora stay cheap to make.
+    """
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, vocab + 1, dtype=np.float64)
+    p = ranks ** -zipf_a
+    p /= p.sum()
+    buckets = token_buckets(vocab, dims)
+
+    indptr_parts = [np.zeros(1, dtype=np.int64)]
+    indices_parts: list[np.ndarray] = []
+    data_parts: list[np.ndarray] = []
+    offset = 0
+    for start in range(0, n_docs, chunk):
+        c = min(chunk, n_docs - start)
+        lens = rng.integers(min_tokens, max_tokens + 1, size=c)
+        toks = rng.choice(vocab, size=int(lens.sum()), p=p)
+        doc = np.repeat(np.arange(c, dtype=np.int64), lens)
+        keys, counts = np.unique(doc * dims + buckets[toks], return_counts=True)
+        rows = keys // dims
+        vals = counts.astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=vals * vals, minlength=c)).astype(np.float32)
+        vals /= norms[rows]
+        indptr_parts.append(offset + np.cumsum(np.bincount(rows, minlength=c)))
+        indices_parts.append((keys % dims).astype(np.int32))
+        data_parts.append(vals)
+        offset += len(keys)
+    return CsrMatrix(
+        np.concatenate(indptr_parts),
+        np.concatenate(indices_parts),
+        np.concatenate(data_parts),
+        dims,
+    )
+
+
+_LOCATIONS = ["Berlin", "Remote", "London", "New York", "Warsaw", "Lisbon", "Toronto", "Singapore"]
+_LANGUAGES = ["English", "German", "Polish", "Spanish", "French", "Portuguese"]
+
+
+class _Words:
+    """
+    Zipf-distributed "tok<i>" / "skill<i>" draws, vectorized per batch.
+    """
+
+    def __init__(self, rng: np.random.Generator, prefix: str, vocab: int, zipf_a: float) -> None:
+        p = np.arange(1, vocab + 1, dtype=np.float64) ** -zipf_a
+        self.p = p / p.sum()
+        self.rng = rng
+        self.words = [f"{prefix}{i}" for i in range(vocab)]
+
+    def take(self, lens: np.ndarray) -> list[list[str]]:
+        idx = self.rng.choice(len(self.words), size=int(lens.sum()), p=self.p).tolist()
+        out: list[list[str]] = []
+        pos = 0
+        for n in lens.tolist():
+            out.append([self.words[i] for i in idx[pos:pos + n]])
+            pos += n
+        return out
+
+
+def synthetic_jobs(n: int, *, vocab: int = 50_000, skill_vocab: int = 2_000, seed: int = 0) -> list[SimpleNamespace]:
+    """
+    Job-shaped records (the columns job_text and the matchers read), no ORM/session.
+    """
+    rng = np.random.default_rng(seed)
+    words = _Words(rng, "tok", vocab, 1.1)
+    skills = _Words(rng, "skill", skill_vocab, 1.05)
+    titles = words.take(rng.integers(2, 5, size=n))
+    descs = words.take(rng.integers(20, 121, size=n))
+    tags = skills.take(rng.integers(3, 16, size=n))
+    norms = canonicalize_many(tags)
+    locs = rng.integers(0, len(_LOCATIONS), size=n).tolist()
+    return [
+        SimpleNamespace(
+            id=uuid.UUID(int=int(rng.integers(1 << 62)) << 64 | i),
+            title=" ".join(titles[i]),
+            description=" ".join(descs[i]),
+            location=_LOCATIONS[locs[i]],
+            skills=tags[i],
+            skills_norm=norms[i],
+            skills_version=SKILL_CANON_VERSION,
+            is_active=True,
+        )
+        for i in range(n)
+    ]
+
+
+def synthetic_resumes(n: int, *, vocab: int = 50_000, skill_vocab: int = 2_000, seed: int = 0) -> list[SimpleNamespace]:
+    """
+    ResumeFeatures-shaped records (the fields resume_text and the matchers read).
+    """
+    rng = np.random.default_rng(seed)
+    words = _Words(rng, "tok", vocab, 1.1)
+    skills = _Words(rng, "skill", skill_vocab, 1.05)
+    summaries = words.take(rng.integers(10, 61, size=n))
+    exp = words.take(rng.integers(10, 81, size=n))
+    tags = skills.take(rng.integers(3, 21, size=n))
+    norms = canonicalize_many(tags)
+    langs = rng.integers(0, len(_LANGUAGES), size=(n, 2)).tolist()
+    return [
+        SimpleNamespace(
+            resume_id=uuid.UUID(int=int(rng.integers(1 << 62)) << 64 | i),
+            full_name=f"Candidate {i}",
+            summary=" ".join(summaries[i]),
+            skills=tags[i],
+            skills_norm=norms[i],
+            skills_version=SKILL_CANON_VERSION,
+            languages=sorted({_LANGUAGES[a] for a in langs[i]}),
+            experience={"items": [{"title": " ".join(exp[i][:3]), "description": " ".join(exp[i][3:])}]},
+            education={"items": [{"degree": "BSc", "field_of_study": "Computer Science"}]},
+        )
+        for i in range(n)
+    ]
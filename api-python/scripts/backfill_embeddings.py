@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.db.session import async_session
+from app.ml.idf import job_df, rebuild_df, resume_df
+from app.ml.store import backfill_job_embeddings, backfill_resume_embeddings, backfill_skills_norm
+
+
+async def backfill() -> dict[str, Any]:
+    async with async_session() as session:
+        jobs = await backfill_job_embeddings(session)
+        resumes = await backfill_resume_embeddings(session)
+        # exact document frequencies (also seeds them for vectors stored before TermDf existed)
+        job_docs = await rebuild_df(session, job_df)
+        resume_docs = await rebuild_df(session, resume_df)
+        await session.commit()
+        skills = await backfill_skills_norm(session)
+        return {
+            "jobs": jobs,
+            "resumes": resumes,
+            "job_docs": job_docs,
+            "resume_docs": resume_docs,
+            "skills_norm": skills,
+        }
+
+
+def main() -> None:
+    out = asyncio.run(backfill())
+    print("Backfill complete:", out)
+
+
+if __name__ == "__main__":
+    main()
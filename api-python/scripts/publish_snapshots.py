@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.db.session import async_session
+from app.ml.corpus import job_corpus, resume_corpus
+
+
+async def publish() -> dict[str, Any]:
+    async with async_session() as session:
+        out = {}
+        for corpus in (job_corpus, resume_corpus):
+            path = await corpus.publish(session)
+            out[corpus.name] = str(path) if path else None
+        await session.commit()
+        return out
+
+
+def main() -> None:
+    out = asyncio.run(publish())
+    print("Snapshots published:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ from app.db.session import async_session
 from app.models.user import User, UserRole
 from app.models.job import Job, EmploymentType
 from app.models.resume_features import ResumeFeatures
+from app.ml.skills import SKILL_CANON_VERSION, canonicalize
 
 
 async def _get_or_create_user(session: AsyncSession, *, email: str, full_name: str, role: UserRole) -> User:
@@ -47,6 +48,8 @@ async def _get_or_create_job(
         location=location,
         employment_type=employment_type,
         skills=skills or [],
+        skills_norm=canonicalize(skills or []),
+        skills_version=SKILL_CANON_VERSION,
         is_active=True,
     )
     session.add(j)
@@ -74,6 +77,8 @@ async def _get_or_create_resume_features(
         full_name=full_name,
         email=email,
         skills=skills,
+        skills_norm=canonicalize(skills),
+        skills_version=SKILL_CANON_VERSION,
         education={"items": []},
         experience={"items": []},
     )
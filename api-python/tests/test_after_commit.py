@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.after_commit import defer
+
+
+def test_deferred_items_run_in_order_once_per_commit_and_never_after_rollback():
+    session = AsyncSession()
+    committed, rolled_back = [], []
+
+    def _boom(items):
+        raise RuntimeError("handler failed")
+
+    defer(session, "a", 1, committed.append)
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    assert committed == []
+
+    defer(session, "a", 1, committed.append, rolled_back.append)
+    defer(session, "b", "x", _boom)
+    defer(session, "a", 2, committed.append)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    # a failing handler does not keep the others from running
+    assert committed == [[1, 2]] and rolled_back == []
+
+    defer(session, "a", 3, None, rolled_back.append)
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    assert rolled_back == [[3]]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+
+from app.ml.ann import LshIndex
+from app.ml.embeddings import csr_scores, embed_sparse, stack_sparse
+
+VOCAB = [f"tok{i}" for i in range(2000)]
+
+
+def _corpus(n: int, n_topics: int = 20, seed: int = 1) -> list[str]:
+    """
+    Topic-clustered synthetic texts: mostly topic words plus some background noise.
+    """
+    rnd = random.Random(seed)
+    topics = [rnd.sample(VOCAB, 30) for _ in range(n_topics)]
+    return [
+        " ".join(rnd.choices(topics[rnd.randrange(n_topics)], k=20) + rnd.choices(VOCAB, k=10))
+        for _ in range(n)
+    ]
+
+
+def test_lsh_recall_against_exhaustive():
+    texts = _corpus(2000)
+    vecs = embed_sparse(texts)
+    index = LshIndex(n_tables=16, n_bits=8, probes=1)
+    index.add(list(range(len(vecs))), vecs)
+    assert len(index) == len(vecs)
+    assert len(index.candidates(vecs[0])) < len(vecs)
+
+    mat = stack_sparse(vecs)
+    hits = total = 0
+    for q in range(0, 200, 5):
+        exact = np.argsort(-csr_scores(mat, vecs[q]), kind="stable")[:10]
+        approx = {i for i, _ in index.query(vecs[q], 10)}
+        hits += len(approx & set(exact.tolist()))
+        total += 10
+        assert index.query(vecs[q], 1)[0][0] == q
+    assert hits / total >= 0.9
+
+
+def test_lsh_insert_replace_delete():
+    vecs = embed_sparse(["python fastapi postgres", "react typescript", ""])
+    index = LshIndex()
+    index.add(["a", "b", "c"], vecs)
+    assert len(index) == 2  # empty vector is not indexed
+    assert index.query(vecs[0], 5)[0] == ("a", 1.0)
+
+    index.add(["a"], [vecs[1]])
+    assert len(index) == 2
+    assert {i for i, _ in index.query(vecs[1], 5)} == {"a", "b"}
+
+    index.remove(["a", "missing"])
+    assert "a" not in index
+    assert [i for i, _ in index.query(vecs[1], 5)] == ["b"]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ml.corpus import _JobSkills
+from app.ml.skills import SkillIndex
+
+
+async def test_index_writes_apply_after_commit_only():
+    corpus = _JobSkills("skills:test")
+    corpus.index = SkillIndex()
+    session = AsyncSession()
+    kept, dropped = uuid.uuid4(), uuid.uuid4()
+
+    corpus.put(session, kept, ["python"])
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    await corpus.lane.run(lambda: None)  # the lane runs in submission order
+    assert kept in corpus.index
+
+    # a rolled back create leaves no phantom id, a rolled back deactivate keeps the row
+    corpus.put(session, dropped, ["rust"])
+    corpus.discard(session, kept)
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    await corpus.lane.run(lambda: None)
+    assert kept in corpus.index and dropped not in corpus.index
+
+    corpus.put(session, dropped, ["rust"])
+    corpus.discard(session, dropped)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    await corpus.lane.run(lambda: None)
+    assert dropped not in corpus.index and len(corpus.index) == 1
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.ml.embeddings import (
+    cosine_scores,
+    cosine_similarity,
+    csr_cross_scores,
+    csr_scores,
+    embed_csr,
+    embed_matrix,
+    embed_sparse,
+    embed_texts,
+    pack_sparse,
+    pack_sparse_q8,
+    sparse_dot,
+    unpack_sparse,
+    unpack_sparse_q8,
+)
+
+TEXTS = [
+    "Senior Python engineer, FastAPI and Postgres",
+    "React + TypeScript frontend developer",
+    "",
+    "python python data engineer spark",
+]
+
+
+def test_embed_matrix_matches_list_embeddings():
+    mat = embed_matrix(TEXTS, dims=512)
+    assert mat.dtype == np.float32
+    assert mat.shape == (len(TEXTS), 512)
+    assert mat.flags["C_CONTIGUOUS"]
+    ref = np.asarray(embed_texts(TEXTS, dims=512))
+    assert np.allclose(mat, ref, atol=1e-6)
+    assert not mat[2].any()
+
+
+def test_cosine_scores_matches_cosine_similarity():
+    mat = embed_matrix(TEXTS, dims=512)
+    vecs = embed_texts(TEXTS, dims=512)
+    scores = cosine_scores(mat, mat[0])
+    for i, v in enumerate(vecs):
+        assert abs(float(scores[i]) - cosine_similarity(vecs[0], v)) <= 1e-6
+
+
+def test_sparse_matches_dense():
+    dense = embed_matrix(TEXTS, dims=512)
+    sparse = embed_sparse(TEXTS, dims=512)
+    for row, sv in zip(dense, sparse):
+        back = np.zeros(512, dtype=np.float32)
+        back[sv.indices] = sv.values
+        assert np.allclose(back, row, atol=1e-6)
+    assert len(sparse[2].indices) == 0
+
+    csr = embed_csr(TEXTS, dims=512)
+    assert csr.n_rows == len(TEXTS)
+    assert np.allclose(csr_scores(csr, sparse[0]), cosine_scores(dense, dense[0]), atol=1e-6)
+    assert abs(sparse_dot(sparse[0], sparse[3]) - float(cosine_scores(dense, dense[3])[0])) <= 1e-6
+
+
+def test_sparse_large_dims():
+    dims = 1 << 18
+    csr = embed_csr(TEXTS, dims=dims)
+    assert csr.dims == dims
+    assert len(csr.indices) < 32
+    scores = csr_scores(csr, embed_sparse([TEXTS[0]], dims=dims)[0])
+    assert abs(float(scores[0]) - 1.0) <= 1e-6
+
+
+def test_pack_unpack_roundtrip():
+    for sv in embed_sparse(TEXTS, dims=512):
+        back = unpack_sparse(pack_sparse(sv), 512)
+        assert np.array_equal(back.indices, sv.indices)
+        assert np.array_equal(back.values, sv.values)
+
+
+def test_csr_cross_scores_match_per_query_scores():
+    docs = embed_csr(["python fastapi postgres", "java spring", "", "python data pandas numpy"] * 5)
+    queries = embed_csr(["python developer", "spring boot java", ""])
+    got = csr_cross_scores(queries, docs, block=3)
+    assert got.shape == (3, docs.n_rows)
+    for i in range(queries.n_rows):
+        assert np.allclose(got[i], csr_scores(docs, queries.row(i)), atol=1e-6)
+
+
+def test_pack_sparse_q8_roundtrip_is_close_and_compact():
+    v = embed_sparse(["Senior Python engineer, FastAPI and Postgres, python python"])[0]
+    data = pack_sparse_q8(v)
+    assert len(data) == 4 + 3 * len(v.indices)
+    back = unpack_sparse_q8(data)
+    assert np.array_equal(back.indices, v.indices)
+    assert np.allclose(back.values, v.values, atol=v.values.max() / 255)
+    assert abs(sparse_dot(back, v) - 1.0) < 1e-3
+
+    wide = embed_sparse(["Senior Python engineer"], dims=1 << 18)[0]
+    assert np.array_equal(unpack_sparse_q8(pack_sparse_q8(wide), 1 << 18).indices, wide.indices)
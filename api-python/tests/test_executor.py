@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.exceptions import OverloadedError
+from app.ml.executor import MlExecutor
+
+
+async def test_executor_bounds_queue_and_records_latency():
+    ex = MlExecutor("test", ThreadPoolExecutor(1), max_workers=1, max_queue=1)
+    gate = threading.Event()
+
+    def _blocked() -> str:
+        gate.wait(5)
+        return "done"
+
+    first = asyncio.create_task(ex.run(_blocked))
+    second = asyncio.create_task(ex.run(time.sleep, 0.01))
+    await asyncio.sleep(0.05)
+    with pytest.raises(OverloadedError):
+        await ex.run(time.sleep, 0)
+
+    gate.set()
+    assert await first == "done"
+    await second
+    stats = ex.stats()
+    assert stats["rejected"] == 1 and stats["in_flight"] == 0
+    assert stats["execution"]["count"] == 2
+    # the second call waited for the first one to finish
+    assert stats["queue_wait"]["max_ms"] >= 40
+    ex.shutdown()
+
+
+async def test_inline_executor_and_fire_and_forget_order():
+    ex = MlExecutor("inline", None, max_workers=1, max_queue=0)
+    assert await ex.run(sum, [1, 2, 3]) == 6
+
+    lane = MlExecutor("lane", ThreadPoolExecutor(1), max_workers=1, max_queue=8)
+    seen = []
+    for i in range(5):
+        lane.submit(seen.append, i)
+    assert await lane.run(list, seen) == [0, 1, 2, 3, 4]
+    lane.submit(int, "not a number")  # logged, counted, never raised
+    await lane.run(time.sleep, 0)
+    assert lane.stats()["failed"] == 1
+    lane.shutdown()
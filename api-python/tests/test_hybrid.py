@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.ml.embeddings import embed_csr
+from app.ml.hybrid import HybridWeights, fuse_scores
+from app.ml.skills import SkillVocab, canonicalize_many
+
+
+def test_fuse_scores_combines_signals_and_drops_recency_only_rows():
+    vocab = SkillVocab()
+    docs = [
+        ("python backend engineer", ["Python", "SQL"]),
+        ("python backend engineer", ["Python", "SQL"]),  # same as 0 but older
+        ("frontend react developer", ["React"]),
+        ("gardener", []),                                # newest, but no overlap at all
+    ]
+    packed = vocab.encode(canonicalize_many(s for _, s in docs), learn=True)
+    matrix = embed_csr([t for t, _ in docs])
+    query = embed_csr(["senior python engineer"]).row(0)
+    age = np.array([1.0, 60.0, 5.0, 0.0])
+    w = HybridWeights(skills=0.5, text=0.4, recency=0.1, half_life_days=30.0)
+
+    ranked = fuse_scores(vocab.encode([["python"]]), packed, matrix, query, age, w, 10, ["a", "b", "c", "d"])
+    rows = [r[0] for r in ranked]
+    assert rows == [0, 1]  # 2 shares nothing with the query, 3 only has recency
+
+    row, fused, skill, text, recency = ranked[0]
+    assert skill == 0.7071 and np.isclose(recency, 0.5 ** (1 / 30))
+    assert np.isclose(fused, 0.5 * skill + 0.4 * text + 0.1 * recency)
+    assert ranked[0][1] > ranked[1][1] and ranked[0][3] == ranked[1][3]
+
+    # text-only weighting ignores skills and recency; ties fall back to the keys
+    only_text = HybridWeights(skills=0.0, text=1.0, recency=0.0, half_life_days=30.0)
+    ranked = fuse_scores(vocab.encode([["python"]]), packed, matrix, query, age, only_text, 1, ["b", "a", "c", "d"])
+    assert [r[0] for r in ranked] == [1]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.ml.embeddings import csr_scores, embed_csr, embed_sparse, stack_sparse
+from app.ml.idf import DfTable, df_delta
+from app.models.embedding import JobEmbedding
+
+DOCS = [
+    f"{lang} engineer with team experience"
+    for lang in ("python", "java", "rust", "golang", "scala", "kotlin", "swift", "ruby")
+]
+
+
+def _table(vecs) -> DfTable:
+    t = DfTable("jobs", JobEmbedding)
+    t.apply(*df_delta(vecs, []))
+    return t
+
+
+def test_df_delta_counts_replacements():
+    old = embed_sparse(["python team"])
+    new = embed_sparse(["python engineer"])
+    t = _table(embed_sparse(DOCS))
+    assert t.n_docs == 8
+    t.apply(*df_delta(new, old))
+    assert t.n_docs == 8
+    team = embed_sparse(["team"])[0].indices[0]
+    assert t.df[team] == 7
+
+
+def test_idf_weighting_favours_rare_terms():
+    docs = embed_csr(DOCS + ["python"])
+    t = _table([docs.row(i) for i in range(docs.n_rows)])
+    query = embed_sparse(["python engineer with team experience"])[0]
+    weighted = t.weight(query)
+    assert np.isclose(np.dot(weighted.values, weighted.values), 1.0, atol=1e-5)
+
+    plain = csr_scores(docs, query)
+    idf = csr_scores(docs, weighted)
+    # boilerplate overlap ("java engineer with team experience") no longer outranks
+    # the document that only shares the rare term ("python")
+    assert plain[1] > plain[-1]
+    assert idf[-1] > idf[1]
+
+    batch = t.weight_csr(stack_sparse([query, query]))
+    assert np.allclose(batch.row(1).values, weighted.values, atol=1e-6)
+
+
+def test_empty_table_is_plain_tf():
+    t = DfTable("jobs", JobEmbedding)
+    q = embed_sparse(["python team"])[0]
+    assert np.allclose(t.weight(q).values, q.values)
+
+
+async def test_record_df_buffers_committed_deltas_and_flushes_when_due(monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.core.config import get_settings
+    from app.ml import idf
+
+    writes = []
+
+    async def _write_df(session, corpus, delta, n_docs):
+        writes.append((delta.copy(), n_docs))
+
+    monkeypatch.setattr(idf, "_write_df", _write_df)
+    monkeypatch.setattr(get_settings(), "ML_IDF_FLUSH_SECONDS", 3600)
+    t = DfTable("jobs", JobEmbedding)
+    vecs = embed_sparse(DOCS[:2])
+
+    session = AsyncSession()
+    await idf.record_df(session, t, vecs[:1])
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    assert t.n_docs == 0
+
+    await idf.record_df(session, t, vecs)
+    assert t.n_docs == 0  # applied on commit only
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    assert t.n_docs == 2 and writes == []
+
+    # a due flush goes out with the next write; lost with a rollback, it is kept for later
+    monkeypatch.setattr(get_settings(), "ML_IDF_FLUSH_SECONDS", 0)
+    await idf.record_df(session, t, [], vecs[:1])
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    await idf.record_df(session, t, [], [])
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    assert [n for _, n in writes] == [2, 2]
+    assert np.array_equal(writes[-1][0], t.df) and t.n_docs == 2
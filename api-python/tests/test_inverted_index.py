@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.ml.embeddings import csr_scores, embed_sparse, stack_sparse
+from app.ml.inverted import InvertedIndex
+from benchmarks.synthetic import sparse_corpus
+
+
+def _exact(mat, q, k, alive):
+    s = csr_scores(mat, q)
+    s[~alive] = 0
+    top = np.argsort(-s, kind="stable")[:k]
+    return [float(s[i]) for i in top if s[i] > 0]
+
+
+def test_inverted_topk_is_exact_with_deletes():
+    mat = sparse_corpus(3000, seed=1)
+    queries = sparse_corpus(20, seed=2)
+    index = InvertedIndex()
+    index.add_matrix(list(range(mat.n_rows)), mat)
+
+    alive = np.ones(mat.n_rows, dtype=bool)
+    alive[::4] = False
+    index.remove(np.flatnonzero(~alive).tolist())
+    assert len(index) == int(alive.sum())
+
+    for i in range(queries.n_rows):
+        q = queries.row(i)
+        got = index.query(q, 10)
+        assert np.allclose([s for _, s in got], _exact(mat, q, 10, alive), atol=2e-6)
+        assert all(alive[doc] for doc, _ in got)
+
+
+def test_inverted_replace_and_compact():
+    vecs = embed_sparse(["python fastapi postgres", "react typescript", "python django"])
+    index = InvertedIndex()
+    index.add(["a", "b", "c"], vecs)
+    assert [i for i, _ in index.query(vecs[0], 1)] == ["a"]
+
+    index.add(["a"], [vecs[1]])  # replace
+    assert {i for i, _ in index.query(vecs[1], 5)} == {"a", "b"}
+
+    filler = sparse_corpus(3000, seed=3)
+    ids = [f"f{i}" for i in range(filler.n_rows)]
+    index.add_matrix(ids, filler)
+    index.remove(ids)  # enough tombstones to trigger compaction
+    assert len(index) == 3
+    assert index.query(vecs[2], 1)[0] == ("c", 1.0)
+    assert index.query(stack_sparse([vecs[1]]).row(0), 5)[0][1] == 1.0
+
+
+def test_quantized_index_shortlist_covers_exact_topk():
+    mat = sparse_corpus(3000, seed=4)
+    queries = sparse_corpus(20, seed=5)
+    exact = InvertedIndex()
+    exact.add_matrix(list(range(mat.n_rows)), mat)
+    q8 = InvertedIndex(quantized=True)
+    q8.add_matrix(list(range(mat.n_rows)), mat)
+    q8.remove([0, 1, 2])
+    exact.remove([0, 1, 2])
+
+    for i in range(queries.n_rows):
+        q = queries.row(i)
+        coarse = q8.query(q, 30)
+        assert all(abs(s - float(csr_scores(stack_sparse([mat.row(d)]), q)[0])) < 0.01 for d, s in coarse)
+        assert {d for d, _ in exact.query(q, 10)} <= {d for d, _ in coarse}
+
+
+def test_single_puts_land_in_the_tail_and_stay_exact():
+    mat = sparse_corpus(3000, seed=6)
+    queries = sparse_corpus(10, seed=7)
+    index = InvertedIndex()
+    index.add_matrix(list(range(2990)), stack_sparse([mat.row(i) for i in range(2990)]))
+    for p in index._postings.values():
+        p.freeze(index._alive)
+    main = {t: p.docs for t, p in index._postings.items()}
+
+    for i in range(2990, mat.n_rows):
+        index.add([i], [mat.row(i)])
+        assert index.query(mat.row(i), 1)[0][0] == i
+    # the big main lists were not rebuilt for a handful of puts
+    touched = [t for t in mat.row(mat.n_rows - 1).indices.tolist() if t in main]
+    assert touched and all(index._postings[t].docs is main[t] for t in touched)
+    assert all(len(index._postings[t].tail_docs) for t in touched)
+
+    alive = np.ones(mat.n_rows, dtype=bool)
+    for i in range(queries.n_rows):
+        q = queries.row(i)
+        assert np.allclose([s for _, s in index.query(q, 10)], _exact(mat, q, 10, alive), atol=2e-6)
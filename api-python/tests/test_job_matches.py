@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.core.dependencies import get_job_service
+from app.models.match import JobMatch
+from app.repositories import match_repo
+from app.repositories.match_repo import decode_cursor, encode_cursor
+from app.routes import auth as auth_routes
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    rid = uuid.uuid4()
+    for score in (0.1 + 0.2, 1.0, 0.0):
+        assert decode_cursor(encode_cursor(score, rid)) == (score, rid)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+async def test_list_job_matches_is_one_keyset_query():
+    captured = []
+
+    class _Session:
+        async def execute(self, q):
+            captured.append(q)
+            return SimpleNamespace(all=lambda: [])
+
+    await match_repo.list_job_matches(_Session(), uuid.uuid4(), limit=5, after=(0.5, uuid.uuid4()))
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "jobmatch.score < " in sql and "jobmatch.resume_id > " in sql
+    assert "ORDER BY pyapi.jobmatch.score DESC, pyapi.jobmatch.resume_id" in sql
+    assert {i.name for i in JobMatch.__table__.indexes} == {"ix_jobmatch_job_score"}
+
+
+def test_candidates_route_pages_and_explains(app):
+    rid = uuid.uuid4()
+    calls = []
+
+    class _Service:
+        async def list_matched_candidates(self, job_id, *, limit, cursor):
+            calls.append((limit, cursor))
+            row = SimpleNamespace(resume_id=rid, full_name="Ada", score=0.91234567, reasons=["python"])
+            return "Backend Engineer", [row], "next"
+
+    async def _admin():
+        return {"sub": "user_test_123", "org_id": "org_1", "org_role": "org:admin"}
+
+    app.dependency_overrides[auth_routes.get_current_user] = _admin
+    app.dependency_overrides[get_job_service] = lambda: _Service()
+    try:
+        with TestClient(app) as c:
+            job_id = uuid.uuid4()
+            plain = c.get(f"/v1/jobs/{job_id}/candidates", params={"limit": 1}).json()
+            explained = c.get(f"/v1/jobs/{job_id}/candidates", params={"cursor": "abc", "explain": True}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert calls == [(1, None), (20, "abc")]
+    assert plain["job_title"] == "Backend Engineer" and plain["next_cursor"] == "next"
+    assert plain["candidates"] == [{"resume_id": str(rid), "full_name": "Ada", "score": 0.912346, "reasons": None}]
+    assert explained["candidates"][0]["reasons"] == ["python"]
+
+
+async def test_merge_resume_matches_skips_pairs_below_a_full_jobs_floor():
+    full_job, open_job, rid = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    executed = []
+
+    class _Session:
+        async def execute(self, q, params=None):
+            executed.append((q, params))
+            # only full_job already holds `keep` matches; its keep-th score is 0.5
+            return SimpleNamespace(all=lambda: [(full_job, 0.5)], rowcount=0)
+
+    matches = [{"job_id": full_job, "score": 0.4}, {"job_id": open_job, "score": 0.1}]
+    assert await match_repo.merge_resume_matches(_Session(), rid, matches, keep=3) == 1
+    inserted = [p for _, p in executed if p is not None]
+    assert [(r["job_id"], r["resume_id"]) for r in inserted[0]] == [(open_job, rid)]
+    assert len(executed) == 3  # drop old rows, read floors, insert; nothing to trim
+    assert "ON CONFLICT (job_id, resume_id) DO UPDATE" in str(executed[2][0].compile(dialect=postgresql.dialect()))
+
+    executed.clear()
+    matches[0]["score"] = 0.9
+    assert await match_repo.merge_resume_matches(_Session(), rid, matches, keep=3) == 2
+    trim = str(executed[-1][0].compile(dialect=postgresql.dialect()))
+    assert trim.startswith("DELETE FROM pyapi.jobmatch") and "row_number() OVER" in trim
+
+
+def test_match_tasks_are_sent_once_after_commit_only(monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.ml import match_queue
+    from app.workers.celery_app import celery_app
+
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args: sent.append((name, args)))
+    session = AsyncSession()
+    job_id = uuid.uuid4()
+
+    match_queue.schedule(session, match_queue.JOB_WRITTEN, job_id)
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    assert sent == []
+
+    match_queue.schedule(session, match_queue.JOB_WRITTEN, job_id)
+    match_queue.schedule(session, match_queue.JOB_WRITTEN, job_id)
+    match_queue.schedule(session, match_queue.JOB_DEACTIVATED, job_id)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    assert sent == [(match_queue.JOB_WRITTEN, [str(job_id)]), (match_queue.JOB_DEACTIVATED, [str(job_id)])]
+
+
+async def test_match_tasks_are_published_off_the_event_loop(monkeypatch):
+    import threading
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.ml import match_queue
+    from app.workers.celery_app import celery_app
+
+    loop_thread = threading.get_ident()
+    published = asyncio.Event()
+    threads = []
+    loop = asyncio.get_running_loop()
+
+    def _send_task(name, args):
+        threads.append(threading.get_ident())
+        loop.call_soon_threadsafe(published.set)
+
+    monkeypatch.setattr(celery_app, "send_task", _send_task)
+    session = AsyncSession()
+    match_queue.schedule(session, match_queue.RESUME_WRITTEN, uuid.uuid4())
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    await asyncio.wait_for(published.wait(), 5)
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import random
+import re
+
+from app.ml.keywords import KeywordScanner, scanner_for
+
+
+def _brute(keywords, text):
+    """
+    Overlapping whole-word occurrences of each keyword in the space-joined words.
+    """
+    words = " " + " ".join(re.findall(r"[a-z0-9+#]+", text.lower())) + " "
+    return [sum(1 for i in range(len(words)) if words.startswith(f" {k} ", i)) for k in keywords]
+
+
+def test_whole_words_multi_word_and_overlaps():
+    s = KeywordScanner(["Java", "machine learning", "learning", "C++", "Node.js", "java", ""])
+    assert s.keywords == ["java", "machine learning", "learning", "c++", "node js"]
+    text = "JavaScript dev; Java/Spring. Machine-learning & deep learning, C++17? c++ and NODE.JS"
+    assert s.scan(text) == {"java": 1, "machine learning": 1, "learning": 2, "c++": 1, "node js": 1}
+    assert s.score(text) == 5
+    assert s.score("") == 0 and KeywordScanner([]).counts("anything") == []
+
+
+def test_counts_match_a_naive_word_scan():
+    rnd = random.Random(11)
+    vocab = ["a", "b", "ab", "c", "a b", "b a b", "c c", "d"]
+    for _ in range(200):
+        kws = rnd.sample(vocab, rnd.randint(1, len(vocab)))
+        text = " ".join(rnd.choice(["a", "b", "ab", "c", "d", "x"]) for _ in range(rnd.randint(0, 30)))
+        assert KeywordScanner(kws).counts(text) == _brute(kws, text)
+
+
+def test_scanner_is_compiled_once_per_keyword_list():
+    assert scanner_for(["python", "sql"]) is scanner_for(["python", "sql"])
+    assert scanner_for(["python", "sql"]) is not scanner_for(["sql", "python"])
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import OverloadedError
+from app.db import pg_pool
+
+
+class _FakePool:
+    def __init__(self, size: int) -> None:
+        self.free = asyncio.Queue()
+        for i in range(size):
+            self.free.put_nowait(f"conn{i}")
+        self.size = size
+        self.closed = self.terminated = False
+
+    async def acquire(self, timeout=None):
+        return await asyncio.wait_for(self.free.get(), timeout)
+
+    async def release(self, conn):
+        self.free.put_nowait(conn)
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self.free.qsize()
+
+    async def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture()
+def fake_pools(monkeypatch):
+    created = []
+
+    async def _create_pool(**kw):
+        created.append(_FakePool(kw["max_size"]))
+        return created[-1]
+
+    monkeypatch.setattr(pg_pool.asyncpg, "create_pool", _create_pool)
+    monkeypatch.setattr(pg_pool, "_pg_pool", None)
+    return created
+
+
+async def test_pool_is_shared_bounded_and_measured(fake_pools, monkeypatch):
+    async def _main():
+        pool = pg_pool.get_pg_pool()
+        monkeypatch.setattr(pool, "max_size", 1)
+        monkeypatch.setattr(pool, "acquire_timeout", 0.01)
+        async with pg_pool.pg_connection() as conn:
+            assert conn == "conn0" and pg_pool.get_pg_pool() is pool
+            with pytest.raises(OverloadedError):
+                async with pg_pool.pg_connection():
+                    pass
+        async with pg_pool.pg_connection() as again:
+            assert again == "conn0"
+        stats = pg_pool.pg_pool_stats()
+        assert stats["size"] == 1 and stats["idle"] == 1 and stats["acquire_timeouts"] == 1
+        assert stats["acquire_wait"]["count"] == 2
+        return pool
+
+    # the first pool lives on a loop of its own, like a Celery task's asyncio.run
+    first = await asyncio.to_thread(asyncio.run, _main())
+    assert len(fake_pools) == 1
+
+    # a new event loop must not reuse the old loop's pool
+    second = await _main()
+    assert second is not first and fake_pools[0].terminated and len(fake_pools) == 2
+
+    await pg_pool.close_pg_pool()
+    assert fake_pools[1].closed and pg_pool.pg_pool_stats() == {"open": False}
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import JobNotFoundError
+from app.routes import auth as auth_routes
+from app.services.ranking import RANK_TASK, rank_job_keywords, upsert_rankings
+from app.workers.celery_app import celery_app
+
+
+class _Conn:
+    def __init__(self) -> None:
+        self.calls = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.calls.append("begin")
+        yield
+        self.calls.append("commit")
+
+    async def execute(self, sql, *args):
+        self.calls.append(" ".join(sql.split())[:40])
+
+    async def copy_records_to_table(self, table, *, records, columns):
+        self.calls.append(("copy", table, tuple(columns), list(records)))
+
+
+async def test_upsert_rankings_copies_once_and_merges_in_one_statement():
+    conn = _Conn()
+    stats = await upsert_rankings(conn, "job-1", [("r1", 2), ("r2", 0.0)])
+
+    assert conn.calls[0] == "begin" and conn.calls[-1] == "commit"
+    copies = [c for c in conn.calls if isinstance(c, tuple)]
+    assert copies == [("copy", "resume_ranking_stage", ("job_id", "resume_id", "score"),
+                       [("job-1", "r1", 2.0), ("job-1", "r2", 0.0)])]
+    assert sum(1 for c in conn.calls if isinstance(c, str) and c.startswith("insert into pyapi.resume_ranking")) == 1
+    assert stats["rows"] == 2 and stats["rows_per_sec"] > 0
+
+
+async def test_upsert_rankings_without_rows_touches_nothing():
+    conn = _Conn()
+    assert (await upsert_rankings(conn, "job-1", []))["rows"] == 0
+    assert conn.calls == []
+
+
+class _Reader:
+    def __init__(self, resumes, keywords="java sql"):
+        self.resumes = resumes
+        self.keywords = keywords
+        self.in_tx = False
+
+    async def fetchrow(self, sql, job_id):
+        return {"keywords": self.keywords} if self.keywords is not None else None
+
+    async def fetchval(self, sql, job_id):
+        return len(self.resumes)
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.in_tx = True
+        yield
+        self.in_tx = False
+
+    async def cursor(self, sql, job_id, prefetch=None):
+        assert self.in_tx  # server-side cursors only live inside a transaction
+        rows = iter(self.resumes)
+
+        class _Cursor:
+            async def fetch(self, n):
+                return [r for _, r in zip(range(n), rows)]
+
+        return _Cursor()
+
+
+async def test_rank_job_keywords_streams_scores_and_flushes_per_chunk():
+    resumes = [{"resume_id": f"r{i}", "text": "Java and SQL" if i % 2 else "JavaScript"} for i in range(5)]
+    writer, progress = _Conn(), []
+    out = await rank_job_keywords(_Reader(resumes), writer, "job-1", chunk_size=2, on_progress=progress.append)
+
+    copies = [c[3] for c in writer.calls if isinstance(c, tuple)]
+    assert [len(c) for c in copies] == [2, 2, 1] and writer.calls.count("commit") == 3
+    assert [r[2] for c in copies for r in c] == [0.0, 2.0, 0.0, 2.0, 0.0]
+    assert [p["percent"] for p in progress] == [40.0, 80.0, 100.0]
+    assert out["done"] == out["total"] == 5 and out["chunks"] == 3
+
+
+async def test_rank_job_keywords_unknown_job():
+    with pytest.raises(JobNotFoundError):
+        await rank_job_keywords(_Reader([], keywords=None), _Conn(), "nope")
+
+
+def test_rank_route_queues_task_and_reports_progress(app, monkeypatch):
+    sent = []
+    infos = {"rank:j:1": {"job_id": "j", "done": 4, "total": 10, "percent": 40.0}, "rank:j:2": {"job_id": "other"}}
+
+    def _send_task(name, args, task_id):
+        sent.append((name, args))
+        return SimpleNamespace(id=task_id)
+
+    @asynccontextmanager
+    async def _pg_connection():
+        yield SimpleNamespace(fetchval=_fetchval)
+
+    async def _fetchval(sql, job_id):
+        return 1 if job_id == "j" else None
+
+    monkeypatch.setattr(celery_app, "send_task", _send_task)
+    monkeypatch.setattr(
+        celery_app, "AsyncResult", lambda task_id: SimpleNamespace(state="PROGRESS", info=infos[task_id])
+    )
+    monkeypatch.setattr("app.routes.ranking.pg_connection", _pg_connection)
+
+    async def _admin():
+        return {"sub": "user_test_123", "org_id": "org_1", "org_role": "org:admin"}
+
+    app.dependency_overrides[auth_routes.get_current_user] = _admin
+    try:
+        with TestClient(app) as c:
+            queued = c.post("/v1/jobs/j/rank", params={"chunk_size": 500})
+            missing = c.post("/v1/jobs/nope/rank")
+            status = c.get("/v1/jobs/j/rank/rank:j:1").json()
+            foreign = [c.get(f"/v1/jobs/{job}/rank/{tid}").status_code for job, tid in (("k", "rank:j:1"), ("j", "rank:j:2"))]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert queued.status_code == 202 and queued.json()["task_id"].startswith("rank:j:")
+    assert queued.json()["status_url"] == f"/v1/jobs/j/rank/{queued.json()['task_id']}"
+    assert missing.status_code == 404
+    assert sent == [(RANK_TASK, ["j", 500])]
+    assert status == {"job_id": "j", "task_id": "rank:j:1", "state": "PROGRESS", "done": 4, "total": 10, "percent": 40.0}
+    assert foreign == [404, 404]
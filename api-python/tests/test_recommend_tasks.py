@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import uuid
+
+from app.workers.recommend_tasks import recommend_jobs_batch_task
+
+
+def test_recommend_batch_task_publishes_each_chunk(monkeypatch):
+    class _DummySession:
+        async def commit(self): ...
+
+    class _DummyCtx:
+        async def __aenter__(self):
+            return _DummySession()
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+    monkeypatch.setattr("app.workers.recommend_tasks.async_session", lambda: _DummyCtx(), raising=True)
+
+    rids = [str(uuid.uuid4()) for _ in range(5)]
+
+    async def _fake_iter(session, *, resume_ids, top_k, chunk_size):
+        for i in range(0, len(resume_ids), chunk_size):
+            yield {str(r): [{"job_id": "j", "score": 0.5}] for r in resume_ids[i:i + chunk_size]}
+
+    published = {}
+
+    async def _fake_set(key, obj, *, ttl=None):
+        published[key] = obj
+
+    async def _noop():
+        return None
+
+    monkeypatch.setattr("app.workers.recommend_tasks.iter_job_recommendations", _fake_iter, raising=True)
+    monkeypatch.setattr("app.workers.recommend_tasks.cache_json_set", _fake_set, raising=True)
+    monkeypatch.setattr("app.workers.recommend_tasks.close_redis", _noop, raising=True)
+
+    out = recommend_jobs_batch_task(rids, top_k=3, chunk_size=2)
+    assert out["chunks"] == 3 and out["resumes"] == 5
+    assert sorted(published) == [f"{out['key_prefix']}{n}" for n in range(3)]
+    merged = {k: v for chunk in published.values() for k, v in chunk.items()}
+    assert set(merged) == set(rids)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.ml import result_cache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+def _commit(corpus):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    session = AsyncSession()
+    result_cache.bump_after_commit(session, corpus)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+
+
+async def test_bumping_the_corpus_version_invalidates_cached_results(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(result_cache, "_bump_client", fake)
+    monkeypatch.setattr("app.ml.result_cache.get_redis", lambda: fake, raising=True)
+    monkeypatch.setattr("app.integrations.redis_cache.get_redis", lambda: fake, raising=True)
+
+    key = await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5)
+    assert await result_cache.get_results(key) is None
+    await result_cache.put_results(key, [{"job_id": "j1", "score": 0.9}])
+    assert await result_cache.get_results(
+        await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5)
+    ) == [{"job_id": "j1", "score": 0.9}]
+    # Different top_k and the other corpus' version are separate keys.
+    assert await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 6) != key
+
+    # outside the loop thread the bump is sent inline, before the commit returns
+    await asyncio.to_thread(_commit, result_cache.RESUMES)
+    assert await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5) == key
+
+    await asyncio.to_thread(_commit, result_cache.JOBS)
+    fresh = await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5)
+    assert fresh != key
+    assert await result_cache.get_results(fresh) is None
+
+
+def test_bumps_wait_for_commit_and_are_dropped_on_rollback(monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    fake = _FakeRedis()
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(result_cache, "_bump_client", fake)
+    session = AsyncSession()
+
+    result_cache.bump_after_commit(session, result_cache.JOBS)
+    assert fake.data == {}
+    session.sync_session.dispatch.after_rollback(session.sync_session)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    assert fake.data == {}
+
+    result_cache.bump_after_commit(session, result_cache.JOBS)
+    result_cache.bump_after_commit(session, result_cache.JOBS)
+    session.sync_session.dispatch.after_commit(session.sync_session)
+    assert fake.data == {"reco:corpus:jobs:version": b"1"}
+
+
+async def test_cache_is_bypassed_when_redis_is_down(monkeypatch):
+    def _down():
+        raise RuntimeError("Connection refused")
+
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr("app.ml.result_cache.get_redis", _down, raising=True)
+
+    assert await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5) is None
+    await result_cache.put_results(None, [])
+    assert await result_cache.get_results(None) is None
+
+
+async def test_cache_is_off_without_redis_url_and_logs_once(monkeypatch, caplog):
+    def _unreachable():
+        raise AssertionError("Redis must not be touched without REDIS_URL")
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(result_cache, "_disabled_logged", False)
+    monkeypatch.setattr("app.ml.result_cache.get_redis", _unreachable, raising=True)
+    caplog.set_level("INFO", logger=result_cache.__name__)
+
+    for _ in range(3):
+        assert await result_cache.result_key(result_cache.JOBS, "resume:r1:t0", 5) is None
+    _commit(result_cache.JOBS)
+    assert [r.message for r in caplog.records] == ["reco_cache_disabled"]
+    assert not any(r.exc_info for r in caplog.records)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+
+from app.ml.skills import SkillIndex, SkillVocab, canonicalize, canonicalize_many, overlap_scores, skill_tags
+from app.services.matching import score_skills_overlap
+
+_VOCAB = ["Python", "python ", "SQL", "C++", "c#", "Go", "Rust", "AWS", "Docker", "K8s", "React", "node.js", "Node JS"]
+
+
+def _brute(query, corpus, k):
+    scored = [(score_skills_overlap(query, skills), i) for i, skills in corpus.items()]
+    scored = sorted((x for x in scored if x[0] > 0), key=lambda x: (-x[0], x[1]))
+    return [(i, s) for s, i in scored[:k]]
+
+
+def test_skill_index_matches_exhaustive_overlap():
+    rnd = random.Random(3)
+    corpus = {i: rnd.sample(_VOCAB, rnd.randint(0, 6)) for i in range(400)}
+    index = SkillIndex()
+    index.add(list(corpus), canonicalize_many(corpus.values()))
+
+    for _ in range(30):
+        q = rnd.sample(_VOCAB, rnd.randint(1, 5))
+        assert index.query(skill_tags(q), 15) == _brute(q, corpus, 15)
+    assert index.query(["haskell"], 5) == []
+    assert index.query(None, 5) == []
+
+
+def test_skill_index_replace_remove_and_compact():
+    index = SkillIndex()
+    index.add([1, 2, 3], [["python", "sql"], ["python"], ["go"]])
+    index.add([2], [["go", "rust"]])
+    index.remove([3])
+    assert 3 not in index and len(index) == 2
+    assert index.query(["go"], 5) == [(2, 0.7071)]
+    assert index.query(["python"], 5) == [(1, 0.7071)]
+
+    ids = list(range(10, 3000))
+    index.add(ids, [["docker"]] * len(ids))
+    index.remove(ids[:-1])  # triggers compaction
+    assert len(index) == 3
+    assert index.query(["docker", "go"], 5) == [(2, 0.5), (2999, 0.7071)][::-1]
+
+
+def test_batch_overlap_matches_scalar_form():
+    rnd = random.Random(5)
+    vocab = SkillVocab()
+    rows = [rnd.sample(_VOCAB, rnd.randint(0, 6)) for _ in range(200)]
+    packed = vocab.encode(canonicalize_many(rows), learn=True)
+    # 70 extra tags widen the vocabulary past one 64-bit word after `packed` was encoded
+    vocab.learn(f"extra{i}" for i in range(70))
+    for q in (rnd.sample(_VOCAB, rnd.randint(1, 5)) + ["extra69", "unknown"] for _ in range(20)):
+        got = overlap_scores(vocab.encode([skill_tags(q)]), packed)
+        assert got.tolist() == [score_skills_overlap(q, r) for r in rows]
+
+
+def test_sql_ranking_uses_normalized_overlap_operator():
+    from sqlalchemy.dialects import postgresql
+
+    from app.models.job import Job
+    from app.services.matching import _sql_ranked
+
+    sql = str(_sql_ranked(Job, Job.id, (Job.id, Job.title), ["python"], 5).compile(dialect=postgresql.dialect()))
+    assert "job.skills_norm && " in sql and "description" not in sql
+    assert "job.skills_version = " in sql
+    assert sql.rstrip().endswith("LIMIT %(param_2)s::INTEGER")
+
+
+def test_canonicalize_applies_synonyms_and_prefers_stored_tags():
+    from types import SimpleNamespace
+
+    from app.ml.skills import SKILL_CANON_VERSION, canonical_tag, row_tags
+
+    assert canonicalize(["Node JS", "node.js", "NodeJS", " Python3 ", ""]) == ["node js", "python"]
+    assert canonicalize(None) is None
+    assert canonical_tag("K8s") is canonical_tag("kubernetes")
+    # ambiguous short forms stay as written
+    assert canonicalize(["TF", "CI", "PG"]) == ["ci", "pg", "tf"]
+    assert score_skills_overlap(["JS", "k8s", "Postgres"], ["javascript", "Kubernetes", "PostgreSQL"]) == 1.0
+
+    row = SimpleNamespace(skills=["JS"], skills_norm=["stored"], skills_version=SKILL_CANON_VERSION)
+    assert row_tags(row) == ["stored"]
+    row.skills_version = "older"
+    assert row_tags(row) == ["javascript"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_VERSION, embed_sparse
+from app.ml.inverted import InvertedIndex
+from app.ml.snapshot import open_snapshot, snapshot_key, write_snapshot
+from benchmarks.synthetic import sparse_corpus
+
+
+def _corpus(n: int, seed: int):
+    m = sparse_corpus(n, seed=seed)
+    ids = [uuid.UUID(int=(i * 2654435761 + seed) % (1 << 128)) for i in range(n)]
+    return ids, [m.row(i) for i in range(n)]
+
+
+def _publish(path, ids, vecs, quantized=False):
+    return write_snapshot(
+        path, ids, vecs,
+        corpus="jobs", version=EMBEDDING_VERSION,
+        watermark=datetime(2024, 1, 1, tzinfo=timezone.utc), quantized=quantized,
+    )
+
+
+def test_snapshot_roundtrip_and_atomic_swap(tmp_path):
+    ids, vecs = _corpus(500, seed=1)
+    path = _publish(tmp_path / "jobs.snap", ids, vecs)
+    snap = open_snapshot(path)
+    assert snap is not None and snap.n_rows == 500 and snap.watermark.year == 2024
+    assert snap.key == snapshot_key(path)
+    row = snap.find(ids[7])
+    assert snap.id(row) == ids[7]
+    assert np.array_equal(snap.matrix.row(row).indices, vecs[7].indices)
+    assert snap.find(uuid.uuid4()) is None
+
+    _publish(path, ids[:10], vecs[:10])
+    assert snapshot_key(path) != snap.key
+    # the old mapping stays readable after the swap
+    assert snap.id(row) == ids[7]
+    assert open_snapshot(path).n_rows == 10
+    assert open_snapshot(tmp_path / "missing.snap") is None
+
+
+def _same(a, b, quantized):
+    # quantized lists are re-scaled when writes touch them, so codes may differ slightly
+    if not quantized:
+        return a == b
+    return len(a) == len(b) and np.allclose([s for _, s in a], [s for _, s in b], atol=5e-3)
+
+
+def test_index_from_snapshot_matches_built_index(tmp_path):
+    ids, vecs = _corpus(2000, seed=2)
+    queries = sparse_corpus(10, seed=3)
+    for quantized in (False, True):
+        snap = open_snapshot(_publish(tmp_path / f"q{quantized}.snap", ids, vecs, quantized))
+        mapped = InvertedIndex.from_snapshot(snap, quantized=quantized)
+        built = InvertedIndex(quantized=quantized)
+        built.add(ids, vecs)
+
+        extra = embed_sparse(["python fastapi postgres"])
+        for index in (mapped, built):
+            index.remove(ids[:50])
+            index.add([ids[60]], extra)  # replace a snapshot row
+            index.add([uuid.UUID(int=1)], extra)
+        assert len(mapped) == len(built) == 1951
+        assert ids[0] not in mapped and ids[60] in mapped and uuid.UUID(int=1) in mapped
+
+        for i in range(queries.n_rows):
+            q = queries.row(i)
+            assert _same(mapped.query(q, 10), built.query(q, 10), quantized)
+        assert {h for h, _ in mapped.query(extra[0], 2)} == {ids[60], uuid.UUID(int=1)}
+
+        mapped.remove(ids[50:1500])  # compaction detaches the snapshot
+        built.remove(ids[50:1500])
+        assert mapped._base is None
+        for i in range(queries.n_rows):
+            assert _same(mapped.query(queries.row(i), 10), built.query(queries.row(i), 10), quantized)
@@ -0,0 +1,26 @@
+import random
+
+import numpy as np
+
+from app.ml.topk import select_top_k, top_k_indices
+
+
+def test_select_top_k_matches_full_sort_with_id_tiebreak():
+    rng = random.Random(3)
+    rows = [(round(rng.random(), 1), i) for i in range(500)]
+    rng.shuffle(rows)
+    expected = sorted(rows, key=lambda x: (-x[0], x[1]))[:20]
+    assert select_top_k(iter(rows), 20, score=lambda x: x[0], tiebreak=lambda x: x[1]) == expected
+    assert select_top_k(rows, 0, score=lambda x: x[0], tiebreak=lambda x: x[1]) == []
+
+
+def test_top_k_indices_partial_selection():
+    rng = np.random.default_rng(5)
+    scores = np.round(rng.random(10_000), 2).astype(np.float32)
+    scores[:100] = 0.0
+    ids = [f"id-{i:05d}" for i in range(len(scores))][::-1]
+    got = top_k_indices(scores, 50, ids.__getitem__).tolist()
+    pos = [i for i in range(len(scores)) if scores[i] > 0]
+    expected = sorted(pos, key=lambda i: (-float(scores[i]), ids[i]))[:50]
+    assert got == expected
+    assert top_k_indices(np.zeros(8, dtype=np.float32), 3).tolist() == []